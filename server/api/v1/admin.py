@@ -0,0 +1,53 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+
+from core.dependencies import get_current_user
+from core.user_cache import CurrentUser
+from core.instrumentation import reset_route_stats, route_stats
+from core.security import password_hash_stats
+from core.jobs import job_stats
+from db.session import IS_SQLITE, engine, get_db
+from db.sqlite import sqlite_stats
+from services.previews import preview_stats
+from models.user import User, UserRole
+
+router = APIRouter(prefix="/admin", tags=["admin"])
+
+
+def require_admin(current_user: CurrentUser = Depends(get_current_user)) -> CurrentUser:
+    if current_user.role != UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    return current_user
+
+
+@router.get("/db-stats")
+def get_db_stats(current_user: CurrentUser = Depends(require_admin)):
+    return route_stats()
+
+
+@router.delete("/db-stats")
+def clear_db_stats(current_user: CurrentUser = Depends(require_admin)):
+    reset_route_stats()
+    return {"message": "DB stats reset"}
+
+
+@router.get("/password-hashing")
+def get_password_hashing_stats(current_user: CurrentUser = Depends(require_admin)):
+    return password_hash_stats()
+
+
+@router.get("/previews")
+def get_preview_stats(current_user: CurrentUser = Depends(require_admin)):
+    return preview_stats()
+
+
+@router.get("/jobs")
+def get_job_stats(current_user: CurrentUser = Depends(require_admin), db: Session = Depends(get_db)):
+    return job_stats(db)
+
+
+@router.get("/sqlite")
+def get_sqlite_stats(current_user: CurrentUser = Depends(require_admin)):
+    if not IS_SQLITE:
+        raise HTTPException(status_code=404, detail="Not a SQLite database")
+    return sqlite_stats(engine)
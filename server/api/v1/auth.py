@@ -1,7 +1,7 @@
 from typing import Optional
 from core.security import (
-    get_password_hash,
-    verify_password,
+    get_password_hash_async,
+    verify_and_update_password_async,
     create_access_token,
     create_refresh_token,
 
@@ -12,6 +12,8 @@ from db.session import get_db
 from fastapi import APIRouter, Depends, HTTPException, status
 from models.user import User
 from core.dependencies import get_current_user
+from core.user_cache import CurrentUser
+from starlette.concurrency import run_in_threadpool
 
 
 router = APIRouter(prefix="/auth", tags=["auth"])
@@ -19,20 +21,30 @@ router = APIRouter(prefix="/auth", tags=["auth"])
 
 
 @router.post("/register", response_model=TokenResponse)
-def register(user: UserCreate, db: Session = Depends(get_db)):
-    db_user = db.query(User).filter(User.email == user.email).first()
-    if db_user:
+async def register(user: UserCreate, db: Session = Depends(get_db)):
+    # Requêtes et commit dans le threadpool : la boucle d'événements ne bloque
+    # que sur le hash, calculé par le pool dédié
+    def email_taken() -> bool:
+        return db.query(User.id).filter(User.email == user.email).first() is not None
+
+    if await run_in_threadpool(email_taken):
         raise HTTPException(status_code=400, detail="Email already registered")
 
-    new_user = User(
-        email=user.email,
-        full_name=user.full_name,
-        hashed_password=get_password_hash(user.password),
-        role=user.role
-    )
-    db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    hashed_password = await get_password_hash_async(user.password)
+
+    def save() -> User:
+        new_user = User(
+            email=user.email,
+            full_name=user.full_name,
+            hashed_password=hashed_password,
+            role=user.role
+        )
+        db.add(new_user)
+        db.commit()
+        db.refresh(new_user)
+        return new_user
+
+    new_user = await run_in_threadpool(save)
 
     access_token = create_access_token(data={"sub": new_user.id, "role": new_user.role.value})
     refresh_token = create_refresh_token(data={"sub": new_user.id})
@@ -45,14 +57,29 @@ def register(user: UserCreate, db: Session = Depends(get_db)):
     }
 
 @router.post("/login", response_model=TokenResponse)
-def login(login_data: LoginRequest, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.email == login_data.email).first()
-    if not user or not verify_password(login_data.password, user.hashed_password):
+async def login(login_data: LoginRequest, db: Session = Depends(get_db)):
+    def load() -> Optional[User]:
+        return db.query(User).filter(User.email == login_data.email).first()
+
+    user = await run_in_threadpool(load)
+    verified, new_hash = await verify_and_update_password_async(
+        login_data.password, user.hashed_password if user else None
+    )
+    if not verified:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
         )
 
+    # Paramètres Argon2 modifiés depuis le hash stocké -> rehash transparent
+    if new_hash:
+        def rehash() -> None:
+            user.hashed_password = new_hash
+            db.commit()
+            db.refresh(user)
+
+        await run_in_threadpool(rehash)
+
     if not user.is_active:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -70,5 +97,5 @@ def login(login_data: LoginRequest, db: Session = Depends(get_db)):
     }
 
 @router.get("/me", response_model=UserResponse)
-def get_me(current_user: User = Depends(get_current_user)):
-    return current_user
\ No newline at end of file
+def get_me(current_user: CurrentUser = Depends(get_current_user), db: Session = Depends(get_db)):
+    return db.query(User).filter(User.id == current_user.id).first()
\ No newline at end of file
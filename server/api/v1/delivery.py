@@ -3,18 +3,24 @@ from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from models.delivery import Delivery, DeliveryStatus
 from schemas.delivery import DeliveryCreate, DeliveryResponse, DeliveryResponseWithProject, DeliveryResponseWithTotal
-from db.session import get_db
+from db.session import AsyncDB, get_async_read_db, get_db, get_read_db
 from models.user import User, UserRole
-from core.dependencies import get_current_user
+from core.dependencies import get_current_user, get_current_user_async
+from core.user_cache import CurrentUser
 from models.project import Project
 from models.notification import Notification
 from datetime import datetime, date
 
 
 from sqlalchemy.orm import Session, aliased
-from sqlalchemy import or_, and_, func
+from sqlalchemy import or_, and_, func, select
 
 from schemas.delivery import DeliveryResponseWithProject
+from core.pagination import paginate, sort_column
+from db.counts import TotalMode, count_key, count_total
+from db.loaders import DELIVERY_DETAIL, DELIVERY_LIST
+from db.search import attachment_search_subquery
+from services.notifications import notify
 
 
 router = APIRouter(prefix="/deliveries", tags=["deliveries"])
@@ -23,7 +29,7 @@ router = APIRouter(prefix="/deliveries", tags=["deliveries"])
 @router.post("/", response_model=DeliveryResponse)
 def create_delivery(
     delivery: DeliveryCreate,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     if current_user.role not in [UserRole.ADMIN, UserRole.QUALITY, UserRole.PRODUCER]:
@@ -43,10 +49,12 @@ def create_delivery(
 
 
 @router.get("/", response_model=DeliveryResponseWithTotal)
-def get_deliveries(
+async def get_deliveries(
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = Query(None, description="Opaque cursor returned as next_cursor by the previous page"),
     search: Optional[str] = None,
+    search_attachments: bool = Query(False, description="Also match text extracted from attached files"),
     status_filter: Optional[str] = None,
     project_name: Optional[str] = None,
     client_email: Optional[str] = None,
@@ -54,67 +62,82 @@ def get_deliveries(
     end_date: Optional[date] = Query(None),
     sort_by: Optional[str] = Query("created_at"),
     sort_order: Optional[str] = Query("desc"),
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    include_total: TotalMode = Query("exact", description="false | exact | estimate"),
+    current_user: CurrentUser = Depends(get_current_user_async),
+    db: AsyncDB = Depends(get_async_read_db)
 ):
-    query = db.query(Delivery)
-
-    # 🔹 Créer un seul alias pour Project et User
-    ProjectAlias = aliased(Project)
-    UserAlias = aliased(User)
-
-    # Filtrage selon le rôle
-    if current_user.role == UserRole.PRODUCER:
-        query = query.filter(Delivery.created_by == current_user.id)
-    elif current_user.role == UserRole.CLIENT:
-        query = query.join(ProjectAlias).filter(ProjectAlias.client_id == current_user.id)
-
-    # Filtre textuel
-    if search:
-        query = query.filter(
-            or_(
+    def load(db: Session) -> DeliveryResponseWithTotal:
+        query = db.query(Delivery)
+
+        # 🔹 Créer un seul alias pour Project et User
+        ProjectAlias = aliased(Project)
+        UserAlias = aliased(User)
+
+        # Filtrage selon le rôle
+        if current_user.role == UserRole.PRODUCER:
+            query = query.filter(Delivery.created_by == current_user.id)
+        elif current_user.role == UserRole.CLIENT:
+            query = query.join(ProjectAlias).filter(ProjectAlias.client_id == current_user.id)
+
+        # Filtre textuel (+ texte indexé des pièces jointes si demandé)
+        if search:
+            conditions = [
                 Delivery.title.ilike(f"%{search}%"),
                 Delivery.description.ilike(f"%{search}%"),
-            )
-        )
-
-    # Status
-    if status_filter:
-        query = query.filter(Delivery.status == status_filter)
-
-    # 🔹 Joindre Project et User UNE seule fois si nécessaire
-    if project_name or client_email:
-        query = query.join(ProjectAlias, Delivery.project_id == ProjectAlias.id)
+            ]
+            if search_attachments:
+                matches = attachment_search_subquery(db, search, "delivery_id")
+                conditions.append(Delivery.id.in_(select(matches.c.owner_id)))
+            query = query.filter(or_(*conditions))
+
+        # Status
+        if status_filter:
+            query = query.filter(Delivery.status == status_filter)
+
+        # 🔹 Joindre Project et User UNE seule fois si nécessaire
+        if project_name or client_email:
+            query = query.join(ProjectAlias, Delivery.project_id == ProjectAlias.id)
+            if client_email:
+                query = query.join(UserAlias, ProjectAlias.client_id == UserAlias.id)
+
+        if project_name:
+            query = query.filter(ProjectAlias.name.ilike(f"%{project_name}%"))
         if client_email:
-            query = query.join(UserAlias, ProjectAlias.client_id == UserAlias.id)
-
-    if project_name:
-        query = query.filter(ProjectAlias.name.ilike(f"%{project_name}%"))
-    if client_email:
-        query = query.filter(UserAlias.email.ilike(f"%{client_email}%"))
+            query = query.filter(UserAlias.email.ilike(f"%{client_email}%"))
+
+        # Filtrage par date
+        if start_date:
+            query = query.filter(func.date(Delivery.created_at) >= start_date)
+        if end_date:
+            query = query.filter(func.date(Delivery.created_at) <= end_date)
+
+        total = count_total(
+            db, query,
+            key=count_key(
+                "deliveries", current_user, search=search, search_attachments=search_attachments, status=status_filter,
+                project_name=project_name, client_email=client_email, start_date=start_date, end_date=end_date,
+            ),
+            tables=["deliveries", "projects", "users"] + (["files", "attachment_texts"] if search_attachments else []),
+            mode=include_total,
+        )
 
-    # Filtrage par date
-    if start_date:
-        query = query.filter(func.date(Delivery.created_at) >= start_date)
-    if end_date:
-        query = query.filter(func.date(Delivery.created_at) <= end_date)
+        query = query.options(*DELIVERY_LIST)
 
-    # Tri
-    sort_attr = getattr(Delivery, sort_by, Delivery.created_at)
-    query = query.order_by(sort_attr.asc() if sort_order == "asc" else sort_attr.desc())
+        # Tri + pagination (offset ou curseur)
+        sort_attr = sort_column(Delivery, sort_by, Delivery.created_at)
+        deliveries, next_cursor = paginate(query, sort_attr, Delivery.id, sort_order, limit, skip=skip, cursor=cursor)
+        return DeliveryResponseWithTotal(total=total, deliveries=deliveries, next_cursor=next_cursor)
 
-    total = query.count()
-    deliveries = query.offset(skip).limit(limit).all()
-    return DeliveryResponseWithTotal(total=total, deliveries=deliveries)
+    return await db.run_sync(load)
 
 
 @router.get("/{delivery_id}", response_model=DeliveryResponseWithProject)
 def get_delivery(
     delivery_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: CurrentUser = Depends(get_current_user),
+    db: Session = Depends(get_read_db)
 ):
-    delivery = db.query(Delivery).filter(Delivery.id == delivery_id).first()
+    delivery = db.query(Delivery).options(*DELIVERY_DETAIL).filter(Delivery.id == delivery_id).first()
     if not delivery:
         raise HTTPException(status_code=404, detail="Delivery not found")
 
@@ -127,7 +150,7 @@ def get_delivery(
 def update_delivery_status(
     delivery_id: int,
     status: DeliveryStatus,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     if current_user.role not in [UserRole.ADMIN, UserRole.QUALITY]:
@@ -143,17 +166,16 @@ def update_delivery_status(
     if status == DeliveryStatus.APPROVED:
         delivery.delivered_at = datetime.utcnow()
 
-    db.commit()
-    db.refresh(delivery)
-
-    notification = Notification(
+    # Notification mise en file dans la même transaction (écrite par un worker)
+    notify(
+        db,
         user_id=delivery.created_by,
         title="Delivery Status Updated",
         message=f"Delivery '{delivery.title}' status changed from {old_status.value} to {status.value}",
         type="delivery_status",
         link=f"/deliveries/{delivery.id}"
     )
-    db.add(notification)
     db.commit()
+    db.refresh(delivery)
 
     return delivery
\ No newline at end of file
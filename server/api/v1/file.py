@@ -1,29 +1,32 @@
 # routers/file.py
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, Request, UploadFile, File
 from sqlalchemy.orm import Session
 from typing import List
 import os
 
-from db.session import get_db
+from db.session import get_db, get_read_db
 from core.dependencies import get_current_user
+from core.user_cache import CurrentUser
 from models.delivery import Delivery
 from models.file import File as FileModel
 from fastapi.responses import FileResponse as FastAPIFileResponse
 from schemas.file import FileResponse
 from models.user import User, UserRole
+from services.uploads import discard, stage_uploads
+from services import blobs
+from services.downloads import file_download_response
+from services.archives import archive_entries, zip_response
+from services.previews import preview_response, schedule_previews
+from starlette.concurrency import run_in_threadpool
 
 router = APIRouter(prefix="/deliveries", tags=["Files"])
 
-UPLOAD_DIR = "uploads/deliveries"
-
-os.makedirs(UPLOAD_DIR, exist_ok=True)
-
 @router.post("/{delivery_id}/files/", response_model=List[FileResponse])
 async def upload_files_to_delivery(
     delivery_id: int,
     files: List[UploadFile] = File(...),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     # 1️⃣ Vérifier la livraison
     delivery = db.query(Delivery).filter(Delivery.id == delivery_id).first()
@@ -34,55 +37,95 @@ async def upload_files_to_delivery(
     if current_user.role not in [UserRole.ADMIN, UserRole.QUALITY, UserRole.PRODUCER]:
         raise HTTPException(status_code=403, detail="Not authorized")
 
-    saved_files = []
-
-    # 3️⃣ Sauvegarde physique des fichiers
-    for uploaded_file in files:
-        delivery_folder = os.path.join(UPLOAD_DIR, str(delivery_id))
-        os.makedirs(delivery_folder, exist_ok=True)
-
-        file_path = os.path.join(delivery_folder, uploaded_file.filename)
-
-        with open(file_path, "wb") as f:
-            f.write(await uploaded_file.read())
-
-        # 4️⃣ Enregistrement en base
-        file_record = FileModel(
-            filename=uploaded_file.filename,
-            storage_key=file_path.replace("\\", "/"),
-            delivery_id=delivery_id
-        )
-        db.add(file_record)
-        saved_files.append(file_record)
-
-    db.commit()
+    # 3️⃣ Copie des fichiers en streaming, hors de la boucle d'événements
+    staged = await stage_uploads(files)
+
+    def save() -> List[FileModel]:
+        # 4️⃣ Enregistrement en base : une transaction courte, hors de la boucle d'événements
+        saved_files = []
+        for item in staged:
+            file_record = FileModel(
+                filename=item.filename,
+                storage_key=blobs.register(db, item),
+                delivery_id=delivery_id
+            )
+            db.add(file_record)
+            saved_files.append(file_record)
+
+        # Blob adressé par contenu : référence prise au flush, un contenu déjà connu n'est pas réécrit
+        db.flush()
+        for item in staged:
+            blobs.put(item)
+
+        db.commit()
+        for file_record in saved_files:
+            db.refresh(file_record)
+        return saved_files
+
+    try:
+        saved_files = await run_in_threadpool(save)
+    except BaseException:
+        discard(staged)
+        raise
+
+    # Miniatures / aperçus PDF générés en arrière-plan, sans retarder la réponse
+    schedule_previews((f.storage_key, f.filename) for f in saved_files)
 
     # 5️⃣ Retourner la liste des fichiers uploadés
     return saved_files
 
 
 @router.get("/{delivery_id}/files/{file_id}/download")
-def download_file(delivery_id: int, file_id: int, db: Session = Depends(get_db)):
+def download_file(request: Request, delivery_id: int, file_id: int, db: Session = Depends(get_db)):
     file = db.query(FileModel).filter(FileModel.id == file_id, FileModel.delivery_id == delivery_id).first()
     if not file:
         raise HTTPException(status_code=404, detail="File not found")
-    
-    # Construire le chemin complet
-    file_path = os.path.join(UPLOAD_DIR, str(delivery_id), file.filename)
-    if not os.path.exists(file_path):
+
+    # Range / ETag / If-None-Match / If-Modified-Since
+    try:
+        return file_download_response(request, file.storage_key, file.filename)
+    except FileNotFoundError:
         raise HTTPException(status_code=404, detail="File not found on disk")
-    
-    return FastAPIFileResponse(
-        path=file_path,
-        filename=file.filename,
-        media_type="application/octet-stream"  # force le download
-    )
+
+
+@router.get("/{delivery_id}/files/{file_id}/preview")
+def preview_file(
+    request: Request,
+    delivery_id: int,
+    file_id: int,
+    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user)
+):
+    file = db.query(FileModel).filter(FileModel.id == file_id, FileModel.delivery_id == delivery_id).first()
+    if not file:
+        raise HTTPException(status_code=404, detail="File not found")
+
+    return preview_response(request, file.storage_key, file.filename)
+
+
+@router.get("/{delivery_id}/files/archive")
+def download_delivery_archive(
+    delivery_id: int,
+    db: Session = Depends(get_read_db),
+    current_user: CurrentUser = Depends(get_current_user)
+):
+    # ZIP de toutes les pièces jointes, construit et envoyé à la volée
+    delivery = db.query(Delivery).filter(Delivery.id == delivery_id).first()
+    if not delivery:
+        raise HTTPException(status_code=404, detail="Delivery not found")
+
+    # Même règle que get_delivery : un producteur ne voit que ses livraisons
+    if current_user.role == UserRole.PRODUCER and delivery.created_by != current_user.id:
+        raise HTTPException(status_code=403, detail="Not authorized")
+
+    files = db.query(FileModel).filter(FileModel.delivery_id == delivery_id).all()
+    return zip_response(archive_entries(db, files), f"delivery-{delivery_id}-files.zip")
 
 @router.get("/{delivery_id}/files/", response_model=List[FileResponse])
 def list_files_for_delivery(
     delivery_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: Session = Depends(get_read_db),
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     delivery = db.query(Delivery).filter(Delivery.id == delivery_id).first()
     if not delivery:
@@ -97,7 +140,7 @@ def delete_file(
     delivery_id: int,
     file_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     file_record = db.query(FileModel).filter(
         FileModel.id == file_id,
@@ -107,8 +150,8 @@ def delete_file(
     if not file_record:
         raise HTTPException(status_code=404, detail="File not found")
 
-    # Supprimer du disque si existe
-    if os.path.exists(file_record.storage_key):
+    # Blob : ramassé après le commit s'il n'est plus référencé ; ancien chemin : supprimé du disque
+    if not blobs.blob_hash(file_record.storage_key) and os.path.exists(file_record.storage_key):
         os.remove(file_record.storage_key)
 
     db.delete(file_record)
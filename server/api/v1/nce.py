@@ -1,14 +1,15 @@
 from typing import List, Optional
 from models.file import File as FileModel
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form,Query
+from fastapi import APIRouter, Depends, HTTPException, Request, UploadFile, File, Form,Query
 from models.nce import NCE, NCEStatus, NCESeverity
 from schemas.nce import NCECreate, NCEResponse, NCEUpdate, NCEResponseWithTotal
-from db.session import get_db
+from db.session import AsyncDB, get_async_read_db, get_db, get_read_db
 from models.user import User, UserRole
 from models.delivery import Delivery
 from models.project import Project
 
-from core.dependencies import get_current_user
+from core.dependencies import get_current_user, get_current_user_async
+from core.user_cache import CurrentUser
 from models.delivery import Delivery
 from models.notification import Notification
 from datetime import datetime
@@ -18,14 +19,23 @@ import os
 from datetime import date
 from sqlalchemy.orm import Session, aliased
 from sqlalchemy import or_, func
+from db.search import nce_search_subquery
+from core.pagination import paginate, sort_column
+from db.counts import TotalMode, count_key, count_total
+from db.loaders import NCE_DETAIL, NCE_LIST
+from services.uploads import discard, stage_uploads
+from services import blobs
+from services.downloads import file_download_response
+from services.archives import archive_entries, zip_response
+from services.previews import preview_response, schedule_previews
+from services.notifications import notify
+from starlette.concurrency import run_in_threadpool
 
 
 
 
 router = APIRouter(prefix="/nces", tags=["nces"])
 
-UPLOAD_DIR = "uploads/nces"
-
 
 @router.post("/", response_model=NCECreate)
 async def create_nce(
@@ -34,40 +44,50 @@ async def create_nce(
     description: str = Form(...),
     files: List[UploadFile] = File([]),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
 ):
     if current_user.role not in [UserRole.ADMIN, UserRole.QUALITY, UserRole.PRODUCER, UserRole.CLIENT]:
         raise HTTPException(status_code=403, detail="Not authorized")
 
-    # 1️⃣ Créer le NCE
-    new_nce = NCE(
-        delivery_id=delivery_id,
-        title=title,
-        description=description,
-        created_by=current_user.id
-    )
-    db.add(new_nce)
-    db.commit()
-    db.refresh(new_nce)
-
-    # 2️⃣ Sauvegarder les fichiers uploadés et lier au NCE
-    upload_folder = f"uploads/nces/{new_nce.id}"
-    os.makedirs(upload_folder, exist_ok=True)
-
-    for uploaded_file in files:
-        file_path = os.path.join(upload_folder, uploaded_file.filename)
-        with open(file_path, "wb") as f:
-            f.write(await uploaded_file.read())
-
-        file_record = FileModel(
-            filename=uploaded_file.filename,
-            storage_key=file_path.replace("\\", "/"),
-            nce_id=new_nce.id,
-            delivery_id=None 
-        )
-        db.add(file_record)
+    # 1️⃣ Copier les fichiers uploadés en streaming (limites de taille vérifiées ici)
+    staged = await stage_uploads(files)
 
-    db.commit()
+    def save() -> NCE:
+        # 2️⃣ Créer le NCE et lier les fichiers : une transaction courte, hors de la boucle d'événements
+        new_nce = NCE(
+            delivery_id=delivery_id,
+            title=title,
+            description=description,
+            created_by=current_user.id
+        )
+        db.add(new_nce)
+        db.flush()
+
+        for item in staged:
+            db.add(FileModel(
+                filename=item.filename,
+                storage_key=blobs.register(db, item),
+                nce_id=new_nce.id,
+                delivery_id=None
+            ))
+
+        # 3️⃣ Références aux blobs prises au flush, puis seuls les contenus manquants sont écrits
+        db.flush()
+        for item in staged:
+            blobs.put(item)
+
+        db.commit()
+        db.refresh(new_nce)
+        return new_nce
+
+    try:
+        new_nce = await run_in_threadpool(save)
+    except BaseException:
+        discard(staged)
+        raise
+
+    # 4️⃣ Miniatures / aperçus PDF générés en arrière-plan
+    schedule_previews((blobs.blob_key(item.sha256), item.filename) for item in staged)
 
     return new_nce
 
@@ -79,10 +99,12 @@ async def create_nce(
 
 
 @router.get("/", response_model=NCEResponseWithTotal)
-def get_nces(
+async def get_nces(
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = Query(None, description="Opaque cursor returned as next_cursor by the previous page"),
     search: Optional[str] = None,
+    search_attachments: bool = Query(False, description="Also match text extracted from attached files"),
     status_filter: Optional[NCEStatus] = None,
     severity_filter: Optional[NCESeverity] = None,
     category: Optional[str] = None,
@@ -91,93 +113,105 @@ def get_nces(
     client_email: Optional[str] = None,
     start_date: Optional[date] = Query(None),
     end_date: Optional[date] = Query(None),
-    sort_by: Optional[str] = Query("created_at"),
+    sort_by: Optional[str] = Query(None, description="NCE column or 'relevance' (default when searching)"),
     sort_order: Optional[str] = Query("desc"),
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    include_total: TotalMode = Query("exact", description="false | exact | estimate"),
+    current_user: CurrentUser = Depends(get_current_user_async),
+    db: AsyncDB = Depends(get_async_read_db)
 ):
-    query = db.query(NCE)
-
-    # 🔹 Aliases
-    DeliveryAlias = aliased(Delivery)
-    ProjectAlias = aliased(Project)
-    UserAlias = aliased(User)
-
-    # 🔹 Filtrage par rôle
-    if current_user.role == UserRole.PRODUCER:
-        query = query.filter(NCE.created_by == current_user.id)
-    elif current_user.role == UserRole.CLIENT:
-        query = (
-            query.join(DeliveryAlias)
-            .join(ProjectAlias)
-            .filter(ProjectAlias.client_id == current_user.id)
-        )
-
-    # 🔹 Recherche textuelle
-    if search:
-        query = query.filter(
-            or_(
-                NCE.title.ilike(f"%{search}%"),
-                NCE.description.ilike(f"%{search}%")
+    def load(db: Session) -> NCEResponseWithTotal:
+        query = db.query(NCE)
+
+        # 🔹 Aliases
+        DeliveryAlias = aliased(Delivery)
+        ProjectAlias = aliased(Project)
+        UserAlias = aliased(User)
+
+        # 🔹 Filtrage par rôle
+        if current_user.role == UserRole.PRODUCER:
+            query = query.filter(NCE.created_by == current_user.id)
+        elif current_user.role == UserRole.CLIENT:
+            query = (
+                query.join(DeliveryAlias)
+                .join(ProjectAlias)
+                .filter(ProjectAlias.client_id == current_user.id)
             )
-        )
 
-    # 🔹 Filtres de statut, sévérité, catégorie
-    if status_filter:
-        query = query.filter(NCE.status == status_filter)
-    if severity_filter:
-        query = query.filter(NCE.severity == severity_filter)
-    if category:
-        query = query.filter(NCE.category.ilike(f"%{category}%"))
-
-    # 🔹 Joindre pour filtrer par titre de livraison ou projet
-    if delivery_title or project_name:
-        query = query.join(DeliveryAlias, NCE.delivery_id == DeliveryAlias.id)
+        # 🔹 Recherche plein texte (FTS5 / tsvector), pièces jointes comprises si demandé
+        search_rank = None
+        if search:
+            matches = nce_search_subquery(db, search, include_attachments=search_attachments)
+            query = query.join(matches, matches.c.nce_id == NCE.id)
+            search_rank = matches.c.rank
+
+        # 🔹 Filtres de statut, sévérité, catégorie
+        if status_filter:
+            query = query.filter(NCE.status == status_filter)
+        if severity_filter:
+            query = query.filter(NCE.severity == severity_filter)
+        if category:
+            query = query.filter(NCE.category.ilike(f"%{category}%"))
+
+        # 🔹 Joindre pour filtrer par titre de livraison ou projet
+        if delivery_title or project_name:
+            query = query.join(DeliveryAlias, NCE.delivery_id == DeliveryAlias.id)
+            if project_name:
+                query = query.join(ProjectAlias, DeliveryAlias.project_id == ProjectAlias.id)
+
+        if delivery_title:
+            query = query.filter(DeliveryAlias.title.ilike(f"%{delivery_title}%"))
         if project_name:
-            query = query.join(ProjectAlias, DeliveryAlias.project_id == ProjectAlias.id)
-
-    if delivery_title:
-        query = query.filter(DeliveryAlias.title.ilike(f"%{delivery_title}%"))
-    if project_name:
-        query = query.filter(ProjectAlias.name.ilike(f"%{project_name}%"))
-    if client_email:
-        query = query.filter(UserAlias.email.ilike(f"%{client_email}%"))  # 👈 Filtre ajouté ici
-
+            query = query.filter(ProjectAlias.name.ilike(f"%{project_name}%"))
+        if client_email:
+            query = query.filter(UserAlias.email.ilike(f"%{client_email}%"))  # 👈 Filtre ajouté ici
+
+
+        # 🔹 Filtrage par date
+        if start_date:
+            query = query.filter(func.date(NCE.created_at) >= start_date)
+        if end_date:
+            query = query.filter(func.date(NCE.created_at) <= end_date)
+
+        total = count_total(
+            db, query,
+            key=count_key(
+                "nces", current_user, search=search, search_attachments=search_attachments, status=status_filter,
+                severity=severity_filter, category=category, delivery_title=delivery_title, project_name=project_name,
+                client_email=client_email, start_date=start_date, end_date=end_date,
+            ),
+            tables=["nces", "deliveries", "projects", "users"] + (["files", "attachment_texts"] if search_attachments else []),
+            mode=include_total,
+        )
 
-    # 🔹 Filtrage par date
-    if start_date:
-        query = query.filter(func.date(NCE.created_at) >= start_date)
-    if end_date:
-        query = query.filter(func.date(NCE.created_at) <= end_date)
+        query = query.options(*NCE_LIST)
 
-    # 🔹 Tri dynamique
-    sort_attr = getattr(NCE, sort_by, NCE.created_at)
-    query = query.order_by(sort_attr.asc() if sort_order == "asc" else sort_attr.desc())
+        # 🔹 Tri dynamique + pagination (par pertinence par défaut lors d'une recherche)
+        if search_rank is not None and sort_by in (None, "relevance") and not cursor:
+            nces = query.order_by(search_rank.asc(), NCE.id.desc()).offset(skip).limit(limit).all()
+            next_cursor = None
+        else:
+            sort_attr = sort_column(NCE, sort_by, NCE.created_at)
+            nces, next_cursor = paginate(query, sort_attr, NCE.id, sort_order, limit, skip=skip, cursor=cursor)
 
-    total = query.count()
-    # 🔹 Pagination
-    nces = query.offset(skip).limit(limit).all()
+        return NCEResponseWithTotal(total=total, nces=nces, next_cursor=next_cursor)
 
-    return NCEResponseWithTotal(total=total, nces=nces)
+    return await db.run_sync(load)
 
 
 
 @router.get("/{nce_id}", response_model=NCEResponse)
 def get_nce(
     nce_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: CurrentUser = Depends(get_current_user),
+    db: Session = Depends(get_read_db)
 ):
-    nce = db.query(NCE).filter(NCE.id == nce_id).first()
+    nce = db.query(NCE).options(*NCE_DETAIL).filter(NCE.id == nce_id).first()
     if not nce:
         raise HTTPException(status_code=404, detail="NCE not found")
 
     if current_user.role == UserRole.PRODUCER and nce.created_by != current_user.id:
         raise HTTPException(status_code=403, detail="Not authorized")
 
-
-    nce.files
-
     return nce
 
 
@@ -187,7 +221,7 @@ def get_nce(
 def update_nce(
     nce_id: int,
     nce_update: NCEUpdate,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     if current_user.role not in [UserRole.ADMIN, UserRole.QUALITY]:
@@ -215,19 +249,18 @@ def update_nce(
     if nce_update.category is not None:
         nce.category = nce_update.category
 
-    db.commit()
-    db.refresh(nce)
-
-    notification = Notification(
+    # Notification mise en file dans la même transaction (écrite par un worker)
+    notify(
+        db,
         user_id=nce.created_by,
         title="NCE Updated",
         message=f"NCE '{nce.title}' updated",
         type="nce_status",
         link=f"/nce/{nce.id}"
     )
-    db.add(notification)
     db.commit()
-    
+    db.refresh(nce)
+
     return nce
 
 
@@ -240,10 +273,11 @@ def update_nce(
 
 @router.get("/{nce_id}/files/{file_id}/download")
 def download_nce_file(
+    request: Request,
     nce_id: int,
     file_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
 ):
     # 1️⃣ Récupérer le fichier
     file = db.query(FileModel).filter(
@@ -254,15 +288,47 @@ def download_nce_file(
     if not file:
         raise HTTPException(status_code=404, detail="File not found")
     
-    # 2️⃣ Vérifier que le fichier existe physiquement
-    file_path = file.storage_key
-    if not os.path.exists(file_path):
+    # 2️⃣ Retourner le fichier (Range / ETag / requêtes conditionnelles)
+    try:
+        return file_download_response(request, file.storage_key, file.filename)
+    except FileNotFoundError:
         raise HTTPException(status_code=404, detail="File not found on disk")
-    
-    # 3️⃣ Retourner le fichier avec FileResponse de FastAPI
-    
-    return FastAPIFileResponse(
-        path=file_path,
-        filename=file.filename,
-        media_type="application/octet-stream"  # force download
-    )
+
+
+@router.get("/{nce_id}/files/{file_id}/preview")
+def preview_nce_file(
+    request: Request,
+    nce_id: int,
+    file_id: int,
+    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user),
+):
+    file = db.query(FileModel).filter(
+        FileModel.id == file_id,
+        FileModel.nce_id == nce_id
+    ).first()
+
+    if not file:
+        raise HTTPException(status_code=404, detail="File not found")
+
+    return preview_response(request, file.storage_key, file.filename)
+
+
+@router.get("/{nce_id}/files/archive")
+def download_nce_archive(
+    nce_id: int,
+    db: Session = Depends(get_read_db),
+    current_user: CurrentUser = Depends(get_current_user),
+):
+    # 1️⃣ Vérifier que la NCE existe
+    nce = db.query(NCE).filter(NCE.id == nce_id).first()
+    if not nce:
+        raise HTTPException(status_code=404, detail="NCE not found")
+
+    # 2️⃣ Même règle que get_nce : un producteur ne voit que ses NCE
+    if current_user.role == UserRole.PRODUCER and nce.created_by != current_user.id:
+        raise HTTPException(status_code=403, detail="Not authorized")
+
+    # 3️⃣ ZIP de toutes les pièces jointes, construit et envoyé à la volée
+    files = db.query(FileModel).filter(FileModel.nce_id == nce_id).all()
+    return zip_response(archive_entries(db, files), f"nce-{nce_id}-files.zip")
@@ -1,34 +1,102 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from sqlalchemy import or_
-from db.session import get_db
+from db.session import AsyncDB, get_async_read_db, get_db
 from models.user import User, UserRole
-from core.dependencies import get_current_user
+from core.dependencies import get_current_user, get_current_user_async, get_stream_user
+from core.user_cache import CurrentUser
 from models.notification import Notification
-from schemas.notification import  NotificationResponse
+from schemas.notification import  NotificationResponse, EmailPreferenceResponse, EmailPreferenceUpdate, UnreadCountResponse, MarkReadRequest
+from core.pagination import paginate
+from services.notification_stream import notification_events
+from services.notification_counts import get_unread_count, mark_read
+from services.send_email import get_email_preference, set_digest_minutes
 
 router = APIRouter(prefix="/notifications", tags=["notifications"])
 @router.get("/", response_model=List[NotificationResponse])
-def get_notifications(
+async def get_notifications(
+    response: Response,
     skip: int = 0,
     limit: int = 20,
+    cursor: Optional[str] = Query(None, description="Opaque cursor returned in the X-Next-Cursor header"),
     unread_only: bool = False,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user_async),
+    db: AsyncDB = Depends(get_async_read_db)
+):
+    def load(db: Session) -> List[NotificationResponse]:
+        query = db.query(Notification).filter(Notification.user_id == current_user.id)
+
+        if unread_only:
+            query = query.filter(Notification.is_read == False)
+
+        notifications, next_cursor = paginate(
+            query, Notification.created_at, Notification.id, "desc", limit, skip=skip, cursor=cursor
+        )
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
+        # Sérialisées ici : hors de run_sync, la session async ne charge plus rien
+        return [NotificationResponse.model_validate(n) for n in notifications]
+
+    return await db.run_sync(load)
+
+@router.get("/unread-count", response_model=UnreadCountResponse)
+def get_unread_notifications_count(
+    current_user: CurrentUser = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    # Compteur dénormalisé (notification_counters) : une lecture par clé primaire
+    return UnreadCountResponse(count=get_unread_count(db, current_user.id))
+
+@router.post("/read")
+def mark_notifications_read(
+    payload: MarkReadRequest,
+    current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    query = db.query(Notification).filter(Notification.user_id == current_user.id)
+    if payload.ids is None and payload.before is None:
+        raise HTTPException(status_code=400, detail="Provide ids or before")
 
-    if unread_only:
-        query = query.filter(Notification.is_read == False)
+    updated = mark_read(db, current_user.id, ids=payload.ids, before=payload.before)
+    return {"updated": updated, "unread_count": get_unread_count(db, current_user.id)}
 
-    notifications = query.order_by(Notification.created_at.desc()).offset(skip).limit(limit).all()
-    return notifications
+@router.get("/email-preferences", response_model=EmailPreferenceResponse)
+def get_email_preferences(
+    current_user: CurrentUser = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    return get_email_preference(db, current_user.id)
+
+@router.put("/email-preferences", response_model=EmailPreferenceResponse)
+def update_email_preferences(
+    preferences: EmailPreferenceUpdate,
+    current_user: CurrentUser = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    return set_digest_minutes(db, current_user.id, preferences.digest_minutes)
+
+@router.get("/stream")
+def stream_notifications(
+    request: Request,
+    current_user: CurrentUser = Depends(get_stream_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Server-Sent Events : nouvelles notifications (event "notification") et
+    compteur de non-lues (event "unread_count"), sans polling.
+    """
+    unread = get_unread_count(db, current_user.id)
+    return StreamingResponse(
+        notification_events(request, current_user.id, unread),
+        media_type="text/event-stream",
+        headers={"cache-control": "no-cache", "x-accel-buffering": "no"},
+    )
 
 @router.patch("/{notification_id}/read")
 def mark_notification_read(
     notification_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     notification = db.query(Notification).filter(
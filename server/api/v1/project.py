@@ -3,13 +3,16 @@ from sqlalchemy.orm import Session
 from typing import List
 from models.project import Project
 from schemas.project import ProjectCreate, ProjectResponse, ProjectsResponseWithTotal
-from db.session import get_db
-from core.dependencies import get_current_user
+from db.session import AsyncDB, get_async_read_db, get_db, get_read_db
+from core.dependencies import get_current_user, get_current_user_async
+from core.user_cache import CurrentUser
 from models.user import User, UserRole
 from lib.email import send_magic_link_email
 from datetime import datetime, date
 from sqlalchemy import or_, desc, asc
 from typing import List, Optional
+from db.counts import TotalMode, count_key, count_total
+from db.loaders import PROJECT_DETAIL, PROJECT_LIST
 
 
 
@@ -20,7 +23,7 @@ router = APIRouter(prefix="/projects", tags=["projects"])
 @router.post("/", response_model=ProjectResponse)
 def create_project(
     project_in: ProjectCreate,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     # Seuls les admins et quality peuvent créer un projet
@@ -69,7 +72,7 @@ def create_project(
 
 
 @router.get("/", response_model=ProjectsResponseWithTotal)
-def get_projects(
+async def get_projects(
     skip: int = Query(0, ge=0),
     limit: int = Query(10, le=100),
     search: Optional[str] = Query(None, description="Search by name, description, or client info"),
@@ -77,45 +80,56 @@ def get_projects(
     start_date: Optional[date] = Query(None, description="Filter start date"),
     end_date: Optional[date] = Query(None, description="Filter end date"),
     sort_order: Optional[str] = Query("desc", description="Sort by creation date: asc or desc"),
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    include_total: TotalMode = Query("exact", description="false | exact | estimate"),
+    current_user: CurrentUser = Depends(get_current_user_async),
+    db: AsyncDB = Depends(get_async_read_db)
 ):
-    query = db.query(Project)
-
-    # 🔹 Joindre la table User si on veut filtrer ou rechercher par client
-    query = query.join(User, Project.client_id == User.id, isouter=True)
-
-    # 🔍 Recherche texte (nom, description, client email / full_name)
-    if search:
-        query = query.filter(
-            or_(
-                Project.name.ilike(f"%{search}%"),
-                Project.description.ilike(f"%{search}%"),
-                User.email.ilike(f"%{search}%"),
-                User.full_name.ilike(f"%{search}%")
+    def load(db: Session) -> ProjectsResponseWithTotal:
+        query = db.query(Project)
+
+        # 🔹 Joindre la table User si on veut filtrer ou rechercher par client
+        query = query.join(User, Project.client_id == User.id, isouter=True)
+
+        # 🔍 Recherche texte (nom, description, client email / full_name)
+        if search:
+            query = query.filter(
+                or_(
+                    Project.name.ilike(f"%{search}%"),
+                    Project.description.ilike(f"%{search}%"),
+                    User.email.ilike(f"%{search}%"),
+                    User.full_name.ilike(f"%{search}%")
+                )
             )
-        )
-
-    # 📧 Filtrer par email du client
-    if client_email:
-        query = query.filter(User.email.ilike(f"%{client_email}%"))
 
-    if start_date:
-        query = query.filter(Project.created_at >= datetime.combine(start_date, datetime.min.time()))
-    if end_date:
-        query = query.filter(Project.created_at <= datetime.combine(end_date, datetime.max.time()))
-
-    # ↕️ Tri par date
-    if sort_order.lower() == "asc":
-        query = query.order_by(asc(Project.created_at))
-    else:
-        query = query.order_by(desc(Project.created_at))
+        # 📧 Filtrer par email du client
+        if client_email:
+            query = query.filter(User.email.ilike(f"%{client_email}%"))
+
+        if start_date:
+            query = query.filter(Project.created_at >= datetime.combine(start_date, datetime.min.time()))
+        if end_date:
+            query = query.filter(Project.created_at <= datetime.combine(end_date, datetime.max.time()))
+
+        # ↕️ Tri par date
+        if sort_order.lower() == "asc":
+            query = query.order_by(asc(Project.created_at))
+        else:
+            query = query.order_by(desc(Project.created_at))
+
+        # 🔹 Nombre total de projets filtrés (mémoïsé)
+        total = count_total(
+            db, query,
+            key=count_key("projects", None, search=search, client_email=client_email,
+                          start_date=start_date, end_date=end_date),
+            tables=["projects", "users"],
+            mode=include_total,
+        )
 
-    total = query.count()  # 🔹 Nombre total de projets filtrés
+        projects = query.options(*PROJECT_LIST).offset(skip).limit(limit).all()
 
-    projects = query.offset(skip).limit(limit).all()
+        return ProjectsResponseWithTotal(total=total, projects=projects)
 
-    return ProjectsResponseWithTotal(total=total, projects=projects)
+    return await db.run_sync(load)
 
 
 
@@ -123,10 +137,10 @@ def get_projects(
 @router.get("/{project_id}", response_model=ProjectResponse)
 def get_project(
     project_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: CurrentUser = Depends(get_current_user),
+    db: Session = Depends(get_read_db)
 ):
-    project = db.query(Project).filter(Project.id == project_id).first()
+    project = db.query(Project).options(*PROJECT_DETAIL).filter(Project.id == project_id).first()
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     return project
\ No newline at end of file
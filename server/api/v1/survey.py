@@ -6,15 +6,17 @@ from schemas.survey import SurveyCreate, SurveyResponse
 from db.session import get_db
 from models.user import User, UserRole
 from core.dependencies import get_current_user
+from core.user_cache import CurrentUser
 from datetime import datetime
 from sqlalchemy import or_
+from db.loaders import SURVEY_LIST
 
 router = APIRouter(prefix="/surveys", tags=["surveys"])
 
 @router.post("/", response_model=SurveyResponse)
 def create_survey(
     survey: SurveyCreate,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     new_survey = Survey(**survey.dict(), user_id=current_user.id, completed_at=datetime.utcnow())
@@ -27,8 +29,8 @@ def create_survey(
 def get_surveys(
     skip: int = 0,
     limit: int = 100,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    surveys = db.query(Survey).offset(skip).limit(limit).all()
+    surveys = db.query(Survey).options(*SURVEY_LIST).offset(skip).limit(limit).all()
     return surveys
\ No newline at end of file
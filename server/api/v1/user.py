@@ -8,10 +8,12 @@ from db.session import get_db
 from models.user import User, UserRole
 from schemas.user import UserCreate, UserResponse, ClientResponse
 from core.dependencies import get_current_user
+from core.user_cache import CurrentUser
 from typing import List
 
 
 from core.security import get_password_hash
+from db.counts import TotalMode, count_key, count_total
 from db.session import get_db
 
 
@@ -22,7 +24,7 @@ router = APIRouter(tags=["users"])
 @router.post("/users", response_model=UserResponse)
 def create_user(
     user_in: UserCreate,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     # Seuls les admins peuvent créer un utilisateur
@@ -52,7 +54,7 @@ def create_user(
 def get_users(
     skip: int = 0,
     limit: int = 100,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     if current_user.role not in [UserRole.ADMIN, UserRole.QUALITY]:
@@ -66,7 +68,8 @@ def get_users(
 def get_clients(
     skip: int = Query(0, ge=0, description="Number of records to skip"),
     limit: int = Query(20, ge=1, le=100, description="Number of records to return"),
-    current_user: User = Depends(get_current_user),
+    include_total: TotalMode = Query("exact", description="false | exact | estimate"),
+    current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     # Vérification des rôles autorisés
@@ -74,7 +77,8 @@ def get_clients(
         raise HTTPException(status_code=403, detail="Not authorized")
 
     query = db.query(User).filter(User.role == UserRole.CLIENT)
-    total = query.count()  # Total clients pour la pagination si besoin
+    # Total clients pour la pagination si besoin
+    total = count_total(db, query, key=count_key("clients", None), tables=["users"], mode=include_total)
 
     clients = query.offset(skip).limit(limit).all()
     return ClientResponse(total=total, clients=clients)
@@ -0,0 +1,70 @@
+import threading
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Optional
+
+from core.config import settings
+
+Callback = Callable[[Any], None]
+
+
+class Broker:
+    """
+    Pub/sub entre workers : chaque message publié sur un canal est remis à tous
+    les abonnés de ce canal, dans tous les processus qui partagent le broker.
+    """
+
+    def publish(self, channel: str, message: Any) -> None:
+        raise NotImplementedError
+
+    def subscribe(self, channel: str, callback: Callback) -> Callable[[], None]:
+        """Abonne `callback` au canal ; retourne la fonction de désabonnement."""
+        raise NotImplementedError
+
+
+class InMemoryBroker(Broker):
+    """
+    Broker local au processus (un seul worker, ou tests).
+    """
+
+    def __init__(self):
+        self._subscribers: Dict[str, List[Callback]] = defaultdict(list)
+        self._lock = threading.Lock()
+
+    def publish(self, channel: str, message: Any) -> None:
+        with self._lock:
+            callbacks = list(self._subscribers.get(channel, ()))
+        for callback in callbacks:
+            callback(message)
+
+    def subscribe(self, channel: str, callback: Callback) -> Callable[[], None]:
+        with self._lock:
+            self._subscribers[channel].append(callback)
+
+        def unsubscribe():
+            with self._lock:
+                if callback in self._subscribers.get(channel, ()):
+                    self._subscribers[channel].remove(callback)
+
+        return unsubscribe
+
+
+_broker: Optional[Broker] = None
+
+
+def create_broker(url: str) -> Broker:
+    if url.startswith("memory://"):
+        return InMemoryBroker()
+    raise ValueError(f"Unsupported BROKER_URL: {url}")
+
+
+def get_broker() -> Broker:
+    global _broker
+    if _broker is None:
+        _broker = create_broker(settings.BROKER_URL)
+    return _broker
+
+
+def set_broker(broker: Broker) -> None:
+    """Remplace le broker (autre backend partagé entre workers, ou tests)."""
+    global _broker
+    _broker = broker
@@ -1,5 +1,5 @@
 import os
-from typing import Optional
+from typing import List, Optional
 
 class Settings:
     PROJECT_NAME: str = "QualityTracker"
@@ -13,17 +13,82 @@ class Settings:
 
     BASE_DIR: str = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
     DATABASE_URL: str = os.getenv("DATABASE_URL", f"sqlite:///{os.path.join(BASE_DIR, 'database.db')}")
+    # Moteur async (aiosqlite / asyncpg) pour les listes et le dashboard ; URL déduite de DATABASE_URL si vide
+    ASYNC_DATABASE: bool = os.getenv("ASYNC_DATABASE", "false").lower() == "true"
+    ASYNC_DATABASE_URL: str = os.getenv("ASYNC_DATABASE_URL", "")
+    # Réplicas de lecture (séparés par des virgules) pour les endpoints en lecture seule ;
+    # un utilisateur qui vient d'écrire lit sur le primaire pendant REPLICA_STICKY_SECONDS
+    DATABASE_REPLICA_URLS: List[str] = [url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+    REPLICA_STICKY_SECONDS: float = float(os.getenv("REPLICA_STICKY_SECONDS", "5"))
+
+    # Profil SQLite appliqué à chaque connexion (ignoré pour Postgres)
+    SQLITE_JOURNAL_MODE: str = os.getenv("SQLITE_JOURNAL_MODE", "wal")
+    SQLITE_SYNCHRONOUS: str = os.getenv("SQLITE_SYNCHRONOUS", "normal")
+    SQLITE_BUSY_TIMEOUT: int = int(os.getenv("SQLITE_BUSY_TIMEOUT", "5000"))  # ms
+    SQLITE_CACHE_SIZE: int = int(os.getenv("SQLITE_CACHE_SIZE", "-16000"))  # négatif : en Kio, par connexion
+    SQLITE_MMAP_SIZE: int = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+    # Transactions d'écriture sérialisées dans le processus (pas de "database is locked" en rafale)
+    SQLITE_SERIALIZE_WRITES: bool = os.getenv("SQLITE_SERIALIZE_WRITES", "true").lower() == "true"
 
     MINIO_ENDPOINT: str = os.getenv("MINIO_ENDPOINT", "minio:9000")
     MINIO_ACCESS_KEY: str = os.getenv("MINIO_ACCESS_KEY", "minioadmin")
     MINIO_SECRET_KEY: str = os.getenv("MINIO_SECRET_KEY", "minioadmin")
     MINIO_SECURE: bool = os.getenv("MINIO_SECURE", "false").lower() == "true"
     MINIO_BUCKET: str = os.getenv("MINIO_BUCKET", "quality-tracker")
+    # Adresse vue par les navigateurs pour les URL pré-signées (par défaut : MINIO_ENDPOINT)
+    MINIO_PUBLIC_ENDPOINT: str = os.getenv("MINIO_PUBLIC_ENDPOINT", "")
+
+    # Stockage des pièces jointes : "local" (uploads/blobs) ou "s3" (MinIO / S3)
+    STORAGE_BACKEND: str = os.getenv("STORAGE_BACKEND", "local")
+    STORAGE_PRESIGN_TTL: int = int(os.getenv("STORAGE_PRESIGN_TTL", "300"))
+
+    # Argon2 : changer ces paramètres déclenche un rehash transparent à la connexion
+    ARGON2_TIME_COST: int = int(os.getenv("ARGON2_TIME_COST", "3"))
+    ARGON2_MEMORY_COST: int = int(os.getenv("ARGON2_MEMORY_COST", "65536"))
+    ARGON2_PARALLELISM: int = int(os.getenv("ARGON2_PARALLELISM", "4"))
+    PASSWORD_HASH_WORKERS: int = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+    PASSWORD_HASH_QUEUE: int = int(os.getenv("PASSWORD_HASH_QUEUE", "16"))
+
+    AUTH_CACHE_TTL: int = int(os.getenv("AUTH_CACHE_TTL", "60"))
+    AUTH_CACHE_SIZE: int = int(os.getenv("AUTH_CACHE_SIZE", "10000"))
+    BROKER_URL: str = os.getenv("BROKER_URL", "memory://")
+
+    MAX_UPLOAD_FILE_BYTES: int = int(os.getenv("MAX_UPLOAD_FILE_BYTES", str(512 * 1024 * 1024)))
+    MAX_UPLOAD_REQUEST_BYTES: int = int(os.getenv("MAX_UPLOAD_REQUEST_BYTES", str(2 * 1024 * 1024 * 1024)))
+
+    # Miniatures / aperçus PDF générés dans un pool de processus après l'upload
+    PREVIEW_WORKERS: int = int(os.getenv("PREVIEW_WORKERS", "2"))
+    PREVIEW_MAX_SIZE: int = int(os.getenv("PREVIEW_MAX_SIZE", "320"))
+    # Après un échec de rendu, l'aperçu est à nouveau tenté à la consultation passé ce délai
+    PREVIEW_RETRY_SECONDS: int = int(os.getenv("PREVIEW_RETRY_SECONDS", "3600"))
+    PREVIEW_FAILED_MAX: int = int(os.getenv("PREVIEW_FAILED_MAX", "10000"))
+
+    # Extraction du texte des pièces jointes pour la recherche
+    TEXT_EXTRACT_WORKERS: int = int(os.getenv("TEXT_EXTRACT_WORKERS", "1"))
+
+    # File de tâches en base (notifications, emails...) ; JOB_WORKERS=0 : pas de worker dans l'API
+    JOB_WORKERS: int = int(os.getenv("JOB_WORKERS", "2"))
+    JOB_BATCH_SIZE: int = int(os.getenv("JOB_BATCH_SIZE", "50"))
+    JOB_POLL_INTERVAL: float = float(os.getenv("JOB_POLL_INTERVAL", "1.0"))
+    JOB_LEASE_SECONDS: int = int(os.getenv("JOB_LEASE_SECONDS", "60"))
+    JOB_MAX_ATTEMPTS: int = int(os.getenv("JOB_MAX_ATTEMPTS", "5"))
+    JOB_BACKOFF_BASE: float = float(os.getenv("JOB_BACKOFF_BASE", "2.0"))
+    JOB_BACKOFF_MAX: float = float(os.getenv("JOB_BACKOFF_MAX", "600"))
+    JOB_RETENTION_HOURS: int = int(os.getenv("JOB_RETENTION_HOURS", "24"))
+
+    SLOW_QUERY_MS: int = int(os.getenv("SLOW_QUERY_MS", "200"))
+    SLOW_QUERY_EXPLAIN: bool = os.getenv("SLOW_QUERY_EXPLAIN", "true").lower() == "true"
 
     SMTP_HOST: str = os.getenv("SMTP_HOST", "")
     SMTP_PORT: int = int(os.getenv("SMTP_PORT", "587"))
     SMTP_USER: str = os.getenv("SMTP_USER", "")
     SMTP_PASSWORD: str = os.getenv("SMTP_PASSWORD", "")
     SMTP_FROM: str = os.getenv("SMTP_FROM", "noreply@qualitytracker.com")
+    SMTP_POOL_SIZE: int = int(os.getenv("SMTP_POOL_SIZE", "4"))
+    SMTP_TIMEOUT: float = float(os.getenv("SMTP_TIMEOUT", "30"))
+    SMTP_RETRIES: int = int(os.getenv("SMTP_RETRIES", "3"))
+    SMTP_RETRY_BACKOFF: float = float(os.getenv("SMTP_RETRY_BACKOFF", "1.0"))
+    # Copie email des notifications (immédiate, ou regroupée selon email_preferences)
+    EMAIL_NOTIFICATIONS: bool = os.getenv("EMAIL_NOTIFICATIONS", "true").lower() == "true"
 
 settings = Settings()
@@ -2,15 +2,44 @@ from typing import Optional
 from fastapi import HTTPException, Depends
 from sqlalchemy.orm import Session
 from models.user import User, UserRole
-from core.security import get_current_user_id
-from db.session import get_db
+from core.security import get_current_user_id, get_stream_user_id
+from core.user_cache import CurrentUser, principal_cache
+from db.session import AsyncDB, get_async_read_db, get_db
 
 from schemas.user import UserCreate
 
-def get_current_user(user_id: int = Depends(get_current_user_id), db: Session = Depends(get_db)) -> User:
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
+def get_current_user(user_id: int = Depends(get_current_user_id), db: Session = Depends(get_db)) -> CurrentUser:
+    # Auteur des écritures de la session (read-your-writes, db/routing.py)
+    db.info["user_id"] = user_id
+    return load_principal(user_id, db)
+
+
+async def get_current_user_async(
+    user_id: int = Depends(get_current_user_id), db: AsyncDB = Depends(get_async_read_db)
+) -> CurrentUser:
+    """Pour les endpoints async : principal en cache sans passer par le threadpool."""
+    user = principal_cache.get(user_id)
+    if user is not None and user.is_active:
+        return user
+    return await db.run_sync(lambda session: load_principal(user_id, session))
+
+
+def get_stream_user(user_id: int = Depends(get_stream_user_id), db: Session = Depends(get_db)) -> CurrentUser:
+    """Comme get_current_user, token accepté aussi en paramètre ?access_token= (EventSource)."""
+    return load_principal(user_id, db)
+
+
+def load_principal(user_id: int, db: Session) -> CurrentUser:
+    user = principal_cache.get(user_id)
+    if user is None:
+        row = db.query(User.id, User.role, User.is_active).filter(User.id == user_id).first()
+        if not row:
+            raise HTTPException(status_code=404, detail="User not found")
+        user = CurrentUser(id=row.id, role=row.role, is_active=row.is_active)
+        principal_cache.set(user_id, user)
+
+    if not user.is_active:
+        raise HTTPException(status_code=403, detail="User account is inactive")
     return user
 
 def check_permission(user: User, action: str, resource: str, resource_owner_id: Optional[int] = None) -> bool:
@@ -0,0 +1,170 @@
+import logging
+import threading
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import anyio
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from core.config import settings
+
+logger = logging.getLogger("quality_tracker.sql")
+
+
+@dataclass
+class RequestStats:
+    statements: int = 0
+    db_time: float = 0.0
+    slowest_time: float = 0.0
+    slowest_statement: Optional[str] = None
+    slow_queries: List[Tuple[float, str, object]] = field(default_factory=list)
+
+
+@dataclass
+class RouteStats:
+    requests: int = 0
+    statements: int = 0
+    db_time: float = 0.0
+    max_db_time: float = 0.0
+    total_time: float = 0.0
+    slowest_time: float = 0.0
+    slowest_statement: Optional[str] = None
+
+
+_current: ContextVar[Optional[RequestStats]] = ContextVar("sql_request_stats", default=None)
+_routes: Dict[str, RouteStats] = {}
+_routes_lock = threading.Lock()
+
+
+def instrument_engine(engine: Engine) -> None:
+    """
+    Branche le comptage des requêtes SQL (nombre, durée, plus lente) sur `engine`.
+    """
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start"].pop()
+        stats = _current.get()
+        if stats is None:
+            return
+
+        stats.statements += 1
+        stats.db_time += elapsed
+        if elapsed > stats.slowest_time:
+            stats.slowest_time = elapsed
+            stats.slowest_statement = statement
+        if elapsed * 1000 >= settings.SLOW_QUERY_MS and not executemany:
+            stats.slow_queries.append((elapsed, statement, parameters))
+
+
+def _explain(engine: Engine, statement: str, parameters) -> str:
+    prefix = "EXPLAIN QUERY PLAN " if engine.dialect.name == "sqlite" else "EXPLAIN "
+    try:
+        with engine.connect() as conn:
+            rows = conn.exec_driver_sql(prefix + statement, parameters).all()
+    except Exception as exc:  # le log ne doit jamais faire échouer la requête
+        return f"EXPLAIN failed: {exc}"
+    return "\n".join(" | ".join(str(col) for col in row) for row in rows)
+
+
+def log_slow_queries(engine: Engine, route: str, stats: RequestStats) -> None:
+    for elapsed, statement, parameters in stats.slow_queries:
+        plan = ""
+        if settings.SLOW_QUERY_EXPLAIN and statement.lstrip().upper().startswith("SELECT"):
+            plan = "\n" + _explain(engine, statement, parameters)
+        logger.warning("Slow query on %s (%.1f ms): %s%s", route, elapsed * 1000, statement, plan)
+
+
+def _record_route(route: str, stats: RequestStats, total_time: float) -> None:
+    with _routes_lock:
+        agg = _routes.setdefault(route, RouteStats())
+        agg.requests += 1
+        agg.statements += stats.statements
+        agg.db_time += stats.db_time
+        agg.max_db_time = max(agg.max_db_time, stats.db_time)
+        agg.total_time += total_time
+        if stats.slowest_time > agg.slowest_time:
+            agg.slowest_time = stats.slowest_time
+            agg.slowest_statement = stats.slowest_statement
+
+
+def route_stats() -> List[dict]:
+    """
+    Statistiques SQL agrégées par route (template), triées par temps DB cumulé.
+    """
+    with _routes_lock:
+        items = list(_routes.items())
+
+    result = [
+        {
+            "route": route,
+            "requests": agg.requests,
+            "avg_statements": round(agg.statements / agg.requests, 2),
+            "avg_db_ms": round(agg.db_time * 1000 / agg.requests, 2),
+            "max_db_ms": round(agg.max_db_time * 1000, 2),
+            "total_db_ms": round(agg.db_time * 1000, 2),
+            "avg_request_ms": round(agg.total_time * 1000 / agg.requests, 2),
+            "slowest_statement_ms": round(agg.slowest_time * 1000, 2),
+            "slowest_statement": agg.slowest_statement,
+        }
+        for route, agg in items
+    ]
+    return sorted(result, key=lambda r: r["total_db_ms"], reverse=True)
+
+
+def reset_route_stats() -> None:
+    with _routes_lock:
+        _routes.clear()
+
+
+class SQLInstrumentationMiddleware:
+    """
+    Middleware ASGI : expose les stats SQL de la requête dans l'en-tête Server-Timing,
+    les agrège par route et journalise les requêtes lentes (avec leur EXPLAIN).
+    """
+
+    def __init__(self, app, engine: Engine):
+        self.app = app
+        self.engine = engine
+        self._templates: Dict[object, str] = {}
+
+    def _route_template(self, scope) -> str:
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return f"{scope['method']} <unmatched>"
+        if not self._templates:
+            for route in scope["app"].routes:
+                if hasattr(route, "endpoint"):
+                    self._templates[route.endpoint] = route.path
+        return f"{scope['method']} {self._templates.get(endpoint, scope['path'])}"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _current.set(stats)
+        started = time.perf_counter()
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                timing = f'db;dur={stats.db_time * 1000:.2f};desc="{stats.statements} queries"'
+                message["headers"] = [*message.get("headers", []), (b"server-timing", timing.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            route = self._route_template(scope)
+            _record_route(route, stats, time.perf_counter() - started)
+            if stats.slow_queries:
+                await anyio.to_thread.run_sync(log_slow_queries, self.engine, route, stats)
@@ -0,0 +1,250 @@
+import logging
+import random
+import threading
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import and_, delete, event, func, or_, select, update
+from sqlalchemy.orm import Session
+
+from core.config import settings
+from models.job import Job
+
+logger = logging.getLogger(__name__)
+
+# Un handler reçoit la session et les payloads d'un lot de tâches du même type ;
+# ses écritures sont validées dans la même transaction que le passage à "done".
+Handler = Callable[[Session, List[dict]], None]
+
+_handlers: Dict[str, Handler] = {}
+_wakeup = threading.Event()
+
+
+def job_handler(kind: str):
+    """Enregistre le handler d'un type de tâche."""
+    def decorator(fn: Handler) -> Handler:
+        _handlers[kind] = fn
+        return fn
+    return decorator
+
+
+def enqueue(db: Session, kind: str, payload: Dict[str, Any], delay: float = 0) -> Job:
+    """
+    Ajoute une tâche à la session courante : elle n'existe que si la transaction
+    du changement métier est validée (pas de commit ici).
+    """
+    job = Job(
+        kind=kind,
+        payload=payload,
+        max_attempts=settings.JOB_MAX_ATTEMPTS,
+        run_after=datetime.utcnow() + timedelta(seconds=delay),
+    )
+    db.add(job)
+    db.info["jobs_enqueued"] = True
+    return job
+
+
+@event.listens_for(Session, "after_commit")
+def _wake_workers(session: Session) -> None:
+    # Réveille les workers du processus sans attendre le prochain polling
+    if session.info.pop("jobs_enqueued", False):
+        _wakeup.set()
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_enqueued(session: Session) -> None:
+    session.info.pop("jobs_enqueued", None)
+
+
+def _due(now: datetime):
+    return or_(
+        and_(Job.status == "pending", Job.run_after <= now),
+        and_(Job.status == "running", Job.locked_until < now),
+    )
+
+
+def _claim(db: Session, limit: int) -> List[Job]:
+    """
+    Réserve jusqu'à `limit` tâches échues. Sur Postgres, SKIP LOCKED évite que
+    deux workers se bloquent ; partout, l'UPDATE conditionnel garantit qu'une
+    tâche n'est réservée qu'une fois.
+    """
+    now = datetime.utcnow()
+    ids = db.execute(
+        select(Job.id).where(_due(now)).order_by(Job.run_after, Job.id).limit(limit).with_for_update(skip_locked=True)
+    ).scalars().all()
+    if not ids:
+        db.rollback()
+        return []
+
+    claimed = db.execute(
+        update(Job)
+        .where(Job.id.in_(ids), _due(now))
+        .values(status="running", attempts=Job.attempts + 1, locked_until=now + timedelta(seconds=settings.JOB_LEASE_SECONDS))
+        .returning(Job.id),
+        execution_options={"synchronize_session": False},
+    ).scalars().all()
+    db.commit()
+    if not claimed:
+        return []
+    return db.query(Job).filter(Job.id.in_(claimed)).order_by(Job.id).all()
+
+
+def _backoff(attempts: int) -> float:
+    delay = min(settings.JOB_BACKOFF_MAX, settings.JOB_BACKOFF_BASE * 2 ** (attempts - 1))
+    return delay * random.uniform(1.0, 1.25)
+
+
+def _mark_failed(db: Session, job: Job, error: str) -> None:
+    job.last_error = error[:2000]
+    job.locked_until = None
+    if job.attempts >= job.max_attempts:
+        job.status = "failed"
+        job.finished_at = datetime.utcnow()
+        logger.error("Job %s (%s) failed after %s attempts: %s", job.id, job.kind, job.attempts, error)
+    else:
+        job.status = "pending"
+        job.run_after = datetime.utcnow() + timedelta(seconds=_backoff(job.attempts))
+
+
+def _run_batch(db: Session, kind: str, jobs: List[Job]) -> None:
+    handler = _handlers.get(kind)
+    if handler is None:
+        for job in jobs:
+            job.attempts = job.max_attempts
+            _mark_failed(db, job, f"No handler registered for job kind '{kind}'")
+        db.commit()
+        return
+
+    try:
+        handler(db, [job.payload for job in jobs])
+        now = datetime.utcnow()
+        for job in jobs:
+            job.status, job.finished_at, job.locked_until, job.last_error = "done", now, None, None
+        db.commit()
+    except Exception as exc:
+        db.rollback()
+        if len(jobs) > 1:
+            # Lot en échec : on rejoue tâche par tâche pour isoler la fautive
+            for job in jobs:
+                _run_batch(db, kind, [job])
+            return
+        logger.warning("Job %s (%s) attempt %s failed", jobs[0].id, kind, jobs[0].attempts, exc_info=True)
+        _mark_failed(db, jobs[0], f"{type(exc).__name__}: {exc}")
+        db.commit()
+
+
+def run_due_jobs(limit: Optional[int] = None) -> int:
+    """
+    Exécute un lot de tâches échues, regroupées par type. Retourne le nombre de
+    tâches traitées.
+    """
+    from db.session import SessionLocal
+
+    db = SessionLocal()
+    try:
+        jobs = _claim(db, limit or settings.JOB_BATCH_SIZE)
+        groups: Dict[str, List[Job]] = defaultdict(list)
+        for job in jobs:
+            groups[job.kind].append(job)
+        for kind, group in groups.items():
+            _run_batch(db, kind, group)
+        return len(jobs)
+    finally:
+        db.close()
+
+
+def purge_finished_jobs(db: Session) -> int:
+    cutoff = datetime.utcnow() - timedelta(hours=settings.JOB_RETENTION_HOURS)
+    deleted = db.execute(delete(Job).where(Job.status == "done", Job.finished_at < cutoff)).rowcount
+    db.commit()
+    return deleted
+
+
+def job_stats(db: Session) -> Dict[str, Any]:
+    counts = dict(db.query(Job.status, func.count(Job.id)).group_by(Job.status).all())
+    oldest = db.query(func.min(Job.run_after)).filter(Job.status == "pending").scalar()
+    return {
+        "workers": settings.JOB_WORKERS,
+        "pending": counts.get("pending", 0),
+        "running": counts.get("running", 0),
+        "done": counts.get("done", 0),
+        "failed": counts.get("failed", 0),
+        "oldest_pending": oldest,
+    }
+
+
+class JobWorkerPool:
+    """
+    Threads qui vident la file : réveillés après chaque commit qui ajoute une
+    tâche dans ce processus, sinon par polling (JOB_POLL_INTERVAL) pour les tâches
+    ajoutées par d'autres processus ou reprogrammées après un échec.
+    """
+
+    PURGE_INTERVAL = 300
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._last_purge = 0.0
+
+    def start(self) -> None:
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._loop, name=f"job-worker-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: float = 5) -> None:
+        self._stop.set()
+        _wakeup.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads.clear()
+
+    def _maybe_purge(self) -> None:
+        from db.session import SessionLocal
+
+        now = datetime.utcnow().timestamp()
+        if now - self._last_purge < self.PURGE_INTERVAL:
+            return
+        self._last_purge = now
+        db = SessionLocal()
+        try:
+            purge_finished_jobs(db)
+        finally:
+            db.close()
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                processed = run_due_jobs()
+                self._maybe_purge()
+            except Exception:
+                logger.exception("Job worker iteration failed")
+                processed = 0
+            if not processed:
+                _wakeup.wait(settings.JOB_POLL_INTERVAL)
+                # À l'arrêt, l'événement reste levé pour réveiller tous les threads
+                if not self._stop.is_set():
+                    _wakeup.clear()
+
+
+_pool: Optional[JobWorkerPool] = None
+
+
+def start_job_workers(workers: Optional[int] = None) -> Optional[JobWorkerPool]:
+    global _pool
+    workers = settings.JOB_WORKERS if workers is None else workers
+    if _pool is None and workers > 0:
+        _pool = JobWorkerPool(workers)
+        _pool.start()
+    return _pool
+
+
+def stop_job_workers() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.stop()
+        _pool = None
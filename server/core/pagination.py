@@ -0,0 +1,116 @@
+import base64
+import binascii
+import enum
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import DateTime, and_, or_
+from sqlalchemy.orm import Query
+from sqlalchemy.orm.attributes import InstrumentedAttribute
+
+
+def sort_column(model, sort_by: Optional[str], default: InstrumentedAttribute) -> InstrumentedAttribute:
+    """
+    Retourne la colonne de tri demandée, ou `default` si `sort_by` n'est pas une colonne du modèle.
+    """
+    attr = getattr(model, sort_by, None) if sort_by else None
+    if attr is None or sort_by not in model.__table__.columns:
+        return default
+    return attr
+
+
+def _is_nullable(column: InstrumentedAttribute) -> bool:
+    # Les colonnes avec une valeur par défaut (created_at, status...) ne sont jamais NULL en pratique
+    col = column.property.columns[0]
+    return bool(col.nullable) and col.default is None
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, enum.Enum):
+        return value.name
+    return value
+
+
+def _decode_value(column: InstrumentedAttribute, value: Any) -> Any:
+    if value is not None and isinstance(column.type, DateTime):
+        return datetime.fromisoformat(value)
+    return value
+
+
+def encode_cursor(sort_key: str, sort_order: str, values: List[Any]) -> str:
+    payload = {"s": sort_key, "o": sort_order, "v": [_encode_value(v) for v in values]}
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort_key: str, sort_order: str) -> List[Any]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        values = payload["v"]
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    if payload.get("s") != sort_key or payload.get("o") != sort_order or len(values) != 2:
+        raise HTTPException(status_code=400, detail="Cursor does not match the requested sort")
+    return values
+
+
+def _keyset_filter(column: InstrumentedAttribute, id_column: InstrumentedAttribute, descending: bool,
+                   value: Any, last_id: int):
+    # Ordre : (colonne, id) dans le même sens, NULL toujours en dernier
+    after_id = id_column < last_id if descending else id_column > last_id
+    if value is None:
+        return and_(column.is_(None), after_id)
+
+    after_value = column < value if descending else column > value
+    clauses = [after_value, and_(column == value, after_id)]
+    if _is_nullable(column):
+        clauses.append(column.is_(None))
+    return or_(*clauses)
+
+
+def paginate(
+    query: Query,
+    column: InstrumentedAttribute,
+    id_column: InstrumentedAttribute,
+    sort_order: Optional[str],
+    limit: int,
+    skip: int = 0,
+    cursor: Optional[str] = None,
+) -> Tuple[list, Optional[str]]:
+    """
+    Trie `query` sur (column, id) puis renvoie une page et le `next_cursor` opaque.
+
+    Sans `cursor`, la page est sélectionnée par offset (`skip`) ; avec un `cursor`,
+    elle démarre juste après la dernière ligne de la page précédente (keyset),
+    ce qui coûte le même prix quelle que soit la profondeur.
+    """
+    descending = sort_order != "asc"
+    sort_key = column.key
+    order = "desc" if descending else "asc"
+
+    ordering = [column.desc() if descending else column.asc()]
+    if _is_nullable(column):
+        ordering = [ordering[0].nulls_last()]
+    ordering.append(id_column.desc() if descending else id_column.asc())
+    query = query.order_by(*ordering)
+
+    if cursor:
+        value, last_id = decode_cursor(cursor, sort_key, order)
+        query = query.filter(_keyset_filter(column, id_column, descending, _decode_value(column, value), last_id))
+    elif skip:
+        query = query.offset(skip)
+
+    rows = query.limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+
+    rows = rows[:limit]
+    last = rows[-1]
+    next_cursor = encode_cursor(sort_key, order, [getattr(last, column.key), getattr(last, id_column.key)])
+    return rows, next_cursor
@@ -1,29 +1,105 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Tuple
 import jwt
 from jwt import DecodeError, ExpiredSignatureError, InvalidTokenError
 from passlib.context import CryptContext
-from fastapi import HTTPException, status, Depends
+from fastapi import HTTPException, status, Depends, Query
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from core.config import settings
+from core.user_cache import token_cache
 
 
-pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
+pwd_context = CryptContext(
+    schemes=["argon2"],
+    deprecated="auto",
+    argon2__rounds=settings.ARGON2_TIME_COST,
+    argon2__memory_cost=settings.ARGON2_MEMORY_COST,
+    argon2__parallelism=settings.ARGON2_PARALLELISM,
+)
 security = HTTPBearer()
+optional_security = HTTPBearer(auto_error=False)
+
+
+# 🔹 Pool dédié au hachage Argon2 : une rafale de connexions ne doit pas
+# monopoliser le threadpool partagé par les autres endpoints.
+_hash_executor = ThreadPoolExecutor(max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="argon2")
+_hash_slots = threading.BoundedSemaphore(settings.PASSWORD_HASH_WORKERS + settings.PASSWORD_HASH_QUEUE)
+_hash_lock = threading.Lock()
+_hash_stats = {"in_flight": 0, "completed": 0, "rejected": 0}
+
+
+def _hash_done(future: Future) -> None:
+    _hash_slots.release()
+    with _hash_lock:
+        _hash_stats["in_flight"] -= 1
+        _hash_stats["completed"] += 1
+
+
+def _submit_hash_job(fn, *args) -> Future:
+    if not _hash_slots.acquire(blocking=False):
+        with _hash_lock:
+            _hash_stats["rejected"] += 1
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Authentication service busy, please retry",
+            headers={"Retry-After": "1"},
+        )
+    with _hash_lock:
+        _hash_stats["in_flight"] += 1
+    future = _hash_executor.submit(fn, *args)
+    future.add_done_callback(_hash_done)
+    return future
+
+
+def password_hash_stats() -> Dict[str, int]:
+    with _hash_lock:
+        in_flight = _hash_stats["in_flight"]
+        return {
+            "workers": settings.PASSWORD_HASH_WORKERS,
+            "max_queue": settings.PASSWORD_HASH_QUEUE,
+            "in_flight": in_flight,
+            "queued": max(0, in_flight - settings.PASSWORD_HASH_WORKERS),
+            "completed": _hash_stats["completed"],
+            "rejected": _hash_stats["rejected"],
+        }
+
+
+def _verify_and_update(plain_password: str, hashed_password: Optional[str]) -> Tuple[bool, Optional[str]]:
+    if not hashed_password:
+        return False, None
+    return pwd_context.verify_and_update(plain_password, hashed_password)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """
     Vérifie si le mot de passe fourni correspond au hash stocké.
     """
-    return pwd_context.verify(plain_password, hashed_password)
+    return _submit_hash_job(_verify_and_update, plain_password, hashed_password).result()[0]
 
 
 def get_password_hash(password: str) -> str:
     """
     Génère un hash sécurisé du mot de passe avec Argon2.
     """
-    return pwd_context.hash(password)
+    return _submit_hash_job(pwd_context.hash, password).result()
+
+
+async def verify_and_update_password_async(
+    plain_password: str, hashed_password: Optional[str]
+) -> Tuple[bool, Optional[str]]:
+    """
+    Vérifie le mot de passe sans bloquer la boucle ; retourne aussi le nouveau hash
+    si le hash stocké utilise d'anciens paramètres Argon2 (sinon None).
+    """
+    return await asyncio.wrap_future(_submit_hash_job(_verify_and_update, plain_password, hashed_password))
+
+
+async def get_password_hash_async(password: str) -> str:
+    return await asyncio.wrap_future(_submit_hash_job(pwd_context.hash, password))
 
 
 
@@ -63,9 +139,26 @@ def verify_token(token: str) -> Dict[str, Any]:
     except (ExpiredSignatureError, DecodeError, InvalidTokenError):
         raise Exception("Token invalid")
 
-def get_current_user_id(credentials: HTTPAuthorizationCredentials = Depends(security)) -> int:
-    token = credentials.credentials
-    payload = verify_token(token)
+async def get_current_user_id(credentials: HTTPAuthorizationCredentials = Depends(security)) -> int:
+    return user_id_from_token(credentials.credentials)
+
+
+def get_stream_user_id(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security),
+    access_token: Optional[str] = Query(None, description="Token for clients that cannot send headers (EventSource)"),
+) -> int:
+    token = credentials.credentials if credentials else access_token
+    if not token:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
+    return user_id_from_token(token)
+
+
+def user_id_from_token(token: str) -> int:
+    payload = token_cache.get(token)
+    if payload is None:
+        payload = verify_token(token)
+        # Jamais au-delà de l'expiration du token
+        token_cache.set(token, payload, ttl=payload.get("exp", 0) - time.time())
     user_id = payload.get("sub")
 
     if user_id is None:
@@ -0,0 +1,57 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Exécuté dans un interpréteur neuf : ce que paie chaque worker uvicorn à son (re)démarrage
+_PROBE = """
+import asyncio, json, time
+started = time.perf_counter()
+import main
+imported = time.perf_counter()
+
+async def startup():
+    async with main.app.router.lifespan_context(main.app):
+        return time.perf_counter(), time.time()
+
+ready, ready_at = asyncio.run(startup())
+print(json.dumps({"import": imported - started, "lifespan": ready - imported, "ready_at": ready_at}))
+"""
+
+
+def _run_probe() -> Dict[str, float]:
+    spawned_at = time.time()
+    completed = subprocess.run(
+        [sys.executable, "-c", _PROBE], cwd=SERVER_DIR, capture_output=True, text=True, check=False
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"Startup probe failed:\n{completed.stderr.strip()}")
+    timings = json.loads(completed.stdout.strip().splitlines()[-1])
+    # Du lancement du processus à "prêt à servir", interpréteur compris
+    timings["ready"] = timings.pop("ready_at") - spawned_at
+    return timings
+
+
+def benchmark_startup(runs: int = 5) -> Dict[str, dict]:
+    """
+    Temps de démarrage d'un worker, mesuré `runs` fois dans des processus séparés :
+    import de main (application construite), lifespan, et total du lancement du
+    processus jusqu'à prêt à servir. Secondes, min / médiane / max.
+    """
+    samples: Dict[str, List[float]] = {"import": [], "lifespan": [], "ready": []}
+    for _ in range(runs):
+        for phase, seconds in _run_probe().items():
+            samples[phase].append(seconds)
+    return {
+        phase: {
+            "min": round(min(values), 3),
+            "median": round(statistics.median(values), 3),
+            "max": round(max(values), 3),
+        }
+        for phase, values in samples.items()
+    }
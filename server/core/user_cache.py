@@ -0,0 +1,113 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Hashable, Optional
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from core.broker import get_broker
+from core.config import settings
+from models.user import User, UserRole
+
+USER_INVALIDATION_CHANNEL = "users.invalidate"
+
+
+@dataclass(frozen=True)
+class CurrentUser:
+    """
+    Principal compact de l'utilisateur authentifié (ce dont les endpoints ont besoin).
+    """
+    id: int
+    role: UserRole
+    is_active: bool
+
+
+class TTLCache:
+    """
+    Cache LRU borné avec expiration par entrée, partagé entre threads.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+token_cache = TTLCache(settings.AUTH_CACHE_SIZE, settings.AUTH_CACHE_TTL)
+principal_cache = TTLCache(settings.AUTH_CACHE_SIZE, settings.AUTH_CACHE_TTL)
+
+
+def invalidate_user(user_id: int) -> None:
+    """Invalide le principal de `user_id` dans tous les workers."""
+    get_broker().publish(USER_INVALIDATION_CHANNEL, user_id)
+
+
+def _on_invalidation(user_id: int) -> None:
+    principal_cache.delete(user_id)
+
+
+_unsubscribe = None
+
+
+def subscribe_invalidations() -> None:
+    global _unsubscribe
+    if _unsubscribe is None:
+        _unsubscribe = get_broker().subscribe(USER_INVALIDATION_CHANNEL, _on_invalidation)
+
+
+# 🔹 Write-through : role / is_active modifiés -> invalidation après commit
+@event.listens_for(Session, "after_flush")
+def _collect_user_changes(session: Session, flush_context) -> None:
+    changed = session.info.setdefault("invalidated_users", set())
+    for obj in session.dirty:
+        if isinstance(obj, User):
+            state = inspect(obj)
+            if state.attrs.role.history.has_changes() or state.attrs.is_active.history.has_changes():
+                changed.add(obj.id)
+    for obj in session.deleted:
+        if isinstance(obj, User):
+            changed.add(obj.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_user_changes(session: Session) -> None:
+    for user_id in session.info.pop("invalidated_users", ()):
+        invalidate_user(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_user_changes(session: Session) -> None:
+    session.info.pop("invalidated_users", None)
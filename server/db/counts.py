@@ -0,0 +1,119 @@
+import json
+import threading
+from collections import OrderedDict
+from typing import Hashable, Iterable, Literal, Optional, Tuple
+
+from sqlalchemy import event, select
+from sqlalchemy.orm import Query, Session
+
+from db.upsert import increment_row
+from models.table_version import TableVersion
+from models.user import UserRole
+
+# include_total=false|exact|estimate
+TotalMode = Literal["false", "exact", "estimate"]
+
+MAX_CACHED_COUNTS = 2048
+
+# Tables dont dépendent les totaux mémoïsés : seules leurs écritures incrémentent
+# table_versions (une ligne partagée, à ne pas verrouiller pour jobs, notifications...)
+COUNTED_TABLES = frozenset({"nces", "deliveries", "projects", "users", "files", "attachment_texts"})
+
+_counts: "OrderedDict[Hashable, Tuple[tuple, int]]" = OrderedDict()
+_lock = threading.Lock()
+
+
+@event.listens_for(Session, "after_flush")
+def _bump_table_versions(session: Session, flush_context) -> None:
+    """
+    Incrémente la version de chaque table comptée modifiée, dans la transaction de l'écriture.
+    """
+    tables = {
+        obj.__table__.name
+        for obj in (*session.new, *session.dirty, *session.deleted)
+        if getattr(obj, "__tablename__", None) in COUNTED_TABLES
+    }
+    if not tables:
+        return
+
+    conn = session.connection()
+    for table in sorted(tables):
+        increment_row(conn, TableVersion.__table__, {"table_name": table}, {"version": 1}, {"version": 1})
+
+
+def table_versions(db: Session, tables: Iterable[str]) -> tuple:
+    tables = sorted(tables)
+    rows = dict(
+        db.execute(
+            select(TableVersion.table_name, TableVersion.version).where(TableVersion.table_name.in_(tables))
+        ).all()
+    )
+    return tuple(rows.get(table, 0) for table in tables)
+
+
+def count_key(endpoint: str, user, **filters) -> Hashable:
+    """
+    Clé de mémoïsation : endpoint, périmètre du rôle et filtres effectivement appliqués.
+    """
+    if user is None or user.role in (UserRole.ADMIN, UserRole.QUALITY):
+        scope = ("all",)
+    else:
+        scope = (user.role.value, user.id)
+    applied = json.dumps({k: v for k, v in filters.items() if v not in (None, "")}, sort_keys=True, default=str)
+    return endpoint, scope, applied
+
+
+def _estimate(db: Session, query: Query) -> Optional[int]:
+    bind = db.get_bind()
+    if bind.dialect.name != "postgresql":
+        return None
+
+    compiled = query.order_by(None).statement.compile(dialect=bind.dialect)
+    plan = db.connection().exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled}", compiled.params).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def count_total(
+    db: Session,
+    query: Query,
+    key: Hashable,
+    tables: Iterable[str],
+    mode: TotalMode = "exact",
+) -> Optional[int]:
+    """
+    Retourne le total de `query` selon `mode` :
+      - "false"    : pas de total (scroll infini)
+      - "exact"    : COUNT(*) mémoïsé tant qu'aucune des `tables` n'a été modifiée
+      - "estimate" : dernier total connu, ou estimation du planificateur (Postgres)
+    """
+    if mode == "false":
+        return None
+    if not COUNTED_TABLES.issuperset(tables):
+        raise ValueError(f"Counts on {sorted(set(tables) - COUNTED_TABLES)} are not versioned, add them to COUNTED_TABLES")
+
+    versions = table_versions(db, tables)
+
+    with _lock:
+        cached = _counts.get(key)
+        if cached is not None:
+            _counts.move_to_end(key)
+            cached_versions, cached_total = cached
+            if mode == "estimate" or cached_versions == versions:
+                return cached_total
+
+    if mode == "estimate":
+        estimated = _estimate(db, query)
+        if estimated is not None:
+            return estimated
+
+    total = query.order_by(None).count()
+
+    with _lock:
+        _counts[key] = (versions, total)
+        _counts.move_to_end(key)
+        while len(_counts) > MAX_CACHED_COUNTS:
+            _counts.popitem(last=False)
+
+    return total
@@ -0,0 +1,41 @@
+from sqlalchemy.orm import contains_eager, joinedload, selectinload
+
+from models.delivery import Delivery
+from models.nce import NCE
+from models.project import Project
+from models.survey import Survey
+
+# Profils de chargement : un par schéma de réponse, pour éviter les lazy loads (N+1)
+# à la sérialisation. Listes -> selectinload (une requête IN par relation, quelle que
+# soit la taille de la page) ; détail -> joinedload (une seule requête).
+
+# DeliveryResponseWithProject : project -> client
+DELIVERY_LIST = (
+    selectinload(Delivery.project).selectinload(Project.client),
+)
+DELIVERY_DETAIL = (
+    joinedload(Delivery.project).joinedload(Project.client),
+)
+
+# NCEResponse : delivery -> project -> client, files
+NCE_LIST = (
+    selectinload(NCE.delivery).selectinload(Delivery.project).selectinload(Project.client),
+    selectinload(NCE.files),
+)
+NCE_DETAIL = (
+    joinedload(NCE.delivery).joinedload(Delivery.project).joinedload(Project.client),
+    selectinload(NCE.files),
+)
+
+# ProjectResponse : client (la liste joint déjà users pour ses filtres)
+PROJECT_LIST = (
+    contains_eager(Project.client),
+)
+PROJECT_DETAIL = (
+    joinedload(Project.client),
+)
+
+# SurveyResponse : delivery -> project -> client
+SURVEY_LIST = (
+    selectinload(Survey.delivery).selectinload(Delivery.project).selectinload(Project.client),
+)
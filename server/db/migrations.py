@@ -0,0 +1,54 @@
+import os
+from typing import Optional
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+
+# alembic n'est importé que pour migrer (~150 ms d'import) : l'API vérifie seulement la révision
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ALEMBIC_INI = os.path.join(SERVER_DIR, "alembic.ini")
+VERSION_TABLE = "alembic_version"
+
+
+def alembic_config():
+    from alembic.config import Config
+
+    return Config(ALEMBIC_INI)
+
+
+def upgrade_database(bind: Engine, revision: str = "head") -> None:
+    """
+    Applique les migrations de migrations/versions jusqu'à `revision`.
+    Une base créée par l'ancien create_all est reprise telle quelle (tables
+    existantes conservées) puis complétée par les migrations suivantes.
+    """
+    from alembic import command
+
+    config = alembic_config()
+    with bind.begin() as connection:
+        config.attributes["connection"] = connection
+        command.upgrade(config, revision)
+
+
+def current_revision(bind: Engine) -> Optional[str]:
+    with bind.connect() as connection:
+        if not inspect(connection).has_table(VERSION_TABLE):
+            return None
+        return connection.execute(text(f"SELECT version_num FROM {VERSION_TABLE}")).scalar()
+
+
+def head_revision() -> Optional[str]:
+    from alembic.script import ScriptDirectory
+
+    return ScriptDirectory.from_config(alembic_config()).get_current_head()
+
+
+def require_schema(bind: Engine) -> str:
+    """
+    Vérification au démarrage de l'API, sans DDL : la base doit avoir été
+    migrée (python manage.py migrate). Retourne la révision courante.
+    """
+    revision = current_revision(bind)
+    if revision is None:
+        raise RuntimeError("Database schema is not initialized, run `python manage.py migrate` first")
+    return revision
@@ -0,0 +1,86 @@
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from db.query_plans import ALL_ROLES, role_users
+from models.delivery import Delivery
+from models.nce import NCE
+from models.project import Project
+from models.user import UserRole
+
+# Compteur par requête de core/instrumentation, exposé dans Server-Timing : db;dur=..;desc="N queries"
+_SERVER_TIMING_QUERIES = re.compile(r'desc="(\d+) queries"')
+
+
+@dataclass
+class QueryBudget:
+    """Appel de l'API et nombre maximal de requêtes SQL, quel que soit le volume de données."""
+
+    path: str
+    max_queries: int
+    params: Dict[str, str] = field(default_factory=dict)
+    roles: Tuple[UserRole, ...] = ALL_ROLES
+
+
+# 🔹 Listes, détails et tableau de bord : un dépassement signale un N+1 (chargement paresseux dans une boucle)
+QUERY_BUDGETS: List[QueryBudget] = [
+    QueryBudget("/nces/", 10),
+    QueryBudget("/nces/", 10, {"search": "nce"}),
+    QueryBudget("/nces/{nce_id}", 4, roles=(UserRole.ADMIN, UserRole.QUALITY)),
+    QueryBudget("/deliveries/", 7),
+    QueryBudget("/deliveries/{delivery_id}", 3, roles=(UserRole.ADMIN, UserRole.QUALITY)),
+    QueryBudget("/deliveries/{delivery_id}/files/", 3),
+    QueryBudget("/projects/", 5),
+    QueryBudget("/projects/{project_id}", 3, roles=(UserRole.ADMIN, UserRole.QUALITY)),
+    QueryBudget("/notifications/", 3),
+    QueryBudget("/dashboard/stats", 3),
+    QueryBudget("/dashboard/activities", 3),
+]
+
+
+def _first_id(db: Session, column) -> Optional[int]:
+    return db.query(column).order_by(column).limit(1).scalar()
+
+
+def check_query_counts(client, engine: Engine, prefix: str = "/api") -> Tuple[List[dict], List[str]]:
+    """
+    Appelle chaque entrée de QUERY_BUDGETS avec `client` (TestClient de l'application)
+    et relève le nombre de requêtes SQL de la réponse. Retourne (dépassements, cas non vérifiés).
+    """
+    from core.security import create_access_token
+
+    with Session(engine) as db:
+        users = role_users(db)
+        ids = {
+            "nce_id": _first_id(db, NCE.id),
+            "delivery_id": _first_id(db, Delivery.id),
+            "project_id": _first_id(db, Project.id),
+        }
+
+    failures: List[dict] = []
+    skipped = [f"{role.value} requests: no active {role.value} user" for role in ALL_ROLES if role not in users]
+    for case in QUERY_BUDGETS:
+        missing = [name for name, value in ids.items() if value is None and "{" + name + "}" in case.path]
+        if missing:
+            skipped.append(f"GET {case.path}: no row for {', '.join(missing)}")
+            continue
+        path = case.path.format(**ids)
+        for role in case.roles:
+            if role not in users:
+                continue
+            label = f"GET {case.path} as {role.value}" + (f" {case.params}" if case.params else "")
+
+            token = create_access_token({"sub": users[role], "role": role.value})
+            response = client.get(prefix + path, params=case.params, headers={"Authorization": f"Bearer {token}"})
+            match = _SERVER_TIMING_QUERIES.search(response.headers.get("server-timing", ""))
+            if response.status_code >= 400 or match is None:
+                skipped.append(f"{label}: HTTP {response.status_code}")
+                continue
+
+            queries = int(match.group(1))
+            if queries > case.max_queries:
+                failures.append({"query": label, "queries": queries, "max_queries": case.max_queries})
+    return failures, skipped
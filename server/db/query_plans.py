@@ -0,0 +1,135 @@
+import re
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Dict, FrozenSet, Iterator, List, Optional, Set, Tuple
+
+from sqlalchemy import event, inspect
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from models.delivery import Delivery
+from models.user import User, UserRole
+
+ALL_ROLES = tuple(UserRole)
+
+# "SCAN nces" sans index (SQLite) / "Seq Scan on nces" (Postgres) ; "SCAN nces USING INDEX ..." est un parcours d'index
+_SQLITE_SCAN = re.compile(r"^SCAN (?:TABLE )?(\w+)(?: AS \w+)?$")
+_POSTGRES_SCAN = re.compile(r"Seq Scan on (\w+)")
+
+
+@dataclass
+class ListQuery:
+    """Appel d'une liste de l'API dont chaque SELECT doit passer par un index."""
+
+    path: str
+    params: Dict[str, str] = field(default_factory=dict)
+    roles: Tuple[UserRole, ...] = ALL_ROLES
+    # Tables lues en entier par construction (liste complète sans filtre ni tri)
+    allow_scans: FrozenSet[str] = frozenset()
+
+
+# 🔹 Toutes les listes, pour chaque rôle et avec les filtres les plus courants
+LIST_QUERIES: List[ListQuery] = [
+    ListQuery("/nces/"),
+    ListQuery("/nces/", {"status_filter": "open"}),
+    ListQuery("/nces/", {"sort_order": "asc"}),
+    ListQuery("/deliveries/"),
+    ListQuery("/deliveries/", {"status_filter": "delivered"}),
+    ListQuery("/projects/"),
+    ListQuery("/notifications/"),
+    ListQuery("/notifications/", {"unread_only": "true"}),
+    ListQuery("/notifications/unread-count"),
+    ListQuery("/deliveries/{delivery_id}/files/"),
+    ListQuery("/dashboard/stats"),
+    ListQuery("/dashboard/activities"),
+    ListQuery("/surveys/", allow_scans=frozenset({"surveys"})),
+    ListQuery("/users", roles=(UserRole.ADMIN, UserRole.QUALITY), allow_scans=frozenset({"users"})),
+    ListQuery("/clients", roles=(UserRole.ADMIN, UserRole.QUALITY, UserRole.PRODUCER)),
+]
+
+
+@contextmanager
+def capture_selects() -> Iterator[List[Tuple[Engine, str, object]]]:
+    """SELECT exécutés pendant le bloc, sur tous les engines (primaire et réplicas)."""
+    captured: List[Tuple[Engine, str, object]] = []
+    lock = threading.Lock()
+
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and statement.lstrip().upper().startswith(("SELECT", "WITH")):
+            with lock:
+                captured.append((conn.engine, statement, parameters))
+
+    event.listen(Engine, "before_cursor_execute", _record)
+    try:
+        yield captured
+    finally:
+        event.remove(Engine, "before_cursor_execute", _record)
+
+
+def query_plan(engine: Engine, statement: str, parameters) -> List[str]:
+    with engine.connect() as conn:
+        if engine.dialect.name == "sqlite":
+            rows = conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters).all()
+            return [row[-1] for row in rows]
+        return [row[0] for row in conn.exec_driver_sql("EXPLAIN " + statement, parameters).all()]
+
+
+def full_scans(engine: Engine, plan: List[str], tables: Set[str]) -> List[str]:
+    """Tables de `tables` parcourues sans index dans `plan` (sous-requêtes matérialisées exclues)."""
+    pattern = _SQLITE_SCAN if engine.dialect.name == "sqlite" else _POSTGRES_SCAN
+    scanned = []
+    for line in plan:
+        match = pattern.search(line.strip())
+        if match and match.group(1) in tables:
+            scanned.append(match.group(1))
+    return scanned
+
+
+def role_users(db: Session) -> Dict[UserRole, int]:
+    users: Dict[UserRole, int] = {}
+    for user_id, role in db.query(User.id, User.role).filter(User.is_active == True).order_by(User.id):  # noqa: E712
+        users.setdefault(role, user_id)
+    return users
+
+
+def check_list_queries(client, engine: Engine, prefix: str = "/api") -> Tuple[List[dict], List[str]]:
+    """
+    Appelle chaque entrée de LIST_QUERIES avec `client` (TestClient de l'application)
+    et passe ses SELECT à EXPLAIN. Retourne (parcours complets, cas non vérifiés).
+    """
+    from core.security import create_access_token
+
+    with Session(engine) as db:
+        users = role_users(db)
+        delivery_id: Optional[int] = db.query(Delivery.id).order_by(Delivery.id).limit(1).scalar()
+
+    tables = set(inspect(engine).get_table_names())
+    failures: List[dict] = []
+    skipped = [f"{role.value} queries: no active {role.value} user" for role in ALL_ROLES if role not in users]
+    explained: Dict[str, List[str]] = {}
+    for case in LIST_QUERIES:
+        if delivery_id is None and "{delivery_id}" in case.path:
+            skipped.append(f"GET {case.path}: no delivery")
+            continue
+        path = case.path.format(delivery_id=delivery_id)
+        for role in case.roles:
+            if role not in users:
+                continue
+            label = f"GET {case.path} as {role.value}" + (f" {case.params}" if case.params else "")
+
+            token = create_access_token({"sub": users[role], "role": role.value})
+            with capture_selects() as statements:
+                response = client.get(prefix + path, params=case.params, headers={"Authorization": f"Bearer {token}"})
+            if response.status_code >= 400:
+                skipped.append(f"{label}: HTTP {response.status_code}")
+                continue
+
+            for bind, statement, parameters in statements:
+                key = f"{bind.url}|{statement}"
+                if key not in explained:
+                    explained[key] = query_plan(bind, statement, parameters)
+                scans = [t for t in full_scans(bind, explained[key], tables) if t not in case.allow_scans]
+                if scans:
+                    failures.append({"query": label, "tables": scans, "statement": statement, "plan": explained[key]})
+    return failures, skipped
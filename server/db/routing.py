@@ -0,0 +1,71 @@
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.dml import UpdateBase
+
+from core.broker import get_broker
+from core.config import settings
+from core.user_cache import TTLCache
+
+WRITES_CHANNEL = "db.writes"
+
+# Utilisateurs ayant écrit il y a moins de REPLICA_STICKY_SECONDS : lus sur le primaire
+recent_writers = TTLCache(settings.AUTH_CACHE_SIZE, settings.REPLICA_STICKY_SECONDS)
+
+
+class RoutingSession(Session):
+    """
+    Session qui lit sur `info["replica"]` (engine du réplica choisi pour la
+    requête) quand il est défini ; flush et DML explicites vont au primaire.
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        replica: Optional[Engine] = self.info.get("replica")
+        if replica is not None and not self._flushing and not isinstance(clause, UpdateBase):
+            return replica
+        return super().get_bind(mapper=mapper, clause=clause, **kw)
+
+
+def is_sticky(user_id: Optional[int]) -> bool:
+    return user_id is not None and recent_writers.get(user_id) is not None
+
+
+def _remember_writer(user_id: int) -> None:
+    recent_writers.set(user_id, True)
+
+
+_unsubscribe = None
+
+
+def subscribe_writes() -> None:
+    # Les autres workers apprennent aussi qui vient d'écrire
+    global _unsubscribe
+    if _unsubscribe is None:
+        _unsubscribe = get_broker().subscribe(WRITES_CHANNEL, _remember_writer)
+
+
+# 🔹 Read-your-writes : une écriture validée rend l'utilisateur "collant" au primaire
+@event.listens_for(Session, "after_flush")
+def _flag_flush(session: Session, flush_context) -> None:
+    session.info["wrote"] = True
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _flag_dml(orm_execute_state) -> None:
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info["wrote"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_writer(session: Session) -> None:
+    user_id = session.info.get("user_id")
+    if session.info.pop("wrote", False) and user_id is not None and settings.DATABASE_REPLICA_URLS:
+        _remember_writer(user_id)
+        get_broker().publish(WRITES_CHANNEL, user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_write(session: Session) -> None:
+    session.info.pop("wrote", None)
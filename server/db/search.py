@@ -0,0 +1,200 @@
+import re
+from typing import List, Union
+
+from sqlalchemy import Float, Integer, func, literal_column, select, text, union_all
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Select, Subquery
+from sqlalchemy.sql.selectable import TextualSelect
+
+from models.attachment_text import AttachmentText
+from models.file import File as FileModel
+from models.nce import NCE
+
+
+# Index plein texte des NCE :
+#   - SQLite  : table virtuelle FTS5 "nces_fts" (external content) synchronisée par triggers
+#   - Postgres: index GIN sur l'expression tsvector ci-dessous
+NCE_FTS_TABLE = "nces_fts"
+NCE_TSVECTOR = "to_tsvector('simple', coalesce(nces.title, '') || ' ' || coalesce(nces.description, ''))"
+
+_SQLITE_DDL = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {NCE_FTS_TABLE} USING fts5(
+        title, description,
+        content='nces', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS nces_fts_ai AFTER INSERT ON nces BEGIN
+        INSERT INTO {NCE_FTS_TABLE}(rowid, title, description) VALUES (new.id, new.title, new.description);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS nces_fts_ad AFTER DELETE ON nces BEGIN
+        INSERT INTO {NCE_FTS_TABLE}({NCE_FTS_TABLE}, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS nces_fts_au AFTER UPDATE OF title, description ON nces BEGIN
+        INSERT INTO {NCE_FTS_TABLE}({NCE_FTS_TABLE}, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO {NCE_FTS_TABLE}(rowid, title, description) VALUES (new.id, new.title, new.description);
+    END
+    """,
+]
+
+# Texte extrait des pièces jointes (services/attachment_index.py), même principe
+ATTACHMENT_FTS_TABLE = "attachment_texts_fts"
+ATTACHMENT_TSVECTOR = "to_tsvector('simple', coalesce(attachment_texts.content, ''))"
+# Une correspondance dans une pièce jointe pèse moins qu'une correspondance dans la NCE
+ATTACHMENT_RANK_WEIGHT = 0.5
+
+_SQLITE_ATTACHMENT_DDL = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {ATTACHMENT_FTS_TABLE} USING fts5(
+        content,
+        content='attachment_texts', content_rowid='file_id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS attachment_texts_fts_ai AFTER INSERT ON attachment_texts BEGIN
+        INSERT INTO {ATTACHMENT_FTS_TABLE}(rowid, content) VALUES (new.file_id, new.content);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS attachment_texts_fts_ad AFTER DELETE ON attachment_texts BEGIN
+        INSERT INTO {ATTACHMENT_FTS_TABLE}({ATTACHMENT_FTS_TABLE}, rowid, content)
+        VALUES ('delete', old.file_id, old.content);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS attachment_texts_fts_au AFTER UPDATE OF content ON attachment_texts BEGIN
+        INSERT INTO {ATTACHMENT_FTS_TABLE}({ATTACHMENT_FTS_TABLE}, rowid, content)
+        VALUES ('delete', old.file_id, old.content);
+        INSERT INTO {ATTACHMENT_FTS_TABLE}(rowid, content) VALUES (new.file_id, new.content);
+    END
+    """,
+]
+
+_POSTGRES_DDL = [
+    f"CREATE INDEX IF NOT EXISTS ix_nces_search ON nces USING GIN ({NCE_TSVECTOR})",
+    f"CREATE INDEX IF NOT EXISTS ix_attachment_texts_search ON attachment_texts USING GIN ({ATTACHMENT_TSVECTOR})",
+]
+
+
+def init_search_index(bind: Engine) -> None:
+    """
+    Crée les index plein texte (NCE, pièces jointes) s'ils n'existent pas encore
+    (et les remplit à la création).
+    """
+    dialect = bind.dialect.name
+    with bind.begin() as conn:
+        if dialect == "sqlite":
+            for table, statements in ((NCE_FTS_TABLE, _SQLITE_DDL), (ATTACHMENT_FTS_TABLE, _SQLITE_ATTACHMENT_DDL)):
+                exists = conn.execute(
+                    text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                    {"name": table},
+                ).first()
+                for statement in statements:
+                    conn.exec_driver_sql(statement)
+                if not exists:
+                    conn.exec_driver_sql(f"INSERT INTO {table}({table}) VALUES ('rebuild')")
+        elif dialect == "postgresql":
+            for statement in _POSTGRES_DDL:
+                conn.exec_driver_sql(statement)
+
+
+def search_terms(search: str) -> List[str]:
+    return re.findall(r"\w+", search.lower())
+
+
+def _nce_matches(db: Session, search: str, terms: List[str]) -> Union[Select, TextualSelect]:
+    dialect = db.get_bind().dialect.name
+
+    if dialect == "sqlite" and terms:
+        match = " ".join(f'"{term}"*' for term in terms)
+        return (
+            text(
+                f"SELECT rowid AS nce_id, bm25({NCE_FTS_TABLE}) AS rank "
+                f"FROM {NCE_FTS_TABLE} WHERE {NCE_FTS_TABLE} MATCH :match"
+            )
+            .bindparams(match=match)
+            .columns(nce_id=Integer, rank=Float)
+        )
+
+    if dialect == "postgresql" and terms:
+        vector = literal_column(NCE_TSVECTOR)
+        tsquery = func.to_tsquery("simple", " & ".join(f"{term}:*" for term in terms))
+        return select(NCE.id.label("nce_id"), (-func.ts_rank(vector, tsquery)).label("rank")).where(
+            vector.op("@@")(tsquery)
+        )
+
+    # Autres moteurs, ou recherche sans mot indexable ("-", "%") : on retombe sur un ILIKE
+    pattern = f"%{search}%"
+    return select(NCE.id.label("nce_id"), literal_column("0.0").label("rank")).where(
+        NCE.title.ilike(pattern) | NCE.description.ilike(pattern)
+    )
+
+
+def _attachment_matches(db: Session, search: str, terms: List[str], owner: str) -> Union[Select, TextualSelect]:
+    """(owner_id, rank) des NCE (owner="nce_id") ou livraisons (owner="delivery_id") via leurs fichiers."""
+    owner_column = getattr(FileModel, owner)
+    dialect = db.get_bind().dialect.name
+
+    if dialect == "sqlite" and terms:
+        match = " ".join(f'"{term}"*' for term in terms)
+        return (
+            text(
+                f"SELECT files.{owner} AS owner_id, bm25({ATTACHMENT_FTS_TABLE}) * {ATTACHMENT_RANK_WEIGHT} AS rank "
+                f"FROM {ATTACHMENT_FTS_TABLE} JOIN files ON files.id = {ATTACHMENT_FTS_TABLE}.rowid "
+                f"WHERE {ATTACHMENT_FTS_TABLE} MATCH :match AND files.{owner} IS NOT NULL"
+            )
+            .bindparams(match=match)
+            .columns(owner_id=Integer, rank=Float)
+        )
+
+    base = select(owner_column.label("owner_id")).join(AttachmentText, AttachmentText.file_id == FileModel.id)
+    if dialect == "postgresql" and terms:
+        vector = literal_column(ATTACHMENT_TSVECTOR)
+        tsquery = func.to_tsquery("simple", " & ".join(f"{term}:*" for term in terms))
+        return base.add_columns((-func.ts_rank(vector, tsquery) * ATTACHMENT_RANK_WEIGHT).label("rank")).where(
+            vector.op("@@")(tsquery), owner_column.isnot(None)
+        )
+
+    return base.add_columns(literal_column("0.0").label("rank")).where(
+        AttachmentText.content.ilike(f"%{search}%"), owner_column.isnot(None)
+    )
+
+
+def nce_search_subquery(db: Session, search: str, include_attachments: bool = False) -> Subquery:
+    """
+    Retourne une sous-requête (nce_id, rank) des NCE correspondant à `search`.
+    Plus le rank est petit, plus le résultat est pertinent. Chaque terme est
+    recherché en préfixe pour la recherche au fil de la frappe ; sans aucun
+    mot (ponctuation seule), la recherche devient un ILIKE sur le texte brut. Avec
+    `include_attachments`, le texte extrait des pièces jointes est aussi interrogé.
+    """
+    terms = search_terms(search)
+    matches = _nce_matches(db, search, terms)
+    if not include_attachments:
+        return matches.subquery("nce_search")
+
+    combined = union_all(matches, _attachment_matches(db, search, terms, "nce_id")).subquery("nce_matches")
+    return (
+        select(combined.c.nce_id, func.min(combined.c.rank).label("rank"))
+        .group_by(combined.c.nce_id)
+        .subquery("nce_search")
+    )
+
+
+def attachment_search_subquery(db: Session, search: str, owner: str) -> Subquery:
+    """
+    Retourne une sous-requête (owner_id, rank) des NCE ou livraisons dont une
+    pièce jointe contient `search`, via l'index — aucun fichier n'est relu.
+    """
+    terms = search_terms(search)
+    return _attachment_matches(db, search, terms, owner).subquery("attachment_search")
@@ -1,13 +1,41 @@
+import random
+from typing import AsyncIterator, Callable, List, Optional, TypeVar, Union
+
+from fastapi import Depends
 from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from starlette.concurrency import run_in_threadpool
+
 from core.config import settings
+from core.instrumentation import instrument_engine
+from core.security import get_current_user_id
+from db.routing import RoutingSession, is_sticky
+from db.sqlite import QueuedConnection, configure_sqlite
+
+IS_SQLITE = settings.DATABASE_URL.startswith("sqlite")
+
+
+def _create_engine(url: str, primary: bool) -> Engine:
+    connect_args = {}
+    serialize_writes = primary and settings.SQLITE_SERIALIZE_WRITES
+    if url.startswith("sqlite"):
+        connect_args["check_same_thread"] = False
+        if serialize_writes:
+            connect_args["factory"] = QueuedConnection
+    created = create_engine(url, connect_args=connect_args)
+    instrument_engine(created)
+    if url.startswith("sqlite"):
+        # 🔹 Profil de production SQLite (WAL, pragmas) + file d'écriture unique sur le primaire
+        configure_sqlite(created, serialize_writes=serialize_writes)
+    return created
 
-engine = create_engine(
-    settings.DATABASE_URL,
-    connect_args={"check_same_thread": False} if settings.DATABASE_URL.startswith("sqlite") else {}
-)
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+engine = _create_engine(settings.DATABASE_URL, primary=True)
+replica_engines: List[Engine] = [_create_engine(url, primary=False) for url in settings.DATABASE_REPLICA_URLS]
+
+SessionLocal = sessionmaker(class_=RoutingSession, autocommit=False, autoflush=False, bind=engine)
 
 def get_db():
     db = SessionLocal()
@@ -15,3 +43,107 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+def _pick_replica(replicas: list, user_id: Optional[int]):
+    # Pas de réplica, ou utilisateur qui vient d'écrire : primaire (read-your-writes)
+    if not replicas or is_sticky(user_id):
+        return None
+    return random.choice(replicas)
+
+
+def get_read_db(user_id: int = Depends(get_current_user_id)):
+    """
+    Comme get_db, pour les endpoints en lecture seule : les SELECT partent sur
+    un réplica (DATABASE_REPLICA_URLS), sauf juste après une écriture de l'utilisateur.
+    """
+    db = SessionLocal()
+    db.info["replica"] = _pick_replica(replica_engines, user_id)
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+# 🔹 Moteur asynchrone optionnel (aiosqlite / asyncpg) pour les endpoints de lecture
+ASYNC_DRIVERS = {"sqlite": "sqlite+aiosqlite", "postgresql": "postgresql+asyncpg"}
+
+
+def async_database_url(url: str) -> str:
+    """`url` avec le driver async correspondant (sqlite -> aiosqlite, postgresql -> asyncpg)."""
+    scheme, _, rest = url.partition("://")
+    backend = scheme.split("+")[0]
+    if backend not in ASYNC_DRIVERS:
+        raise RuntimeError(f"No async driver known for '{scheme}', set ASYNC_DATABASE_URL")
+    return f"{ASYNC_DRIVERS[backend]}://{rest}"
+
+
+def _create_async_engine(url: str) -> AsyncEngine:
+    created = create_async_engine(url)
+    instrument_engine(created.sync_engine)
+    if url.startswith("sqlite"):
+        # Lectures seulement : mêmes pragmas, sans la file d'écriture (qui bloquerait la boucle)
+        configure_sqlite(created.sync_engine)
+    return created
+
+
+async_engine = None
+async_replica_engines: List[AsyncEngine] = []
+AsyncSessionLocal = None
+if settings.ASYNC_DATABASE:
+    async_engine = _create_async_engine(settings.ASYNC_DATABASE_URL or async_database_url(settings.DATABASE_URL))
+    async_replica_engines = [_create_async_engine(async_database_url(url)) for url in settings.DATABASE_REPLICA_URLS]
+    AsyncSessionLocal = async_sessionmaker(
+        async_engine, sync_session_class=RoutingSession, autoflush=False, expire_on_commit=False
+    )
+
+
+T = TypeVar("T")
+
+
+class ThreadpoolSession:
+    """
+    Mode sans moteur async : même interface `run_sync` qu'AsyncSession, exécutée
+    dans le threadpool. Chaque appel a sa propre Session, fermée avant de rendre
+    le thread : une connexion n'est jamais gardée en attendant un thread libre.
+    """
+
+    def __init__(self, replica: Optional[Engine] = None):
+        self.replica = replica
+
+    async def run_sync(self, fn: Callable[..., T], *args, **kwargs) -> T:
+        return await run_in_threadpool(self._call, fn, *args, **kwargs)
+
+    def _call(self, fn: Callable[..., T], *args, **kwargs) -> T:
+        with SessionLocal() as db:
+            db.info["replica"] = self.replica
+            return fn(db, *args, **kwargs)
+
+
+AsyncDB = Union[AsyncSession, ThreadpoolSession]
+
+
+async def get_async_db() -> AsyncIterator[AsyncDB]:
+    """
+    Variante async de get_db. Les endpoints passent leur code ORM à
+    `await db.run_sync(fn)` : avec ASYNC_DATABASE, les attentes réseau se font
+    sur la boucle d'événements (aucun thread bloqué) ; sinon dans le threadpool.
+    """
+    if AsyncSessionLocal is None:
+        yield ThreadpoolSession()
+        return
+
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async def get_async_read_db(user_id: int = Depends(get_current_user_id)) -> AsyncIterator[AsyncDB]:
+    """get_async_db routée comme get_read_db (réplica sauf read-your-writes)."""
+    if AsyncSessionLocal is None:
+        yield ThreadpoolSession(_pick_replica(replica_engines, user_id))
+        return
+
+    async with AsyncSessionLocal() as db:
+        replica = _pick_replica(async_replica_engines, user_id)
+        db.sync_session.info["replica"] = replica.sync_engine if replica is not None else None
+        yield db
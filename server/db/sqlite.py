@@ -0,0 +1,162 @@
+import asyncio
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from core.config import settings
+
+WRITE_PREFIXES = ("INSERT", "UPDATE", "DELETE", "REPLACE", "CREATE", "DROP", "ALTER")
+
+
+def sqlite_pragmas() -> List[str]:
+    """
+    Profil appliqué à chaque connexion : WAL (les lecteurs ne bloquent plus
+    l'écrivain), fsync au checkpoint seulement, cache / mmap plus larges et
+    attente du verrou au lieu d'un "database is locked" immédiat.
+    """
+    return [
+        f"journal_mode={settings.SQLITE_JOURNAL_MODE}",
+        f"synchronous={settings.SQLITE_SYNCHRONOUS}",
+        f"busy_timeout={settings.SQLITE_BUSY_TIMEOUT}",
+        f"cache_size={settings.SQLITE_CACHE_SIZE}",
+        f"mmap_size={settings.SQLITE_MMAP_SIZE}",
+        "temp_store=memory",
+    ]
+
+
+class WriterQueue:
+    """
+    Un seul écrivain SQLite à la fois dans le processus : les transactions
+    d'écriture attendent leur tour ici plutôt que dans le busy handler de SQLite.
+    Réentrant pour le thread propriétaire (plusieurs connexions du même thread).
+    """
+
+    def __init__(self, timeout: float):
+        self.timeout = timeout
+        self._cond = threading.Condition()
+        self._owner: Optional[int] = None
+        self._holders = 0
+        self._stats = {"acquired": 0, "waited": 0, "timeouts": 0, "bypassed": 0, "wait_time": 0.0, "max_wait": 0.0}
+
+    def acquire(self) -> bool:
+        me = threading.get_ident()
+        with self._cond:
+            if self._owner == me:
+                self._holders += 1
+                return True
+            started = time.perf_counter()
+            waited = self._owner is not None
+            if not self._cond.wait_for(lambda: self._owner is None, self.timeout):
+                # Le busy_timeout de SQLite prend le relais
+                self._stats["timeouts"] += 1
+                return False
+            self._owner, self._holders = me, 1
+            self._stats["acquired"] += 1
+            if waited:
+                elapsed = time.perf_counter() - started
+                self._stats["waited"] += 1
+                self._stats["wait_time"] += elapsed
+                self._stats["max_wait"] = max(self._stats["max_wait"], elapsed)
+            return True
+
+    def release(self) -> None:
+        with self._cond:
+            self._holders -= 1
+            if self._holders <= 0:
+                self._owner, self._holders = None, 0
+                self._cond.notify()
+
+    def bypass(self) -> None:
+        with self._cond:
+            self._stats["bypassed"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {**self._stats, "busy": self._owner is not None}
+
+
+writer_queue = WriterQueue(timeout=settings.SQLITE_BUSY_TIMEOUT / 1000)
+
+
+class QueuedConnection(sqlite3.Connection):
+    """
+    Connexion pysqlite qui rend sa place dans la file d'écriture une fois la
+    transaction réellement terminée (après commit / rollback, pas avant).
+    """
+
+    holds_writer = False
+
+    def commit(self):
+        try:
+            super().commit()
+        finally:
+            self._release_writer()
+
+    def rollback(self):
+        try:
+            super().rollback()
+        finally:
+            self._release_writer()
+
+    def close(self):
+        try:
+            super().close()
+        finally:
+            self._release_writer()
+
+    def _release_writer(self) -> None:
+        if self.holds_writer:
+            self.holds_writer = False
+            writer_queue.release()
+
+
+def _on_event_loop() -> bool:
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+def configure_sqlite(engine: Engine, serialize_writes: bool = False) -> None:
+    """
+    Applique sqlite_pragmas() à chaque nouvelle connexion de `engine` et, si
+    `serialize_writes`, fait passer ses transactions d'écriture par writer_queue
+    (l'engine doit alors être créé avec connect_args={"factory": QueuedConnection}).
+    """
+
+    @event.listens_for(engine, "connect")
+    def _apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma in sqlite_pragmas():
+            cursor.execute(f"PRAGMA {pragma}")
+        cursor.close()
+
+    if not serialize_writes:
+        return
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _wait_for_writer(conn, cursor, statement, parameters, context, executemany):
+        dbapi_connection = conn.connection.dbapi_connection
+        if not isinstance(dbapi_connection, QueuedConnection) or dbapi_connection.holds_writer:
+            return
+        if not statement.lstrip().upper().startswith(WRITE_PREFIXES):
+            return
+        if _on_event_loop():
+            # Jamais d'attente bloquante sur la boucle d'événements
+            writer_queue.bypass()
+            return
+        dbapi_connection.holds_writer = writer_queue.acquire()
+
+
+def sqlite_stats(engine: Engine) -> Dict[str, Any]:
+    with engine.connect() as conn:
+        pragmas = {
+            name: conn.exec_driver_sql(f"PRAGMA {name}").scalar()
+            for name in ("journal_mode", "synchronous", "busy_timeout", "cache_size", "mmap_size")
+        }
+    return {"pragmas": pragmas, "writer_queue": writer_queue.stats()}
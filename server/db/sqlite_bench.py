@@ -0,0 +1,132 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from typing import Dict, List
+
+from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from db.loaders import NCE_LIST
+from db.sqlite import QueuedConnection, configure_sqlite
+from models.nce import NCE
+from models.notification import Notification
+from models.user import User
+
+
+def _copy_database(source: str, target: str) -> None:
+    # API de backup : copie cohérente même si la source est en WAL
+    with sqlite3.connect(source) as src, sqlite3.connect(target) as dst:
+        src.backup(dst)
+    src.close()
+    dst.close()
+
+
+def _default_engine(path: str) -> Engine:
+    with sqlite3.connect(path) as conn:
+        conn.execute("PRAGMA journal_mode=delete")
+    conn.close()
+    return create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+
+
+def _tuned_engine(path: str) -> Engine:
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False, "factory": QueuedConnection})
+    configure_sqlite(engine, serialize_writes=True)
+    return engine
+
+
+def _read(engine: Engine) -> None:
+    # Première page de la liste des NCE, mêmes options de chargement que l'API
+    with Session(engine) as db:
+        db.query(NCE).options(*NCE_LIST).order_by(NCE.created_at.desc(), NCE.id.desc()).limit(20).all()
+
+
+def _write(engine: Engine, user_id: int) -> None:
+    # Petite transaction d'écriture (hooks after_flush compris : compteurs, versions...)
+    with Session(engine) as db:
+        db.add(Notification(user_id=user_id, title="bench", message="bench", type="bench"))
+        db.commit()
+
+
+def _run_phase(
+    engine: Engine, user_id: int, readers: int, writers: int, seconds: float, write_rate: float
+) -> Dict[str, float]:
+    stop = threading.Event()
+    counts = {"reads": 0, "writes": 0, "write_errors": 0}
+    lock = threading.Lock()
+
+    def reader():
+        done = 0
+        while not stop.is_set():
+            _read(engine)
+            done += 1
+        with lock:
+            counts["reads"] += done
+
+    # Écritures cadencées (même charge CPU pour les deux profils) : seul l'effet des verrous est mesuré
+    interval = writers / write_rate if write_rate else 0
+
+    def writer():
+        done = errors = 0
+        next_at = time.perf_counter()
+        while not stop.is_set():
+            try:
+                _write(engine, user_id)
+                done += 1
+            except OperationalError:  # "database is locked"
+                errors += 1
+            next_at += interval
+            stop.wait(max(0.0, next_at - time.perf_counter()))
+        with lock:
+            counts["writes"] += done
+            counts["write_errors"] += errors
+
+    threads: List[threading.Thread] = [threading.Thread(target=reader) for _ in range(readers)]
+    threads += [threading.Thread(target=writer) for _ in range(writers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return {
+        "reads_per_s": counts["reads"] / seconds,
+        "writes_per_s": counts["writes"] / seconds,
+        "write_errors": counts["write_errors"],
+    }
+
+
+def benchmark_sqlite(
+    source: str, readers: int = 4, writers: int = 4, seconds: float = 5, write_rate: float = 50
+) -> Dict[str, dict]:
+    """
+    Débit de lecture seul puis sous charge d'écriture (`write_rate` transactions/s
+    au total, 0 : sans limite), sur deux copies de la base : réglages SQLite par
+    défaut et profil de production (db/sqlite.py).
+    """
+    results: Dict[str, dict] = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        for profile, make_engine in (("default", _default_engine), ("tuned", _tuned_engine)):
+            path = os.path.join(workdir, f"{profile}.db")
+            _copy_database(source, path)
+            engine = make_engine(path)
+            try:
+                with Session(engine) as db:
+                    user_id = db.query(User.id).order_by(User.id).limit(1).scalar()
+                if user_id is None:
+                    raise RuntimeError("The database has no user to attach benchmark notifications to")
+                idle = _run_phase(engine, user_id, readers, 0, seconds, write_rate)
+                loaded = _run_phase(engine, user_id, readers, writers, seconds, write_rate)
+            finally:
+                engine.dispose()
+            results[profile] = {
+                "reads_per_s_idle": round(idle["reads_per_s"], 1),
+                "reads_per_s_under_writes": round(loaded["reads_per_s"], 1),
+                "read_ratio": round(loaded["reads_per_s"] / idle["reads_per_s"], 2) if idle["reads_per_s"] else None,
+                "writes_per_s": round(loaded["writes_per_s"], 1),
+                "write_errors": loaded["write_errors"],
+            }
+    return results
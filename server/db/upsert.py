@@ -0,0 +1,37 @@
+from typing import Dict
+
+from sqlalchemy import Table, insert, update
+from sqlalchemy.engine import Connection
+
+
+def increment_row(conn: Connection, table: Table, key: Dict, deltas: Dict[str, int], initial: Dict) -> None:
+    """
+    Ajoute `deltas` aux colonnes de la ligne `key` de `table`, en la créant avec
+    `initial` si elle n'existe pas. Une seule instruction INSERT ... ON CONFLICT
+    DO UPDATE (SQLite, Postgres) : deux premières écritures concurrentes sur la
+    même clé ne se marchent plus dessus (plus d'IntegrityError sur la contrainte).
+    `key` doit correspondre à une contrainte unique (ou à la clé primaire).
+    """
+    dialect = conn.dialect.name
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    elif dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        # Autres moteurs : UPDATE puis INSERT (non atomique)
+        updated = conn.execute(
+            update(table)
+            .where(*(table.c[name] == value for name, value in key.items()))
+            .values({name: table.c[name] + value for name, value in deltas.items()})
+        )
+        if updated.rowcount == 0:
+            conn.execute(insert(table).values(**key, **initial))
+        return
+
+    statement = dialect_insert(table).values(**key, **initial)
+    conn.execute(
+        statement.on_conflict_do_update(
+            index_elements=list(key),
+            set_={name: table.c[name] + value for name, value in deltas.items()},
+        )
+    )
@@ -1,4 +1,185 @@
+import asyncio
+import logging
+import threading
+from contextlib import asynccontextmanager
+from email.message import EmailMessage
+from typing import Coroutine, List, Optional
+
+import aiosmtplib
+
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def build_message(to: str, subject: str, body: str) -> EmailMessage:
+    message = EmailMessage()
+    message["From"] = settings.SMTP_FROM
+    message["To"] = to
+    message["Subject"] = subject
+    message.set_content(body)
+    return message
+
+
+class SMTPConnectionPool:
+    """
+    Connexions SMTP réutilisées d'un envoi à l'autre (au plus `size` simultanées) :
+    pas de poignée de main TCP / TLS / AUTH par message.
+    """
+
+    def __init__(self, hostname: str, port: int, username: str, password: str, size: int, timeout: float):
+        self.hostname = hostname
+        self.port = port
+        self.username = username
+        self.password = password
+        self.timeout = timeout
+        self.size = size
+        self._idle: List[aiosmtplib.SMTP] = []
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    async def _connect(self) -> aiosmtplib.SMTP:
+        smtp = aiosmtplib.SMTP(
+            hostname=self.hostname,
+            port=self.port,
+            timeout=self.timeout,
+            # 465 : TLS implicite ; sinon STARTTLS si le serveur le propose
+            use_tls=self.port == 465,
+        )
+        await smtp.connect()
+        if self.username:
+            await smtp.login(self.username, self.password)
+        return smtp
+
+    @asynccontextmanager
+    async def connection(self):
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.size)
+        async with self._slots:
+            smtp = self._idle.pop() if self._idle else None
+            if smtp is None or not smtp.is_connected:
+                smtp = await self._connect()
+            try:
+                yield smtp
+            except BaseException:
+                # Connexion dans un état inconnu : on ne la remet pas dans le pool
+                smtp.close()
+                raise
+            self._idle.append(smtp)
+
+    async def close(self) -> None:
+        while self._idle:
+            smtp = self._idle.pop()
+            try:
+                await smtp.quit()
+            except aiosmtplib.SMTPException:
+                smtp.close()
+
+
+class EmailService:
+    """
+    Envoi asynchrone par lots : messages envoyés en parallèle sur le pool de
+    connexions, erreurs transitoires réessayées avec backoff exponentiel.
+    """
+
+    def __init__(self, pool: Optional[SMTPConnectionPool], retries: int, backoff: float):
+        self.pool = pool
+        self.retries = retries
+        self.backoff = backoff
+
+    async def _send(self, message: EmailMessage) -> bool:
+        if self.pool is None:
+            # SMTP non configuré (développement) : le message est seulement journalisé
+            logger.info("Email to %s: %s\n%s", message["To"], message["Subject"], message.get_content())
+            return True
+
+        for attempt in range(self.retries):
+            try:
+                async with self.pool.connection() as smtp:
+                    await smtp.send_message(message)
+                return True
+            except aiosmtplib.SMTPRecipientsRefused as exc:
+                # Refus définitif (adresse inconnue...) : inutile de réessayer
+                logger.warning("Email to %s refused: %s", message["To"], exc)
+                return True
+            except aiosmtplib.SMTPResponseException as exc:
+                if exc.code >= 500:
+                    logger.warning("Email to %s rejected: %s", message["To"], exc)
+                    return True
+                error = exc
+            except (aiosmtplib.SMTPException, OSError) as exc:
+                error = exc
+            if attempt + 1 < self.retries:
+                await asyncio.sleep(self.backoff * 2 ** attempt)
+
+        logger.warning("Email to %s not sent after %s attempts: %s", message["To"], self.retries, error)
+        return False
+
+    async def send_batch(self, messages: List[EmailMessage]) -> List[int]:
+        """Envoie un lot ; retourne les index des messages non envoyés (erreur transitoire)."""
+        results = await asyncio.gather(*(self._send(message) for message in messages))
+        return [index for index, sent in enumerate(results) if not sent]
+
+
+class _EmailLoop:
+    """
+    Boucle asyncio dédiée (thread de fond) : les connexions du pool lui sont
+    liées et survivent d'un lot à l'autre, quel que soit le thread appelant.
+    """
+
+    def __init__(self):
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+
+    def _get_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, name="email-loop", daemon=True).start()
+            return self._loop
+
+    def submit(self, coro: Coroutine):
+        return asyncio.run_coroutine_threadsafe(coro, self._get_loop())
+
+    def run(self, coro: Coroutine, timeout: Optional[float] = None):
+        return self.submit(coro).result(timeout)
+
+
+email_loop = _EmailLoop()
+_service: Optional[EmailService] = None
+
+
+def get_email_service() -> EmailService:
+    global _service
+    if _service is None:
+        pool = None
+        if settings.SMTP_HOST:
+            pool = SMTPConnectionPool(
+                hostname=settings.SMTP_HOST,
+                port=settings.SMTP_PORT,
+                username=settings.SMTP_USER,
+                password=settings.SMTP_PASSWORD,
+                size=settings.SMTP_POOL_SIZE,
+                timeout=settings.SMTP_TIMEOUT,
+            )
+        _service = EmailService(pool, retries=settings.SMTP_RETRIES, backoff=settings.SMTP_RETRY_BACKOFF)
+    return _service
+
+
+def set_email_service(service: EmailService) -> None:
+    """Remplace le service (autre serveur SMTP, sink local pour les tests)."""
+    global _service
+    _service = service
+
+
+def send_batch(messages: List[EmailMessage]) -> List[int]:
+    """Version synchrone de EmailService.send_batch (workers de la file de tâches)."""
+    if not messages:
+        return []
+    return email_loop.run(get_email_service().send_batch(messages))
+
+
 def send_magic_link_email(email: str, token: str):
     magic_link = f"http://localhost:3000/magic-login?token={token}"
-    print(f"Send email to {email} with link: {magic_link}")
-    # Ici tu enverrais l'email via SMTP ou service type SendGrid/Mailgun
+    message = build_message(email, "Your QualityTracker login link", f"Sign in with this link: {magic_link}")
+    # Sans attendre l'envoi : la requête n'est pas bloquée par le serveur SMTP
+    email_loop.submit(get_email_service().send_batch([message]))
@@ -1,24 +1,31 @@
 import models
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.concurrency import run_in_threadpool
 from core.config import settings
-from db.base import Base
 from db.session import engine
-from api.v1 import auth, user, nce, notification, delivery, project, survey, core, file
+from db.migrations import require_schema
+from core.instrumentation import SQLInstrumentationMiddleware
+from core.user_cache import subscribe_invalidations
+from db.routing import subscribe_writes
+from core.jobs import start_job_workers, stop_job_workers
+from services.notification_stream import start_notification_hub
+from services.uploads import CHUNK_SIZE, RequestSizeLimitMiddleware
+from services import attachment_index  # noqa: F401  (hooks d'indexation du texte des pièces jointes)
+from api.v1 import auth, user, nce, notification, delivery, project, survey, core, file, admin
 
 
-
-Base.metadata.create_all(bind=engine)
-
-app = FastAPI(title=settings.PROJECT_NAME, version=settings.VERSION)
-
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["http://localhost:3000", "http://localhost:3001"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # 🔹 Aucun DDL au démarrage : schéma, index plein texte et rollups via `python manage.py migrate`
+    await run_in_threadpool(require_schema, engine)
+    subscribe_invalidations()
+    subscribe_writes()
+    start_notification_hub()
+    start_job_workers()
+    yield
+    stop_job_workers()
 
 
 def include_routers_with_prefix(app: FastAPI, routers: list, prefix: str = "/api"):
@@ -34,17 +41,44 @@ routers = [
     project.router,
     survey.router,
     core.router,
-    file.router
+    file.router,
+    admin.router
 ]
 
-include_routers_with_prefix(app, routers)
 
-
-@app.get("/")
 def read_root():
     return {"message": "QualityTracker API", "version": "1.0.0", "documentation:": "/docs"}
 
 
+def create_app() -> FastAPI:
+    """
+    Construit l'application (middlewares, routes) sans toucher à la base ;
+    l'initialisation du processus se fait dans `lifespan`, au démarrage du serveur.
+    """
+    app = FastAPI(title=settings.PROJECT_NAME, version=settings.VERSION, lifespan=lifespan)
+
+    app.add_middleware(SQLInstrumentationMiddleware, engine=engine)
+    # Marge d'un bloc pour les en-têtes multipart ; la limite exacte est vérifiée fichier par fichier
+    app.add_middleware(RequestSizeLimitMiddleware, max_bytes=settings.MAX_UPLOAD_REQUEST_BYTES + CHUNK_SIZE)
+
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["http://localhost:3000", "http://localhost:3001"],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+        # Pagination par curseur (notifications, activités) lue par les front-ends
+        expose_headers=["X-Next-Cursor"],
+    )
+
+    include_routers_with_prefix(app, routers)
+    app.get("/")(read_root)
+    return app
+
+
+app = create_app()
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="localhost", port=8000)
@@ -0,0 +1,181 @@
+import argparse
+import time
+
+import models
+from db.migrations import current_revision, head_revision, upgrade_database
+from db.session import SessionLocal, engine
+from db.search import init_search_index
+from db.sqlite_bench import benchmark_sqlite
+from core.startup_bench import benchmark_startup
+from services.rollups import ensure_rollups, rebuild_rollups
+from services.activity import ensure_activity_events
+from services.notification_counts import ensure_notification_counters, rebuild_notification_counters
+from services.blobs import migrate_legacy_files, push_local_blobs
+from services.attachment_index import reindex_attachments
+from services import notifications  # noqa: F401  (handlers de la file de tâches)
+from core.config import settings
+from core.jobs import start_job_workers, stop_job_workers
+
+
+def rebuild_rollups_command(args):
+    db = SessionLocal()
+    try:
+        rows = rebuild_rollups(db)
+    finally:
+        db.close()
+    print(f"dashboard_rollups rebuilt: {rows} rows")
+
+
+def rebuild_notification_counters_command(args):
+    db = SessionLocal()
+    try:
+        rows = rebuild_notification_counters(db)
+    finally:
+        db.close()
+    print(f"notification_counters rebuilt: {rows} rows")
+
+
+def migrate_blobs_command(args):
+    db = SessionLocal()
+    try:
+        migrated = migrate_legacy_files(db)
+    finally:
+        db.close()
+    print(f"files moved to the blob store: {migrated}")
+
+
+def push_blobs_command(args):
+    db = SessionLocal()
+    try:
+        pushed = push_local_blobs(db)
+    finally:
+        db.close()
+    print(f"blobs uploaded to the storage backend: {pushed}")
+
+
+def reindex_attachments_command(args):
+    db = SessionLocal()
+    try:
+        indexed = reindex_attachments(db, full=args.full)
+    finally:
+        db.close()
+    print(f"attachments indexed: {indexed}")
+
+
+def run_jobs_command(args):
+    # Worker dédié (API lancée avec JOB_WORKERS=0)
+    start_job_workers(args.workers or settings.JOB_WORKERS or 1)
+    print("job workers running, Ctrl+C to stop")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        stop_job_workers()
+
+
+def bench_sqlite_command(args):
+    if not settings.DATABASE_URL.startswith("sqlite:///"):
+        raise SystemExit("bench-sqlite needs a SQLite DATABASE_URL")
+    source = settings.DATABASE_URL[len("sqlite:///"):]
+    results = benchmark_sqlite(
+        source, readers=args.readers, writers=args.writers, seconds=args.seconds, write_rate=args.write_rate
+    )
+    print(f"{'profile':<8} {'reads/s idle':>13} {'reads/s +writes':>16} {'ratio':>6} {'writes/s':>9} {'errors':>7}")
+    for profile, row in results.items():
+        print(
+            f"{profile:<8} {row['reads_per_s_idle']:>13} {row['reads_per_s_under_writes']:>16} "
+            f"{row['read_ratio']:>6} {row['writes_per_s']:>9} {row['write_errors']:>7}"
+        )
+
+
+def migrate_command(args):
+    # Tout le DDL et les constructions initiales, hors démarrage de l'API
+    upgrade_database(engine, args.revision)
+    init_search_index(engine)
+    ensure_rollups(engine)
+    ensure_activity_events(engine)
+    ensure_notification_counters(engine)
+    print(f"schema at revision {current_revision(engine)} (head: {head_revision()})")
+
+
+def check_query_plans_command(args):
+    # Application chargée seulement ici : les autres commandes n'en ont pas besoin
+    from fastapi.testclient import TestClient
+    from db.query_plans import check_list_queries
+    from main import app
+
+    with TestClient(app) as client:
+        failures, skipped = check_list_queries(client, engine)
+    for note in skipped:
+        print(f"skipped  {note}")
+    for failure in failures:
+        print(f"FULL SCAN on {', '.join(failure['tables'])}  {failure['query']}")
+        print(f"  {failure['statement']}")
+        for line in failure["plan"]:
+            print(f"    {line}")
+    if failures:
+        raise SystemExit(f"{len(failures)} list queries fall back to a full table scan")
+    print("every list query uses an index")
+
+
+def check_query_counts_command(args):
+    from fastapi.testclient import TestClient
+    from db.query_counts import check_query_counts
+    from main import app
+
+    with TestClient(app) as client:
+        failures, skipped = check_query_counts(client, engine)
+    for note in skipped:
+        print(f"skipped  {note}")
+    for failure in failures:
+        print(f"TOO MANY QUERIES {failure['queries']} > {failure['max_queries']}  {failure['query']}")
+    if failures:
+        raise SystemExit(f"{len(failures)} requests exceed their SQL query budget")
+    print("every request stays within its SQL query budget")
+
+
+def bench_startup_command(args):
+    results = benchmark_startup(runs=args.runs)
+    print(f"{'phase':<9} {'min s':>7} {'median s':>9} {'max s':>7}")
+    for phase, row in results.items():
+        print(f"{phase:<9} {row['min']:>7} {row['median']:>9} {row['max']:>7}")
+
+
+COMMANDS = {
+    "migrate": (migrate_command, "Apply schema migrations, then create the search index and initial rollups"),
+    "check-query-plans": (check_query_plans_command, "EXPLAIN every list query and fail on full table scans"),
+    "check-query-counts": (check_query_counts_command, "Count SQL queries of list, detail and dashboard requests, fail over budget"),
+    "rebuild-rollups": (rebuild_rollups_command, "Recompute dashboard_rollups from deliveries, NCEs and surveys"),
+    "rebuild-notification-counters": (rebuild_notification_counters_command, "Recompute unread notification counters"),
+    "migrate-blobs": (migrate_blobs_command, "Move files stored under legacy paths into the content-addressed blob store"),
+    "push-blobs": (push_blobs_command, "Upload local blobs to the configured S3 / MinIO storage backend"),
+    "reindex-attachments": (reindex_attachments_command, "Extract and index text from attachments not indexed yet"),
+    "run-jobs": (run_jobs_command, "Run job queue workers (notifications, emails...) in the foreground"),
+    "bench-sqlite": (bench_sqlite_command, "Compare read throughput under write load: default vs tuned SQLite profile"),
+    "bench-startup": (bench_startup_command, "Measure API worker startup time (import, lifespan, launch to ready)"),
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="QualityTracker admin commands")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    for name, (handler, help_text) in COMMANDS.items():
+        subparsers.add_parser(name, help=help_text).set_defaults(handler=handler)
+    subparsers.choices["reindex-attachments"].add_argument(
+        "--full", action="store_true", help="Drop the extracted text and re-index every attachment"
+    )
+    subparsers.choices["run-jobs"].add_argument("--workers", type=int, default=0, help="Number of worker threads")
+    bench = subparsers.choices["bench-sqlite"]
+    bench.add_argument("--readers", type=int, default=4, help="Reader threads")
+    bench.add_argument("--writers", type=int, default=4, help="Writer threads")
+    bench.add_argument("--seconds", type=float, default=5, help="Duration of each phase")
+    bench.add_argument("--write-rate", type=float, default=50, help="Total write transactions per second (0: unthrottled)")
+    subparsers.choices["migrate"].add_argument("revision", nargs="?", default="head", help="Target revision")
+    subparsers.choices["bench-startup"].add_argument("--runs", type=int, default=5, help="Number of fresh processes")
+
+    args = parser.parse_args()
+    args.handler(args)
+
+
+if __name__ == "__main__":
+    main()
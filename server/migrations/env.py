@@ -0,0 +1,61 @@
+from logging.config import fileConfig
+
+from alembic import context
+
+import models  # noqa: F401  (toutes les tables dans Base.metadata)
+from core.config import settings
+from db.base import Base
+
+config = context.config
+
+# Lancé par la CLI alembic : logging de alembic.ini ; depuis l'application, on garde le sien
+if config.config_file_name is not None and "connection" not in config.attributes:
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+
+def include_name(name, type_, parent_names) -> bool:
+    # Tables hors modèles (FTS5 de db/search.py et leurs tables internes) : ignorées par l'autogenerate
+    if type_ == "table":
+        return name in target_metadata.tables
+    return True
+
+
+def _configure(**kwargs) -> None:
+    context.configure(
+        target_metadata=target_metadata,
+        include_name=include_name,
+        # ALTER TABLE limité en SQLite : copie de table pour les changements de colonnes
+        render_as_batch=settings.DATABASE_URL.startswith("sqlite"),
+        **kwargs,
+    )
+
+
+def run_migrations_offline() -> None:
+    _configure(url=settings.DATABASE_URL, literal_binds=True, dialect_opts={"paramstyle": "named"})
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online() -> None:
+    # Connexion fournie par db/migrations.py, sinon l'engine primaire de l'application
+    connection = config.attributes.get("connection")
+    if connection is not None:
+        _configure(connection=connection)
+        with context.begin_transaction():
+            context.run_migrations()
+        return
+
+    from db.session import engine
+
+    with engine.connect() as connection:
+        _configure(connection=connection)
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,332 @@
+"""initial schema
+
+Schéma tel que créé jusqu'ici par Base.metadata.create_all.
+
+Revision ID: 0001
+Revises: 
+Create Date: 2026-10-17 04:30:38.865667
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Bases créées par create_all avant les migrations : seules les tables absentes sont créées
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+
+    if 'activity_events' not in existing:
+        op.create_table('activity_events',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('scope_user_id', sa.Integer(), nullable=True),
+        sa.Column('type', sa.String(), nullable=False),
+        sa.Column('source_id', sa.Integer(), nullable=False),
+        sa.Column('title', sa.String(), nullable=False),
+        sa.Column('color', sa.String(), nullable=False),
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+        )
+        with op.batch_alter_table('activity_events', schema=None) as batch_op:
+            batch_op.create_index(batch_op.f('ix_activity_events_created_at'), ['created_at'], unique=False)
+            batch_op.create_index(batch_op.f('ix_activity_events_id'), ['id'], unique=False)
+            batch_op.create_index('ix_activity_events_scope_created', ['scope_user_id', 'created_at'], unique=False)
+
+    if 'blobs' not in existing:
+        op.create_table('blobs',
+        sa.Column('sha256', sa.String(length=64), nullable=False),
+        sa.Column('size', sa.Integer(), nullable=False),
+        sa.Column('ref_count', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('sha256')
+        )
+
+    if 'dashboard_rollups' not in existing:
+        op.create_table('dashboard_rollups',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('scope', sa.String(), nullable=False),
+        sa.Column('scope_id', sa.Integer(), nullable=False),
+        sa.Column('total_deliveries', sa.Integer(), nullable=False),
+        sa.Column('total_nces', sa.Integer(), nullable=False),
+        sa.Column('open_nces', sa.Integer(), nullable=False),
+        sa.Column('nps_sum', sa.Integer(), nullable=False),
+        sa.Column('nps_count', sa.Integer(), nullable=False),
+        sa.Column('csat_sum', sa.Integer(), nullable=False),
+        sa.Column('csat_count', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('scope', 'scope_id', name='uq_dashboard_rollups_scope')
+        )
+        with op.batch_alter_table('dashboard_rollups', schema=None) as batch_op:
+            batch_op.create_index(batch_op.f('ix_dashboard_rollups_id'), ['id'], unique=False)
+
+    if 'jobs' not in existing:
+        op.create_table('jobs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('kind', sa.String(), nullable=False),
+        sa.Column('payload', sa.JSON(), nullable=False),
+        sa.Column('status', sa.String(), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('max_attempts', sa.Integer(), nullable=False),
+        sa.Column('run_after', sa.DateTime(), nullable=False),
+        sa.Column('locked_until', sa.DateTime(), nullable=True),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+        )
+        with op.batch_alter_table('jobs', schema=None) as batch_op:
+            batch_op.create_index(batch_op.f('ix_jobs_id'), ['id'], unique=False)
+            batch_op.create_index('ix_jobs_status_run_after', ['status', 'run_after'], unique=False)
+
+    if 'table_versions' not in existing:
+        op.create_table('table_versions',
+        sa.Column('table_name', sa.String(), nullable=False),
+        sa.Column('version', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('table_name')
+        )
+
+    if 'users' not in existing:
+        op.create_table('users',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('email', sa.String(), nullable=False),
+        sa.Column('full_name', sa.String(), nullable=True),
+        sa.Column('hashed_password', sa.String(), nullable=True),
+        sa.Column('role', sa.Enum('ADMIN', 'QUALITY', 'PRODUCER', 'CLIENT', name='userrole'), nullable=True),
+        sa.Column('is_active', sa.Boolean(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+        )
+        with op.batch_alter_table('users', schema=None) as batch_op:
+            batch_op.create_index(batch_op.f('ix_users_email'), ['email'], unique=True)
+            batch_op.create_index(batch_op.f('ix_users_id'), ['id'], unique=False)
+
+    if 'email_digest_items' not in existing:
+        op.create_table('email_digest_items',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('subject', sa.String(), nullable=False),
+        sa.Column('body', sa.Text(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+        with op.batch_alter_table('email_digest_items', schema=None) as batch_op:
+            batch_op.create_index(batch_op.f('ix_email_digest_items_id'), ['id'], unique=False)
+            batch_op.create_index(batch_op.f('ix_email_digest_items_user_id'), ['user_id'], unique=False)
+
+    if 'email_preferences' not in existing:
+        op.create_table('email_preferences',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('digest_minutes', sa.Integer(), nullable=False),
+        sa.Column('next_digest_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('user_id')
+        )
+
+    if 'notification_counters' not in existing:
+        op.create_table('notification_counters',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('unread', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('user_id')
+        )
+
+    if 'notifications' not in existing:
+        op.create_table('notifications',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('title', sa.String(), nullable=False),
+        sa.Column('message', sa.Text(), nullable=False),
+        sa.Column('type', sa.String(), nullable=False),
+        sa.Column('is_read', sa.Boolean(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('link', sa.String(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+        with op.batch_alter_table('notifications', schema=None) as batch_op:
+            batch_op.create_index(batch_op.f('ix_notifications_id'), ['id'], unique=False)
+
+    if 'projects' not in existing:
+        op.create_table('projects',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('client_id', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['client_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+        with op.batch_alter_table('projects', schema=None) as batch_op:
+            batch_op.create_index(batch_op.f('ix_projects_id'), ['id'], unique=False)
+            batch_op.create_index(batch_op.f('ix_projects_name'), ['name'], unique=False)
+
+    if 'deliveries' not in existing:
+        op.create_table('deliveries',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('project_id', sa.Integer(), nullable=False),
+        sa.Column('title', sa.String(), nullable=False),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('status', sa.Enum('DRAFT', 'DELIVERED', 'APPROVED', 'REJECTED', name='deliverystatus'), nullable=True),
+        sa.Column('version', sa.Integer(), nullable=True),
+        sa.Column('created_by', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('delivered_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['created_by'], ['users.id'], ),
+        sa.ForeignKeyConstraint(['project_id'], ['projects.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+        with op.batch_alter_table('deliveries', schema=None) as batch_op:
+            batch_op.create_index(batch_op.f('ix_deliveries_created_at'), ['created_at'], unique=False)
+            batch_op.create_index(batch_op.f('ix_deliveries_id'), ['id'], unique=False)
+            batch_op.create_index(batch_op.f('ix_deliveries_status'), ['status'], unique=False)
+            batch_op.create_index(batch_op.f('ix_deliveries_title'), ['title'], unique=False)
+
+    if 'nces' not in existing:
+        op.create_table('nces',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('delivery_id', sa.Integer(), nullable=False),
+        sa.Column('title', sa.String(), nullable=False),
+        sa.Column('description', sa.Text(), nullable=False),
+        sa.Column('severity', sa.Enum('LOW', 'MEDIUM', 'CRITICAL', name='nceseverity'), nullable=True),
+        sa.Column('status', sa.Enum('OPEN', 'IN_PROGRESS', 'RESOLVED', name='ncestatus'), nullable=True),
+        sa.Column('category', sa.Text(), nullable=True),
+        sa.Column('created_by', sa.Integer(), nullable=False),
+        sa.Column('assigned_to', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('resolved_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['assigned_to'], ['users.id'], ),
+        sa.ForeignKeyConstraint(['created_by'], ['users.id'], ),
+        sa.ForeignKeyConstraint(['delivery_id'], ['deliveries.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+        with op.batch_alter_table('nces', schema=None) as batch_op:
+            batch_op.create_index(batch_op.f('ix_nces_created_at'), ['created_at'], unique=False)
+            batch_op.create_index(batch_op.f('ix_nces_id'), ['id'], unique=False)
+            batch_op.create_index(batch_op.f('ix_nces_severity'), ['severity'], unique=False)
+            batch_op.create_index(batch_op.f('ix_nces_status'), ['status'], unique=False)
+            batch_op.create_index(batch_op.f('ix_nces_title'), ['title'], unique=False)
+
+    if 'surveys' not in existing:
+        op.create_table('surveys',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('delivery_id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('survey_type', sa.Enum('NPS', 'CSAT', name='surveytype'), nullable=False),
+        sa.Column('score', sa.Integer(), nullable=True),
+        sa.Column('comment', sa.Text(), nullable=True),
+        sa.Column('sent_at', sa.DateTime(), nullable=True),
+        sa.Column('completed_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['delivery_id'], ['deliveries.id'], ),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+        with op.batch_alter_table('surveys', schema=None) as batch_op:
+            batch_op.create_index(batch_op.f('ix_surveys_id'), ['id'], unique=False)
+
+    if 'files' not in existing:
+        op.create_table('files',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('filename', sa.String(), nullable=False),
+        sa.Column('storage_key', sa.String(), nullable=False),
+        sa.Column('delivery_id', sa.Integer(), nullable=True),
+        sa.Column('nce_id', sa.Integer(), nullable=True),
+        sa.Column('uploaded_at', sa.DateTime(), nullable=True),
+        sa.Column('is_receipt', sa.Boolean(), nullable=True),
+        sa.ForeignKeyConstraint(['delivery_id'], ['deliveries.id'], ),
+        sa.ForeignKeyConstraint(['nce_id'], ['nces.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+        with op.batch_alter_table('files', schema=None) as batch_op:
+            batch_op.create_index(batch_op.f('ix_files_id'), ['id'], unique=False)
+
+    if 'attachment_texts' not in existing:
+        op.create_table('attachment_texts',
+        sa.Column('file_id', sa.Integer(), nullable=False),
+        sa.Column('storage_key', sa.String(), nullable=False),
+        sa.Column('content', sa.Text(), nullable=False),
+        sa.Column('extracted_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['file_id'], ['files.id'], ),
+        sa.PrimaryKeyConstraint('file_id')
+        )
+        with op.batch_alter_table('attachment_texts', schema=None) as batch_op:
+            batch_op.create_index(batch_op.f('ix_attachment_texts_storage_key'), ['storage_key'], unique=False)
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('attachment_texts', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_attachment_texts_storage_key'))
+
+    op.drop_table('attachment_texts')
+    with op.batch_alter_table('files', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_files_id'))
+
+    op.drop_table('files')
+    with op.batch_alter_table('surveys', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_surveys_id'))
+
+    op.drop_table('surveys')
+    with op.batch_alter_table('nces', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_nces_title'))
+        batch_op.drop_index(batch_op.f('ix_nces_status'))
+        batch_op.drop_index(batch_op.f('ix_nces_severity'))
+        batch_op.drop_index(batch_op.f('ix_nces_id'))
+        batch_op.drop_index(batch_op.f('ix_nces_created_at'))
+
+    op.drop_table('nces')
+    with op.batch_alter_table('deliveries', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_deliveries_title'))
+        batch_op.drop_index(batch_op.f('ix_deliveries_status'))
+        batch_op.drop_index(batch_op.f('ix_deliveries_id'))
+        batch_op.drop_index(batch_op.f('ix_deliveries_created_at'))
+
+    op.drop_table('deliveries')
+    with op.batch_alter_table('projects', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_projects_name'))
+        batch_op.drop_index(batch_op.f('ix_projects_id'))
+
+    op.drop_table('projects')
+    with op.batch_alter_table('notifications', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_notifications_id'))
+
+    op.drop_table('notifications')
+    op.drop_table('notification_counters')
+    op.drop_table('email_preferences')
+    with op.batch_alter_table('email_digest_items', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_email_digest_items_user_id'))
+        batch_op.drop_index(batch_op.f('ix_email_digest_items_id'))
+
+    op.drop_table('email_digest_items')
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_users_id'))
+        batch_op.drop_index(batch_op.f('ix_users_email'))
+
+    op.drop_table('users')
+    op.drop_table('table_versions')
+    with op.batch_alter_table('jobs', schema=None) as batch_op:
+        batch_op.drop_index('ix_jobs_status_run_after')
+        batch_op.drop_index(batch_op.f('ix_jobs_id'))
+
+    op.drop_table('jobs')
+    with op.batch_alter_table('dashboard_rollups', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_dashboard_rollups_id'))
+
+    op.drop_table('dashboard_rollups')
+    op.drop_table('blobs')
+    with op.batch_alter_table('activity_events', schema=None) as batch_op:
+        batch_op.drop_index('ix_activity_events_scope_created')
+        batch_op.drop_index(batch_op.f('ix_activity_events_id'))
+        batch_op.drop_index(batch_op.f('ix_activity_events_created_at'))
+
+    op.drop_table('activity_events')
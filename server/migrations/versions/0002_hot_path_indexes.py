@@ -0,0 +1,82 @@
+"""hot path indexes
+
+Index des clés étrangères filtrées par les listes et index composites des
+listes paginées. nces.created_by, deliveries.created_by et notifications.user_id
+sont couverts par la première colonne des index composites.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17 04:32:14.017857
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('deliveries', schema=None) as batch_op:
+        batch_op.create_index('ix_deliveries_created_by_created_at', ['created_by', 'created_at'], unique=False)
+        batch_op.create_index(batch_op.f('ix_deliveries_project_id'), ['project_id'], unique=False)
+
+    with op.batch_alter_table('files', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_files_delivery_id'), ['delivery_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_files_nce_id'), ['nce_id'], unique=False)
+
+    with op.batch_alter_table('nces', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_nces_assigned_to'), ['assigned_to'], unique=False)
+        batch_op.create_index('ix_nces_created_by_created_at', ['created_by', 'created_at'], unique=False)
+        batch_op.create_index(batch_op.f('ix_nces_delivery_id'), ['delivery_id'], unique=False)
+
+    with op.batch_alter_table('notifications', schema=None) as batch_op:
+        batch_op.create_index('ix_notifications_user_created', ['user_id', 'created_at'], unique=False)
+        batch_op.create_index('ix_notifications_user_unread_created', ['user_id', 'is_read', 'created_at'], unique=False)
+
+    with op.batch_alter_table('projects', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_projects_client_id'), ['client_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_projects_created_at'), ['created_at'], unique=False)
+
+    with op.batch_alter_table('surveys', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_surveys_delivery_id'), ['delivery_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_surveys_survey_type'), ['survey_type'], unique=False)
+
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_users_role'), ['role'], unique=False)
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_users_role'))
+
+    with op.batch_alter_table('surveys', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_surveys_survey_type'))
+        batch_op.drop_index(batch_op.f('ix_surveys_delivery_id'))
+
+    with op.batch_alter_table('projects', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_projects_created_at'))
+        batch_op.drop_index(batch_op.f('ix_projects_client_id'))
+
+    with op.batch_alter_table('notifications', schema=None) as batch_op:
+        batch_op.drop_index('ix_notifications_user_unread_created')
+        batch_op.drop_index('ix_notifications_user_created')
+
+    with op.batch_alter_table('nces', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_nces_delivery_id'))
+        batch_op.drop_index('ix_nces_created_by_created_at')
+        batch_op.drop_index(batch_op.f('ix_nces_assigned_to'))
+
+    with op.batch_alter_table('files', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_files_nce_id'))
+        batch_op.drop_index(batch_op.f('ix_files_delivery_id'))
+
+    with op.batch_alter_table('deliveries', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_deliveries_project_id'))
+        batch_op.drop_index('ix_deliveries_created_by_created_at')
@@ -4,4 +4,12 @@ from .file import File
 from .delivery import Delivery
 from .survey import Survey
 from .nce import NCE
-from .notification import Notification  
\ No newline at end of file
+from .notification import Notification
+from .table_version import TableVersion
+from .dashboard_rollup import DashboardRollup
+from .activity_event import ActivityEvent
+from .blob import Blob
+from .attachment_text import AttachmentText
+from .job import Job
+from .email_preference import EmailPreference, EmailDigestItem
+from .notification_counter import NotificationCounter
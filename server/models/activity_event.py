@@ -0,0 +1,19 @@
+from sqlalchemy import Column, Integer, String, DateTime, Index
+from datetime import datetime
+from db.base import Base
+
+class ActivityEvent(Base):
+    __tablename__ = "activity_events"
+    __table_args__ = (
+        Index("ix_activity_events_scope_created", "scope_user_id", "created_at"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    # Propriétaire de l'objet (créateur) ; NULL = visible par tous (surveys)
+    scope_user_id = Column(Integer, nullable=True)
+    type = Column(String, nullable=False)
+    source_id = Column(Integer, nullable=False)
+    title = Column(String, nullable=False)
+    color = Column(String, nullable=False)
+    name = Column(String, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
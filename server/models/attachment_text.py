@@ -0,0 +1,15 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey
+from datetime import datetime
+from db.base import Base
+
+class AttachmentText(Base):
+    """
+    Texte extrait d'une pièce jointe, indexé pour la recherche plein texte
+    (nces / deliveries via files.nce_id / files.delivery_id).
+    """
+    __tablename__ = "attachment_texts"
+
+    file_id = Column(Integer, ForeignKey("files.id"), primary_key=True)
+    storage_key = Column(String, nullable=False, index=True)
+    content = Column(Text, nullable=False, default="")
+    extracted_at = Column(DateTime, default=datetime.utcnow)
@@ -0,0 +1,19 @@
+from sqlalchemy import Column, Integer, String, UniqueConstraint
+from db.base import Base
+
+class DashboardRollup(Base):
+    __tablename__ = "dashboard_rollups"
+    __table_args__ = (UniqueConstraint("scope", "scope_id", name="uq_dashboard_rollups_scope"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    # "global" (scope_id = 0) ou "user" (scope_id = créateur : producteur ou client)
+    scope = Column(String, nullable=False)
+    scope_id = Column(Integer, nullable=False, default=0)
+
+    total_deliveries = Column(Integer, nullable=False, default=0)
+    total_nces = Column(Integer, nullable=False, default=0)
+    open_nces = Column(Integer, nullable=False, default=0)
+    nps_sum = Column(Integer, nullable=False, default=0)
+    nps_count = Column(Integer, nullable=False, default=0)
+    csat_sum = Column(Integer, nullable=False, default=0)
+    csat_count = Column(Integer, nullable=False, default=0)
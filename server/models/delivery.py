@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Enum as SQLEnum
+from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Index, Enum as SQLEnum
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import enum
@@ -13,9 +13,12 @@ class DeliveryStatus(str, enum.Enum):
 
 class Delivery(Base):
     __tablename__ = "deliveries"
+    __table_args__ = (
+        Index("ix_deliveries_created_by_created_at", "created_by", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
-    project_id = Column(Integer, ForeignKey("projects.id"), nullable=False)
+    project_id = Column(Integer, ForeignKey("projects.id"), nullable=False, index=True)
     title = Column(String, nullable=False, index=True)
     description = Column(Text)
     status = Column(SQLEnum(DeliveryStatus), default=DeliveryStatus.DRAFT, index=True)
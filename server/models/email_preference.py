@@ -0,0 +1,23 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey
+from datetime import datetime
+from db.base import Base
+
+class EmailPreference(Base):
+    __tablename__ = "email_preferences"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    # 0 = un email par notification ; sinon un résumé toutes les N minutes au plus
+    digest_minutes = Column(Integer, nullable=False, default=0)
+    # Envoi du prochain résumé déjà programmé (NULL : aucun en attente)
+    next_digest_at = Column(DateTime, nullable=True)
+
+
+class EmailDigestItem(Base):
+    """Email en attente du prochain résumé de l'utilisateur."""
+    __tablename__ = "email_digest_items"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    subject = Column(String, nullable=False)
+    body = Column(Text, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
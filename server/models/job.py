@@ -0,0 +1,27 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, JSON, Index
+from datetime import datetime
+from db.base import Base
+
+class Job(Base):
+    """
+    Tâche différée (file d'attente transactionnelle) : écrite dans la même
+    transaction que le changement métier, exécutée par core/jobs.py.
+    """
+    __tablename__ = "jobs"
+    __table_args__ = (
+        Index("ix_jobs_status_run_after", "status", "run_after"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String, nullable=False)
+    payload = Column(JSON, nullable=False)
+    # pending -> running -> done | failed (après max_attempts échecs)
+    status = Column(String, nullable=False, default="pending")
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=5)
+    run_after = Column(DateTime, nullable=False, default=datetime.utcnow)
+    # Bail d'exécution : une tâche "running" dont le bail a expiré est reprise
+    locked_until = Column(DateTime, nullable=True)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    finished_at = Column(DateTime, nullable=True)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Enum as SQLEnum
+from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Index, Enum as SQLEnum
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import enum
@@ -17,16 +17,20 @@ class NCESeverity(str, enum.Enum):
 
 class NCE(Base):
     __tablename__ = "nces"
+    __table_args__ = (
+        # Liste d'un producteur : filtre created_by, tri created_at
+        Index("ix_nces_created_by_created_at", "created_by", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
-    delivery_id = Column(Integer, ForeignKey("deliveries.id"), nullable=False)
+    delivery_id = Column(Integer, ForeignKey("deliveries.id"), nullable=False, index=True)
     title = Column(String, nullable=False, index=True)
     description = Column(Text, nullable=False)
     severity = Column(SQLEnum(NCESeverity), default=NCESeverity.MEDIUM, index=True)
     status = Column(SQLEnum(NCEStatus), default=NCEStatus.OPEN, index=True)
     category = Column(Text)
     created_by = Column(Integer, ForeignKey("users.id"), nullable=False)
-    assigned_to = Column(Integer, ForeignKey("users.id"))
+    assigned_to = Column(Integer, ForeignKey("users.id"), index=True)
     created_at = Column(DateTime, default=datetime.utcnow, index=True)
     resolved_at = Column(DateTime)
     
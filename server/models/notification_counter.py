@@ -0,0 +1,9 @@
+from sqlalchemy import Column, Integer, ForeignKey
+from db.base import Base
+
+class NotificationCounter(Base):
+    """Nombre de notifications non lues par utilisateur (maintenu à chaque flush)."""
+    __tablename__ = "notification_counters"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    unread = Column(Integer, nullable=False, default=0)
@@ -12,9 +12,9 @@ class Survey(Base):
     __tablename__ = "surveys"
 
     id = Column(Integer, primary_key=True, index=True)
-    delivery_id = Column(Integer, ForeignKey("deliveries.id"), nullable=False)
+    delivery_id = Column(Integer, ForeignKey("deliveries.id"), nullable=False, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    survey_type = Column(SQLEnum(SurveyType), nullable=False)
+    survey_type = Column(SQLEnum(SurveyType), nullable=False, index=True)
     score = Column(Integer)
     comment = Column(Text)
     sent_at = Column(DateTime, default=datetime.utcnow)
@@ -0,0 +1,8 @@
+from sqlalchemy import Column, Integer, String
+from db.base import Base
+
+class TableVersion(Base):
+    __tablename__ = "table_versions"
+
+    table_name = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
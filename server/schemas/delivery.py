@@ -43,5 +43,6 @@ class DeliveryResponseWithProject(BaseModel):
 
 
 class DeliveryResponseWithTotal(BaseModel):
-    total: int
-    deliveries: List[DeliveryResponseWithProject] = []
\ No newline at end of file
+    total: Optional[int] = None
+    deliveries: List[DeliveryResponseWithProject] = []
+    next_cursor: Optional[str] = None
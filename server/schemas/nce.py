@@ -53,8 +53,9 @@ class NCEResponse(BaseModel):
 
 
 class NCEResponseWithTotal(BaseModel):
-    total: int
+    total: Optional[int] = None
     nces: List[NCEResponse]
+    next_cursor: Optional[str] = None
 
     class Config:
         from_attributes = True
@@ -1,6 +1,6 @@
 from datetime import datetime
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field
+from typing import List, Optional
 
 
 class NotificationResponse(BaseModel):
@@ -14,3 +14,25 @@ class NotificationResponse(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class UnreadCountResponse(BaseModel):
+    count: int
+
+
+class MarkReadRequest(BaseModel):
+    # Par identifiants, et/ou tout ce qui a été créé jusqu'à `before`
+    ids: Optional[List[int]] = Field(None, max_length=1000)
+    before: Optional[datetime] = None
+
+
+class EmailPreferenceResponse(BaseModel):
+    digest_minutes: int
+
+    class Config:
+        from_attributes = True
+
+
+class EmailPreferenceUpdate(BaseModel):
+    # 0 = un email par notification ; sinon un résumé toutes les N minutes (max 1 semaine)
+    digest_minutes: int = Field(..., ge=0, le=7 * 24 * 60)
@@ -32,7 +32,7 @@ class ProjectResponse(BaseModel):
 
 
 class ProjectsResponseWithTotal(BaseModel):
-    total: int
+    total: Optional[int] = None
     projects: List[ProjectResponse]
 
     class Config:
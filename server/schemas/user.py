@@ -24,7 +24,7 @@ class UserResponse(BaseModel):
 
 
 class ClientResponse(BaseModel):
-    total : int
+    total : Optional[int] = None
     clients : List[UserResponse] = []
 
 
@@ -0,0 +1,117 @@
+from datetime import datetime
+from typing import List, Optional
+
+from sqlalchemy import event, inspect, insert, or_
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from models.activity_event import ActivityEvent
+from models.delivery import Delivery
+from models.nce import NCE, NCEStatus
+from models.survey import Survey
+from models.user import UserRole
+from core.user_cache import CurrentUser
+
+
+def get_delivery_title_color(status: str):
+    """Retourne un titre et une couleur selon le status de la livraison"""
+    mapping = {
+        "DRAFT": ("New delivery created", "bg-primary"),
+        "DELIVERED": ("Delivery delivered", "bg-green-500"),
+        "APPROVED": ("Delivery approved", "bg-blue-500"),
+        "REJECTED": ("Delivery rejected", "bg-red-500"),
+    }
+    return mapping.get(status.upper(), ("Delivery update", "bg-primary"))
+
+
+def delivery_event(delivery: Delivery, created_at: Optional[datetime] = None) -> dict:
+    title, color = get_delivery_title_color(delivery.status or "draft")
+    return {
+        "scope_user_id": delivery.created_by,
+        "type": "delivery",
+        "source_id": delivery.id,
+        "title": title,
+        "color": color,
+        "name": delivery.title if delivery.title else "Unknown",
+        "created_at": created_at or delivery.created_at or datetime.utcnow(),
+    }
+
+
+def nce_event(nce: NCE, created_at: Optional[datetime] = None) -> dict:
+    status = nce.status or NCEStatus.OPEN
+    return {
+        "scope_user_id": nce.created_by,
+        "type": "nce",
+        "source_id": nce.id,
+        "title": f"NCE {status.value.lower()}",
+        "color": "bg-accent",
+        "name": nce.title if nce.title else "Unknown",
+        "created_at": created_at or nce.created_at or datetime.utcnow(),
+    }
+
+
+def survey_event(survey: Survey) -> dict:
+    return {
+        "scope_user_id": None,
+        "type": "survey",
+        "source_id": survey.id,
+        "title": f"{survey.survey_type.value} completed",
+        "color": "bg-primary",
+        "name": survey.survey_type.value if survey.survey_type else "Unknown",
+        "created_at": survey.completed_at or survey.sent_at or datetime.utcnow(),
+    }
+
+
+def _status_changed(obj) -> bool:
+    return inspect(obj).attrs.status.history.has_changes()
+
+
+@event.listens_for(Session, "after_flush")
+def _record_activity(session: Session, flush_context) -> None:
+    """
+    Journalise créations et changements de statut (livraisons, NCE, surveys) dans la même transaction.
+    """
+    events: List[dict] = []
+    now = datetime.utcnow()
+
+    for obj in session.new:
+        if isinstance(obj, Delivery):
+            events.append(delivery_event(obj))
+        elif isinstance(obj, NCE):
+            events.append(nce_event(obj))
+        elif isinstance(obj, Survey) and obj.completed_at is not None:
+            events.append(survey_event(obj))
+
+    for obj in session.dirty:
+        if isinstance(obj, Delivery) and _status_changed(obj):
+            events.append(delivery_event(obj, created_at=now))
+        elif isinstance(obj, NCE) and _status_changed(obj):
+            events.append(nce_event(obj, created_at=now))
+
+    if events:
+        session.connection().execute(insert(ActivityEvent), events)
+
+
+def ensure_activity_events(bind: Engine) -> None:
+    """
+    Remplit activity_events à partir des données existantes au premier démarrage.
+    """
+    with Session(bind=bind) as db:
+        if db.query(ActivityEvent.id).first() is not None:
+            return
+
+        events = [delivery_event(d) for d in db.query(Delivery)]
+        events += [nce_event(n) for n in db.query(NCE)]
+        events += [survey_event(s) for s in db.query(Survey).filter(Survey.completed_at.isnot(None))]
+        if events:
+            db.execute(insert(ActivityEvent), events)
+            db.commit()
+
+
+def activity_query(db: Session, user: CurrentUser):
+    query = db.query(ActivityEvent)
+    if user.role == UserRole.PRODUCER:
+        query = query.filter(
+            or_(ActivityEvent.scope_user_id == user.id, ActivityEvent.scope_user_id.is_(None))
+        )
+    return query
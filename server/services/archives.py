@@ -0,0 +1,134 @@
+import io
+import os
+import zipfile
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Iterator, List, Optional
+from urllib.parse import quote
+
+from sqlalchemy.orm import Session
+from starlette.responses import StreamingResponse
+
+from models.blob import Blob
+from models.file import File as FileModel
+from services import blobs
+from services.uploads import CHUNK_SIZE
+
+# Formats déjà compressés : stockés tels quels dans le ZIP (deflate n'y gagne rien)
+STORED_EXTENSIONS = {
+    ".zip", ".gz", ".tgz", ".bz2", ".xz", ".7z", ".rar", ".zst",
+    ".jpg", ".jpeg", ".png", ".gif", ".webp", ".heic", ".avif",
+    ".mp3", ".mp4", ".m4a", ".mov", ".avi", ".mkv", ".webm", ".ogg",
+    ".pdf", ".docx", ".xlsx", ".pptx", ".odt", ".ods", ".odp",
+}
+
+
+@dataclass
+class ArchiveEntry:
+    arcname: str
+    storage_key: str
+    size: Optional[int]
+    modified: datetime
+
+
+class _ZipSink(io.RawIOBase):
+    """
+    Flux d'écriture non « seekable » : zipfile écrit alors des data descriptors
+    et ne revient jamais en arrière ; les octets sont récupérés au fil de l'eau.
+    """
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _unique_name(filename: str, used: set) -> str:
+    name = filename.replace("\\", "/").rsplit("/", 1)[-1] or "file"
+    stem, ext = os.path.splitext(name)
+    counter = 2
+    while name in used:
+        name = f"{stem} ({counter}){ext}"
+        counter += 1
+    used.add(name)
+    return name
+
+
+def archive_entries(db: Session, files: List[FileModel]) -> List[ArchiveEntry]:
+    """
+    Prépare la liste des entrées avant la réponse : le générateur ne touche
+    plus à la session, fermée dès la fin de l'endpoint.
+    """
+    hashes = {blobs.blob_hash(f.storage_key) for f in files} - {None}
+    sizes = dict(db.query(Blob.sha256, Blob.size).filter(Blob.sha256.in_(hashes)).all()) if hashes else {}
+
+    used: set = set()
+    entries = []
+    for file in sorted(files, key=lambda f: f.id):
+        sha256 = blobs.blob_hash(file.storage_key)
+        if sha256:
+            size = sizes.get(sha256)
+        else:
+            size = os.path.getsize(file.storage_key) if os.path.exists(file.storage_key) else None
+        entries.append(ArchiveEntry(
+            arcname=_unique_name(file.filename, used),
+            storage_key=file.storage_key,
+            size=size,
+            modified=file.uploaded_at or datetime.utcnow(),
+        ))
+    return entries
+
+
+def iter_zip(entries: List[ArchiveEntry]) -> Iterator[bytes]:
+    """
+    Construit le ZIP à la volée, fichier par fichier et bloc par bloc :
+    mémoire bornée à CHUNK_SIZE, ni fichier temporaire ni mise en tampon complète.
+    Les fichiers disparus du stockage sont ignorés.
+    """
+    sink = _ZipSink()
+    with zipfile.ZipFile(sink, mode="w", allowZip64=True) as archive:
+        for entry in entries:
+            try:
+                src = blobs.open_file(entry.storage_key)
+            except FileNotFoundError:
+                continue
+
+            info = zipfile.ZipInfo(entry.arcname, date_time=max(entry.modified, datetime(1980, 1, 1)).timetuple()[:6])
+            info.external_attr = 0o644 << 16
+            if os.path.splitext(entry.arcname)[1].lower() in STORED_EXTENSIONS:
+                info.compress_type = zipfile.ZIP_STORED
+            else:
+                info.compress_type = zipfile.ZIP_DEFLATED
+            if entry.size is not None:
+                info.file_size = entry.size
+
+            with src, archive.open(info, mode="w", force_zip64=entry.size is None) as dest:
+                for chunk in iter(lambda: src.read(CHUNK_SIZE), b""):
+                    dest.write(chunk)
+                    data = sink.drain()
+                    if data:
+                        yield data
+            yield sink.drain()
+    yield sink.drain()
+
+
+def zip_response(entries: List[ArchiveEntry], filename: str) -> StreamingResponse:
+    # Générateur synchrone : Starlette l'itère dans le threadpool
+    return StreamingResponse(
+        iter_zip(entries),
+        media_type="application/zip",
+        headers={
+            "content-disposition": f"attachment; filename*=utf-8''{quote(filename)}",
+            "cache-control": "private, no-cache",
+        },
+    )
@@ -0,0 +1,131 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Iterable, List, Optional
+
+from sqlalchemy import delete, event
+from sqlalchemy.orm import Session
+
+from core.config import settings
+from models.attachment_text import AttachmentText
+from models.file import File as FileModel
+from services import blobs
+from services.text_extract import extract_text, extractable
+
+logger = logging.getLogger(__name__)
+
+# 🔹 Extraction du texte des pièces jointes hors requête : les nouveaux fichiers
+# sont indexés après le commit qui les crée, les fichiers supprimés sont retirés
+# de l'index dans la transaction de la suppression.
+_extractor = ThreadPoolExecutor(max_workers=settings.TEXT_EXTRACT_WORKERS, thread_name_prefix="text-extract")
+_pending: set = set()
+_lock = threading.Lock()
+
+
+@event.listens_for(Session, "before_flush")
+def _unindex_deleted_attachments(session: Session, flush_context, instances) -> None:
+    # Avant le DELETE des fichiers : attachment_texts.file_id référence files.id
+    deleted_ids = [obj.id for obj in session.deleted if isinstance(obj, FileModel)]
+    if deleted_ids:
+        session.connection().execute(delete(AttachmentText).where(AttachmentText.file_id.in_(deleted_ids)))
+        session.info.get("extract_files", set()).difference_update(deleted_ids)
+
+
+@event.listens_for(Session, "after_flush")
+def _track_new_attachments(session: Session, flush_context) -> None:
+    new_ids = [obj.id for obj in session.new if isinstance(obj, FileModel) and extractable(obj.filename)]
+    if new_ids:
+        session.info.setdefault("extract_files", set()).update(new_ids)
+
+
+@event.listens_for(Session, "after_commit")
+def _schedule_new_attachments(session: Session) -> None:
+    file_ids = session.info.pop("extract_files", None)
+    if file_ids:
+        schedule_extraction(file_ids)
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_new_attachments(session: Session) -> None:
+    session.info.pop("extract_files", None)
+
+
+def schedule_extraction(file_ids: Iterable[int]) -> None:
+    for file_id in file_ids:
+        with _lock:
+            if file_id in _pending:
+                continue
+            _pending.add(file_id)
+        _extractor.submit(_extract, file_id)
+
+
+def _cached_text(db: Session, storage_key: str) -> Optional[str]:
+    # Contenu adressé par hash : un blob déjà indexé pour un autre fichier n'est pas relu
+    row = db.query(AttachmentText.content).filter(AttachmentText.storage_key == storage_key).first()
+    return row[0] if row else None
+
+
+def index_file(db: Session, file: FileModel) -> bool:
+    """
+    Extrait et enregistre le texte d'un fichier. Retourne False si le format
+    n'est pas géré ou si le contenu est introuvable.
+    """
+    text = _cached_text(db, file.storage_key) if blobs.blob_hash(file.storage_key) else None
+    if text is None:
+        try:
+            with blobs.local_copy(file.storage_key) as path:
+                text = extract_text(path, file.filename)
+        except FileNotFoundError:
+            return False
+    if text is None:
+        return False
+
+    row = db.get(AttachmentText, file.id)
+    if row is None:
+        db.add(AttachmentText(file_id=file.id, storage_key=file.storage_key, content=text))
+    else:
+        row.storage_key, row.content, row.extracted_at = file.storage_key, text, datetime.utcnow()
+    db.commit()
+    return True
+
+
+def _extract(file_id: int) -> None:
+    from db.session import SessionLocal
+
+    db = SessionLocal()
+    try:
+        file = db.get(FileModel, file_id)
+        if file is not None:
+            index_file(db, file)
+    except Exception:
+        db.rollback()
+        logger.warning("Text extraction failed for file %s", file_id, exc_info=True)
+    finally:
+        db.close()
+        with _lock:
+            _pending.discard(file_id)
+
+
+def reindex_attachments(db: Session, full: bool = False) -> int:
+    """
+    Indexe les fichiers qui n'ont pas encore de texte extrait (tous si `full`).
+    Retourne le nombre de fichiers indexés.
+    """
+    if full:
+        db.query(AttachmentText).delete(synchronize_session=False)
+        db.commit()
+
+    query = db.query(FileModel).outerjoin(AttachmentText, AttachmentText.file_id == FileModel.id).filter(
+        AttachmentText.file_id.is_(None)
+    )
+
+    files: List[FileModel] = [f for f in query.order_by(FileModel.id).all() if extractable(f.filename)]
+    indexed = 0
+    for file in files:
+        try:
+            indexed += index_file(db, file)
+        except Exception:
+            db.rollback()
+            logger.warning("Text extraction failed for file %s", file.id, exc_info=True)
+    return indexed
@@ -0,0 +1,224 @@
+import hashlib
+import os
+import shutil
+import tempfile
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import BinaryIO, Dict, Iterator, List, Optional
+
+from sqlalchemy import delete, event, inspect, update
+from sqlalchemy.orm import Session
+
+from core.jobs import enqueue, job_handler
+from db.upsert import increment_row
+from models.blob import Blob
+from models.file import File as FileModel
+from services.storage import LOCAL_ROOT, LocalStorage, get_storage
+from services.uploads import CHUNK_SIZE, STAGING_DIR, StagedUpload
+
+# Stockage adressé par contenu : un fichier = un blob nommé par son SHA-256.
+# File.storage_key vaut "sha256/ab/cd/<sha256>" et sert de clé au backend de stockage
+# (uploads/blobs/ab/cd/<sha256> en local, objet du bucket en S3) ;
+# les anciennes lignes gardent leur chemin littéral (uploads/deliveries/...).
+KEY_PREFIX = "sha256/"
+# Aperçu (miniature JPEG) rangé à côté du blob, sous "<storage_key>.preview.jpg"
+PREVIEW_SUFFIX = ".preview.jpg"
+
+
+def blob_key(sha256: str) -> str:
+    return f"{KEY_PREFIX}{sha256[:2]}/{sha256[2:4]}/{sha256}"
+
+
+def blob_hash(storage_key: Optional[str]) -> Optional[str]:
+    if storage_key and storage_key.startswith(KEY_PREFIX):
+        return storage_key.rsplit("/", 1)[-1]
+    return None
+
+
+def resolve_path(storage_key: str) -> Optional[str]:
+    """Chemin disque d'un storage_key (blob ou chemin historique), None si le blob est distant."""
+    if blob_hash(storage_key) is None:
+        return storage_key
+    return get_storage().local_path(storage_key)
+
+
+def open_file(storage_key: str) -> BinaryIO:
+    """Ouvre en lecture le contenu d'un storage_key ; FileNotFoundError s'il a disparu."""
+    if blob_hash(storage_key) is None:
+        return open(storage_key, "rb")
+    return get_storage().open(storage_key)
+
+
+@contextmanager
+def local_copy(storage_key: str) -> Iterator[str]:
+    """
+    Chemin disque lisible du contenu : le fichier lui-même en local, une copie
+    temporaire (supprimée à la sortie) si le blob est dans un stockage distant.
+    """
+    path = resolve_path(storage_key)
+    if path is not None:
+        yield path
+        return
+
+    os.makedirs(STAGING_DIR, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=STAGING_DIR)
+    try:
+        with os.fdopen(fd, "wb") as out, open_file(storage_key) as src:
+            shutil.copyfileobj(src, out, CHUNK_SIZE)
+        yield temp_path
+    finally:
+        os.remove(temp_path)
+
+
+def register(db: Session, item: StagedUpload) -> str:
+    """
+    Retourne le storage_key d'un fichier en transit, à poser sur la ligne File.
+    La référence (ligne Blob créée ou ref_count incrémenté) est prise au flush
+    de cette ligne ; le contenu n'est écrit qu'ensuite, par put().
+    """
+    db.info.setdefault("blob_sizes", {})[item.sha256] = item.size
+    return blob_key(item.sha256)
+
+
+def put(item: StagedUpload) -> None:
+    """
+    Range le contenu d'un fichier en transit s'il manque au stockage, sinon
+    supprime simplement le fichier en transit. À appeler après le flush des
+    lignes File qui le référencent : la ligne Blob est alors verrouillée par
+    la transaction et le ramasse-miettes ne peut plus supprimer le contenu.
+    """
+    key = blob_key(item.sha256)
+    storage = get_storage()
+
+    if storage.exists(key):
+        os.remove(item.temp_path)
+    else:
+        storage.put_file(key, item.temp_path)
+
+
+def _collect_ref_changes(session: Session) -> Dict[str, int]:
+    changes: Dict[str, int] = defaultdict(int)
+    for obj in session.new:
+        if isinstance(obj, FileModel) and blob_hash(obj.storage_key):
+            changes[blob_hash(obj.storage_key)] += 1
+    for obj in session.dirty:
+        if isinstance(obj, FileModel):
+            history = inspect(obj).attrs.storage_key.history
+            if history.has_changes():
+                for old in history.deleted:
+                    if blob_hash(old):
+                        changes[blob_hash(old)] -= 1
+                for new in history.added:
+                    if blob_hash(new):
+                        changes[blob_hash(new)] += 1
+    for obj in session.deleted:
+        if isinstance(obj, FileModel) and blob_hash(obj.storage_key):
+            changes[blob_hash(obj.storage_key)] -= 1
+    return changes
+
+
+@event.listens_for(Session, "after_flush")
+def _update_ref_counts(session: Session, flush_context) -> None:
+    """
+    Maintient blobs.ref_count. Un blob qui n'est plus référencé n'est pas
+    supprimé ici : le ramasse-miettes (tâche "blobs.collect", après le commit)
+    revérifie ref_count = 0 avant d'effacer la ligne et le fichier.
+    """
+    changes = _collect_ref_changes(session)
+    if not changes:
+        return
+
+    conn = session.connection()
+    sizes = session.info.get("blob_sizes", {})
+    released = []
+    for sha256, delta in sorted(changes.items()):
+        if delta > 0:
+            # Upsert : deux premiers uploads concurrents du même contenu ne se heurtent plus sur la clé primaire
+            size = sizes.get(sha256)
+            if size is None:
+                storage, key = get_storage(), blob_key(sha256)
+                size = storage.size(key) if storage.exists(key) else 0
+            increment_row(conn, Blob.__table__, {"sha256": sha256}, {"ref_count": delta}, {"size": size, "ref_count": delta})
+        elif delta < 0:
+            remaining = conn.execute(
+                update(Blob).where(Blob.sha256 == sha256).values(ref_count=Blob.ref_count + delta).returning(Blob.ref_count)
+            ).scalar()
+            if remaining is not None and remaining <= 0:
+                released.append(sha256)
+
+    if released:
+        enqueue(session, "blobs.collect", {"sha256": released})
+
+
+@event.listens_for(Session, "after_commit")
+@event.listens_for(Session, "after_rollback")
+def _forget_blob_sizes(session: Session) -> None:
+    session.info.pop("blob_sizes", None)
+
+
+@job_handler("blobs.collect")
+def collect_blobs(db: Session, payloads: List[dict]) -> None:
+    """
+    Supprime les blobs redevenus orphelins. Le DELETE conditionnel verrouille la
+    ligne jusqu'au commit du lot : un upload concurrent qui reprend ce contenu
+    attend ce commit, recrée la ligne et réécrit le fichier ; un upload déjà
+    validé a remonté ref_count et la ligne est conservée.
+    """
+    storage = get_storage()
+    for sha256 in sorted({sha256 for payload in payloads for sha256 in payload["sha256"]}):
+        removed = db.execute(delete(Blob).where(Blob.sha256 == sha256, Blob.ref_count <= 0))
+        if removed.rowcount:
+            storage.delete(blob_key(sha256))
+            storage.delete(blob_key(sha256) + PREVIEW_SUFFIX)
+
+
+def _hash_file(path: str) -> StagedUpload:
+    digest = hashlib.sha256()
+    size = 0
+    with open(path, "rb") as src:
+        for chunk in iter(lambda: src.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+            size += len(chunk)
+    return StagedUpload(filename=os.path.basename(path), temp_path=path, size=size, sha256=digest.hexdigest())
+
+
+def migrate_legacy_files(db: Session) -> int:
+    """
+    Déplace les fichiers stockés sous leur chemin historique vers le blob store.
+    Retourne le nombre de lignes File migrées.
+    """
+    keys: Dict[str, str] = {}
+    migrated = 0
+    for file in db.query(FileModel).filter(~FileModel.storage_key.startswith(KEY_PREFIX)).all():
+        path = file.storage_key
+        if path in keys:
+            file.storage_key = keys[path]
+        elif os.path.exists(path):
+            item = _hash_file(path)
+            file.storage_key = keys[path] = register(db, item)
+            # Référence prise avant de déplacer le fichier
+            db.flush()
+            put(item)
+        else:
+            continue
+        migrated += 1
+    db.commit()
+    return migrated
+
+
+def push_local_blobs(db: Session) -> int:
+    """
+    Envoie vers le backend configuré (S3 / MinIO) les blobs encore présents
+    sous uploads/blobs, après un passage de STORAGE_BACKEND à "s3".
+    """
+    local, target = LocalStorage(LOCAL_ROOT), get_storage()
+    if isinstance(target, LocalStorage):
+        return 0
+
+    pushed = 0
+    for (sha256,) in db.query(Blob.sha256).all():
+        key = blob_key(sha256)
+        if local.exists(key) and not target.exists(key):
+            target.put_file(key, local.local_path(key))
+            pushed += 1
+    return pushed
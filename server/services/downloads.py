@@ -0,0 +1,194 @@
+import os
+import re
+import stat
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Optional, Tuple
+from urllib.parse import quote
+
+import anyio
+from fastapi import Request
+from starlette.responses import FileResponse, RedirectResponse, Response
+
+from services import blobs
+from services.storage import get_storage
+from services.uploads import CHUNK_SIZE
+
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def _content_disposition(filename: str) -> str:
+    quoted = quote(filename)
+    if quoted != filename:
+        return f"attachment; filename*=utf-8''{quoted}"
+    return f'attachment; filename="{filename}"'
+
+
+def _etag(storage_key: str, st: os.stat_result) -> str:
+    # Blob : ETag fort = hash du contenu ; chemin historique : ETag faible (mtime + taille)
+    sha256 = blobs.blob_hash(storage_key)
+    if sha256:
+        return f'"{sha256}"'
+    return f'W/"{int(st.st_mtime):x}-{st.st_size:x}"'
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    if header.strip() == "*":
+        return True
+    weak = etag[2:] if etag.startswith("W/") else etag
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == weak:
+            return True
+    return False
+
+
+def _not_modified_since(header: Optional[str], mtime: float) -> bool:
+    if not header:
+        return False
+    try:
+        return int(mtime) <= parsedate_to_datetime(header).timestamp()
+    except (TypeError, ValueError):
+        return False
+
+
+def _if_range_matches(header: Optional[str], etag: str, mtime: float) -> bool:
+    """
+    If-Range (RFC 9110 §13.1.5) : comparaison forte uniquement. Un ETag faible
+    (envoyé ou courant) ne valide jamais la plage ; une date doit être
+    exactement la Last-Modified de la représentation.
+    """
+    if header is None:
+        return True
+    header = header.strip()
+    if header.startswith('"'):
+        return not etag.startswith("W/") and header == etag
+    if header.startswith("W/"):
+        return False
+    try:
+        return parsedate_to_datetime(header).timestamp() == int(mtime)
+    except (TypeError, ValueError):
+        return False
+
+
+def _parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    Retourne (début, fin incluse) pour une plage simple, None si non satisfiable.
+    Les requêtes multi-plages ne sont pas gérées (réponse complète).
+    """
+    match = _RANGE_RE.match(header.replace(" ", ""))
+    if not match:
+        raise ValueError(header)
+    first, last = match.groups()
+    if not first and not last:
+        raise ValueError(header)
+
+    if not first:
+        length = int(last)
+        if length == 0:
+            return None
+        return max(size - length, 0), size - 1
+
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        return None
+    return start, end
+
+
+class FileRangeResponse(Response):
+    """
+    Envoie la plage [start, end] d'un fichier par blocs, sans le charger en mémoire.
+    """
+
+    def __init__(self, path: str, start: int, end: int, headers: dict):
+        super().__init__(status_code=206, headers=headers)
+        self.path = path
+        self.start = start
+        self.end = end
+
+    async def __call__(self, scope, receive, send):
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if scope["method"].upper() == "HEAD":
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        remaining = self.end - self.start + 1
+        async with await anyio.open_file(self.path, mode="rb") as file:
+            await file.seek(self.start)
+            while remaining > 0:
+                chunk = await file.read(min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+        if remaining > 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+
+def file_download_response(request: Request, storage_key: str, filename: str) -> Response:
+    """
+    Réponse de téléchargement avec ETag, Last-Modified, requêtes conditionnelles
+    (304) et plages d'octets (206 / 416). La réponse complète passe par
+    FileResponse, qui utilise l'extension ASGI pathsend quand le serveur la propose.
+    Avec un backend objet (S3 / MinIO), redirige vers une URL pré-signée : le
+    stockage sert lui-même les octets, plages et requêtes conditionnelles.
+    """
+    if blobs.blob_hash(storage_key):
+        url = get_storage().presigned_url(storage_key, filename)
+        if url:
+            return RedirectResponse(url, status_code=307, headers={"cache-control": "no-store"})
+
+    path = blobs.resolve_path(storage_key)
+    if path is None:
+        raise FileNotFoundError(storage_key)
+    st = os.stat(path)
+    if not stat.S_ISREG(st.st_mode):
+        raise FileNotFoundError(path)
+
+    etag = _etag(storage_key, st)
+    headers = {
+        "etag": etag,
+        "last-modified": formatdate(st.st_mtime, usegmt=True),
+        "accept-ranges": "bytes",
+        "cache-control": "private, no-cache",
+    }
+
+    # 🔹 Requêtes conditionnelles : If-None-Match prime sur If-Modified-Since
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        if _etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers=headers)
+    elif _not_modified_since(request.headers.get("if-modified-since"), st.st_mtime):
+        return Response(status_code=304, headers=headers)
+
+    headers["content-disposition"] = _content_disposition(filename)
+
+    # 🔹 Plage d'octets (If-Range : seulement si la représentation n'a pas changé)
+    range_header = request.headers.get("range")
+    if range_header and _if_range_matches(request.headers.get("if-range"), etag, st.st_mtime):
+        try:
+            byte_range = _parse_range(range_header, st.st_size)
+        except ValueError:
+            byte_range = ()  # en-tête Range invalide : ignoré, réponse complète
+
+        if byte_range is None:
+            return Response(status_code=416, headers={**headers, "content-range": f"bytes */{st.st_size}"})
+
+        if byte_range:
+            start, end = byte_range
+            headers.update({
+                "content-range": f"bytes {start}-{end}/{st.st_size}",
+                "content-length": str(end - start + 1),
+                "content-type": "application/octet-stream",
+            })
+            return FileRangeResponse(path, start, end, headers=headers)
+
+    return FileResponse(
+        path=path,
+        filename=filename,
+        media_type="application/octet-stream",  # force le download
+        headers=headers,
+        stat_result=st,
+    )
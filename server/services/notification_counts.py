@@ -0,0 +1,116 @@
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import delete, event, func, insert, inspect, select, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from db.upsert import increment_row
+from models.notification import Notification
+from models.notification_counter import NotificationCounter
+
+
+def _apply_deltas(conn, deltas: Dict[int, int]) -> None:
+    for user_id, delta in sorted(deltas.items()):
+        if not delta:
+            continue
+        increment_row(
+            conn, NotificationCounter.__table__, {"user_id": user_id}, {"unread": delta}, {"unread": max(delta, 0)}
+        )
+
+
+def unread_counts(conn, user_ids: Iterable[int]) -> Dict[int, int]:
+    user_ids = list(user_ids)
+    counts = {user_id: 0 for user_id in user_ids}
+    counts.update(dict(conn.execute(
+        select(NotificationCounter.user_id, NotificationCounter.unread).where(NotificationCounter.user_id.in_(user_ids))
+    ).all()))
+    return counts
+
+
+def _remember_counts(session: Session, user_ids: Iterable[int]) -> None:
+    # Compteurs à jour, diffusés après le commit (services/notification_stream.py)
+    pending = session.info.setdefault("notification_events", {"created": [], "counts": {}})
+    pending["counts"].update(unread_counts(session.connection(), user_ids))
+
+
+@event.listens_for(Session, "after_flush")
+def _update_unread_counters(session: Session, flush_context) -> None:
+    """
+    Maintient notification_counters dans la transaction de l'écriture :
+    création non lue +1, passage à lu -1 (et inversement), suppression d'une non lue -1.
+    """
+    deltas: Dict[int, int] = defaultdict(int)
+    for obj in session.new:
+        if isinstance(obj, Notification):
+            deltas[obj.user_id] += 0 if obj.is_read else 1
+    for obj in session.dirty:
+        if isinstance(obj, Notification):
+            history = inspect(obj).attrs.is_read.history
+            if history.has_changes():
+                was_read = bool(history.deleted[0]) if history.deleted else False
+                deltas[obj.user_id] += int(was_read) - int(bool(obj.is_read))
+    for obj in session.deleted:
+        if isinstance(obj, Notification):
+            deltas[obj.user_id] -= 0 if obj.is_read else 1
+
+    if not deltas:
+        return
+    _apply_deltas(session.connection(), deltas)
+    _remember_counts(session, deltas.keys())
+
+
+def get_unread_count(db: Session, user_id: int) -> int:
+    counter = db.get(NotificationCounter, user_id)
+    return max(counter.unread, 0) if counter else 0
+
+
+def mark_read(db: Session, user_id: int, ids: Optional[List[int]] = None, before: Optional[datetime] = None) -> int:
+    """
+    Marque comme lues les notifications de `user_id` désignées par `ids` et/ou
+    créées avant `before`, en un seul UPDATE. Retourne le nombre de notifications modifiées.
+    """
+    statement = update(Notification).where(Notification.user_id == user_id, Notification.is_read == False)  # noqa: E712
+    if ids is not None:
+        statement = statement.where(Notification.id.in_(ids))
+    if before is not None:
+        statement = statement.where(Notification.created_at <= before)
+
+    updated = db.execute(
+        statement.values(is_read=True), execution_options={"synchronize_session": False}
+    ).rowcount
+    if updated:
+        _apply_deltas(db.connection(), {user_id: -updated})
+        _remember_counts(db, [user_id])
+    db.commit()
+    return updated
+
+
+def rebuild_notification_counters(db: Session) -> int:
+    """
+    Recalcule notification_counters à partir des notifications non lues.
+    Retourne le nombre de lignes écrites.
+    """
+    rows = (
+        db.query(Notification.user_id, func.count(Notification.id))
+        .filter(Notification.is_read == False)  # noqa: E712
+        .group_by(Notification.user_id)
+        .all()
+    )
+    db.execute(delete(NotificationCounter))
+    if rows:
+        db.execute(insert(NotificationCounter), [{"user_id": user_id, "unread": count} for user_id, count in rows])
+    db.commit()
+    return len(rows)
+
+
+def ensure_notification_counters(bind: Engine) -> None:
+    """
+    Construit les compteurs au premier démarrage (table vide alors qu'il existe des non lues).
+    """
+    with Session(bind=bind) as db:
+        if db.query(NotificationCounter.user_id).first() is None and (
+            db.query(Notification.id).filter(Notification.is_read == False).first() is not None  # noqa: E712
+        ):
+            rebuild_notification_counters(db)
@@ -0,0 +1,141 @@
+import asyncio
+import json
+import threading
+from collections import defaultdict
+from typing import AsyncIterator, Dict, Optional, Set, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from core.broker import get_broker
+from models.notification import Notification
+from schemas.notification import NotificationResponse
+
+NOTIFICATION_CHANNEL = "notifications.events"
+HEARTBEAT_SECONDS = 15
+QUEUE_SIZE = 100
+
+
+class NotificationHub:
+    """
+    Diffusion locale au processus : chaque connexion SSE ouverte possède une file
+    asyncio ; les événements reçus du broker (émis par n'importe quel worker)
+    sont remis aux connexions de l'utilisateur concerné.
+    """
+
+    def __init__(self):
+        self._subscribers: Dict[int, Set[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]]] = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def connect(self, user_id: int) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+        with self._lock:
+            self._subscribers[user_id].add((asyncio.get_running_loop(), queue))
+        return queue
+
+    def disconnect(self, user_id: int, queue: asyncio.Queue) -> None:
+        with self._lock:
+            subscribers = self._subscribers.get(user_id, set())
+            subscribers.difference_update({entry for entry in subscribers if entry[1] is queue})
+            if not subscribers:
+                self._subscribers.pop(user_id, None)
+
+    def connections(self) -> int:
+        with self._lock:
+            return sum(len(entries) for entries in self._subscribers.values())
+
+    def dispatch(self, message: dict) -> None:
+        # Appelé depuis n'importe quel thread (callback du broker)
+        with self._lock:
+            targets = list(self._subscribers.get(message["user_id"], ()))
+        for loop, queue in targets:
+            loop.call_soon_threadsafe(_offer, queue, message)
+
+
+def _offer(queue: asyncio.Queue, message: dict) -> None:
+    try:
+        queue.put_nowait(message)
+    except asyncio.QueueFull:
+        # Client trop lent : l'événement est perdu, le prochain unread_count le resynchronise
+        pass
+
+
+hub = NotificationHub()
+_unsubscribe = None
+
+
+def start_notification_hub() -> None:
+    global _unsubscribe
+    if _unsubscribe is None:
+        _unsubscribe = get_broker().subscribe(NOTIFICATION_CHANNEL, hub.dispatch)
+
+
+def publish_unread_counts(counts: Dict[int, int]) -> None:
+    broker = get_broker()
+    for user_id, count in counts.items():
+        broker.publish(NOTIFICATION_CHANNEL, {"user_id": user_id, "event": "unread_count", "data": {"count": count}})
+
+
+# 🔹 Nouvelles notifications -> événements après commit ; les compteurs de non-lues
+# sont ajoutés par services/notification_counts.py à chaque mise à jour
+@event.listens_for(Session, "after_flush")
+def _collect_notification_events(session: Session, flush_context) -> None:
+    created = [
+        {
+            "user_id": obj.user_id,
+            "event": "notification",
+            "data": NotificationResponse.model_validate(obj).model_dump(mode="json"),
+        }
+        for obj in session.new
+        if isinstance(obj, Notification)
+    ]
+    if created:
+        pending = session.info.setdefault("notification_events", {"created": [], "counts": {}})
+        pending["created"].extend(created)
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_notification_events(session: Session) -> None:
+    pending = session.info.pop("notification_events", None)
+    if not pending:
+        return
+    broker = get_broker()
+    for message in pending["created"]:
+        broker.publish(NOTIFICATION_CHANNEL, message)
+    publish_unread_counts(pending["counts"])
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_notification_events(session: Session) -> None:
+    session.info.pop("notification_events", None)
+
+
+def _sse(event_name: str, data: dict, event_id: Optional[int] = None) -> str:
+    lines = [f"event: {event_name}"]
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"data: {json.dumps(data)}")
+    return "\n".join(lines) + "\n\n"
+
+
+async def notification_events(request, user_id: int, unread_count: int) -> AsyncIterator[str]:
+    """
+    Flux SSE d'un utilisateur : compteur initial, puis nouvelles notifications et
+    changements du compteur ; un commentaire périodique garde la connexion ouverte.
+    """
+    queue = hub.connect(user_id)
+    try:
+        yield "retry: 5000\n\n"
+        yield _sse("unread_count", {"count": unread_count})
+        while True:
+            try:
+                message = await asyncio.wait_for(queue.get(), timeout=HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                if await request.is_disconnected():
+                    break
+                yield ": ping\n\n"
+                continue
+            event_id = message["data"].get("id") if message["event"] == "notification" else None
+            yield _sse(message["event"], message["data"], event_id)
+    finally:
+        hub.disconnect(user_id, queue)
@@ -0,0 +1,31 @@
+from typing import List, Optional
+
+from sqlalchemy.orm import Session
+
+from core.config import settings
+from core.jobs import enqueue, job_handler
+from models.notification import Notification
+from services.send_email import queue_user_email
+
+
+def notify(db: Session, user_id: int, title: str, message: str, type: str, link: Optional[str] = None) -> None:
+    """
+    Programme la création d'une notification dans la transaction courante :
+    elle sera écrite par un worker après le commit, hors du chemin de la requête.
+    """
+    enqueue(db, "notifications.create", {
+        "user_id": user_id,
+        "title": title,
+        "message": message,
+        "type": type,
+        "link": link,
+    })
+    # Copie email : immédiate ou regroupée dans le résumé selon les préférences
+    if settings.EMAIL_NOTIFICATIONS:
+        body = f"{message}\n\n{link}" if link else message
+        queue_user_email(db, user_id, title, body)
+
+
+@job_handler("notifications.create")
+def create_notifications(db: Session, payloads: List[dict]) -> None:
+    db.add_all([Notification(**payload) for payload in payloads])
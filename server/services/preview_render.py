@@ -0,0 +1,56 @@
+# Rendu des aperçus, exécuté dans les processus du pool de services/previews.py :
+# ce module n'importe que Pillow (et pypdfium2 s'il est installé) pour rester
+# léger au démarrage des processus.
+import io
+
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".gif", ".webp", ".bmp", ".tif", ".tiff"}
+PDF_EXTENSIONS = {".pdf"}
+
+
+def pdf_supported() -> bool:
+    try:
+        import pypdfium2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _first_pdf_page(path: str, max_size: int):
+    import pypdfium2 as pdfium
+
+    pdf = pdfium.PdfDocument(path)
+    try:
+        page = pdf[0]
+        width, height = page.get_size()
+        scale = max_size / max(width, height, 1)
+        return page.render(scale=max(scale, 0.1)).to_pil()
+    finally:
+        pdf.close()
+
+
+def render_preview(path: str, extension: str, max_size: int) -> bytes:
+    """
+    Retourne une miniature JPEG (côté max `max_size`) d'une image ou de la
+    première page d'un PDF.
+    """
+    from PIL import Image, ImageOps
+
+    if extension in PDF_EXTENSIONS:
+        image = _first_pdf_page(path, max_size)
+    else:
+        image = Image.open(path)
+        # Décodage JPEG réduit : inutile de décompresser l'image en pleine résolution
+        image.draft("RGB", (max_size, max_size))
+        image = ImageOps.exif_transpose(image)
+
+    if image.mode not in ("RGB", "L"):
+        background = Image.new("RGB", image.size, "white")
+        rgba = image.convert("RGBA")
+        background.paste(rgba, mask=rgba.split()[-1])
+        image = background
+    image.thumbnail((max_size, max_size))
+
+    out = io.BytesIO()
+    image.convert("RGB").save(out, format="JPEG", quality=80, optimize=True)
+    return out.getvalue()
+
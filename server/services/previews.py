@@ -0,0 +1,165 @@
+import logging
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
+from typing import Dict, Iterable, Optional, Tuple
+
+from fastapi import HTTPException, Request
+from starlette.responses import FileResponse, JSONResponse, RedirectResponse, Response
+
+from core.config import settings
+from services import blobs
+from services.preview_render import IMAGE_EXTENSIONS, PDF_EXTENSIONS, pdf_supported, render_preview
+from services.storage import get_storage
+from services.uploads import STAGING_DIR
+
+logger = logging.getLogger(__name__)
+
+# 🔹 Le rendu (décodage d'images, rasterisation PDF) est coûteux en CPU : il tourne
+# dans un pool de processus ; des threads coordinateurs préparent la source,
+# attendent le rendu et rangent le résultat dans le stockage.
+_process_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+_coordinator = ThreadPoolExecutor(max_workers=settings.PREVIEW_WORKERS, thread_name_prefix="preview")
+_pending: set = set()
+# Rendus en échec (fichier corrompu...), par contenu : pas de nouvelle tentative à chaque
+# consultation pendant PREVIEW_RETRY_SECONDS ; borné aux PREVIEW_FAILED_MAX plus récents
+_failed: "OrderedDict[str, float]" = OrderedDict()
+_stats_lock = threading.Lock()
+_stats = {"scheduled": 0, "generated": 0, "failed": 0}
+
+
+@lru_cache(maxsize=1)
+def _pdf_enabled() -> bool:
+    return pdf_supported()
+
+
+def preview_key(storage_key: str) -> str:
+    return storage_key + blobs.PREVIEW_SUFFIX
+
+
+def previewable_extension(filename: str) -> Optional[str]:
+    extension = os.path.splitext(filename)[1].lower()
+    if extension in IMAGE_EXTENSIONS or (extension in PDF_EXTENSIONS and _pdf_enabled()):
+        return extension
+    return None
+
+
+def _get_process_pool() -> ProcessPoolExecutor:
+    global _process_pool
+    with _pool_lock:
+        if _process_pool is None:
+            # "spawn" : pas de fork d'un processus qui a déjà des threads et des connexions
+            _process_pool = ProcessPoolExecutor(
+                max_workers=settings.PREVIEW_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _process_pool
+
+
+def preview_stats() -> Dict[str, int]:
+    with _stats_lock:
+        return {**_stats, "pending": len(_pending), "workers": settings.PREVIEW_WORKERS}
+
+
+def _count(name: str) -> None:
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def _recently_failed(storage_key: str) -> bool:
+    # Appelé sous _stats_lock
+    failed_at = _failed.get(storage_key)
+    if failed_at is None:
+        return False
+    if time.monotonic() - failed_at >= settings.PREVIEW_RETRY_SECONDS:
+        del _failed[storage_key]
+        return False
+    return True
+
+
+def _generate(storage_key: str, extension: str) -> None:
+    storage = get_storage()
+    key = preview_key(storage_key)
+    try:
+        if storage.exists(key):
+            return
+
+        with blobs.local_copy(storage_key) as path:
+            data = _get_process_pool().submit(render_preview, path, extension, settings.PREVIEW_MAX_SIZE).result()
+
+        os.makedirs(STAGING_DIR, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=STAGING_DIR)
+        with os.fdopen(fd, "wb") as out:
+            out.write(data)
+        storage.put_file(key, temp_path)
+        _count("generated")
+    except Exception:
+        with _stats_lock:
+            _failed[storage_key] = time.monotonic()
+            _failed.move_to_end(storage_key)
+            while len(_failed) > settings.PREVIEW_FAILED_MAX:
+                _failed.popitem(last=False)
+        _count("failed")
+        logger.warning("Preview generation failed for %s", storage_key, exc_info=True)
+    finally:
+        with _stats_lock:
+            _pending.discard(storage_key)
+
+
+def schedule_previews(files: Iterable[Tuple[str, str]]) -> int:
+    """
+    Planifie la génération des aperçus pour des couples (storage_key, filename),
+    sans attendre le rendu. Retourne le nombre de tâches planifiées. Un nouvel
+    upload d'un contenu en échec relance le rendu.
+    """
+    scheduled = 0
+    for storage_key, filename in files:
+        extension = previewable_extension(filename)
+        if extension is None or not blobs.blob_hash(storage_key):
+            continue
+        with _stats_lock:
+            if storage_key in _pending:
+                continue
+            _failed.pop(storage_key, None)
+            _pending.add(storage_key)
+            _stats["scheduled"] += 1
+        _coordinator.submit(_generate, storage_key, extension)
+        scheduled += 1
+    return scheduled
+
+
+def preview_response(request: Request, storage_key: str, filename: str) -> Response:
+    """
+    Sert la miniature d'un fichier : 200 (ou 304) si elle existe, redirection
+    vers une URL pré-signée avec un backend objet, 202 si elle est en cours de
+    génération, 404 si le format n'a pas d'aperçu.
+    """
+    with _stats_lock:
+        failed = _recently_failed(storage_key)
+    if previewable_extension(filename) is None or not blobs.blob_hash(storage_key) or failed:
+        raise HTTPException(status_code=404, detail="No preview available for this file")
+
+    storage = get_storage()
+    key = preview_key(storage_key)
+    if not storage.exists(key):
+        # Fichiers antérieurs ou génération perdue au redémarrage : rattrapage à la demande
+        schedule_previews([(storage_key, filename)])
+        return JSONResponse({"detail": "Preview is being generated"}, status_code=202, headers={"Retry-After": "2"})
+
+    preview_name = os.path.splitext(filename)[0] + ".jpg"
+    url = storage.presigned_url(key, preview_name, media_type="image/jpeg")
+    if url:
+        return RedirectResponse(url, status_code=307, headers={"cache-control": "no-store"})
+
+    # Contenu adressé par hash : l'aperçu d'un blob ne change jamais
+    etag = f'"{blobs.blob_hash(storage_key)}-preview"'
+    headers = {"etag": etag, "cache-control": "private, max-age=86400"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return FileResponse(storage.local_path(key), media_type="image/jpeg", headers=headers)
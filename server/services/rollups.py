@@ -0,0 +1,197 @@
+from collections import defaultdict
+from typing import Dict, Tuple
+
+from sqlalchemy import case, delete, event, func, inspect, insert, or_
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session
+
+from db.upsert import increment_row
+from models.dashboard_rollup import DashboardRollup
+from models.delivery import Delivery
+from models.nce import NCE, NCEStatus
+from models.survey import Survey, SurveyType
+from models.user import UserRole
+from core.user_cache import CurrentUser
+
+GLOBAL = ("global", 0)
+
+ROLLUP_COUNTERS = (
+    "total_deliveries", "total_nces", "open_nces",
+    "nps_sum", "nps_count", "csat_sum", "csat_count",
+)
+
+Deltas = Dict[Tuple[str, int], Dict[str, int]]
+
+
+def _scopes(user_id):
+    return (GLOBAL, ("user", user_id)) if user_id is not None else (GLOBAL,)
+
+
+def _add(deltas: Deltas, user_id, **counters) -> None:
+    for scope in _scopes(user_id):
+        for name, value in counters.items():
+            if value:
+                deltas[scope][name] += value
+
+
+def _old_new(obj, attr: str):
+    history = inspect(obj).attrs[attr].history
+    old = history.deleted[0] if history.deleted else None
+    new = history.added[0] if history.added else None
+    return history.has_changes(), old, new
+
+
+def _survey_counters(survey_type, score, sign: int) -> dict:
+    if score is None:
+        return {}
+    prefix = "nps" if survey_type == SurveyType.NPS else "csat"
+    return {f"{prefix}_sum": sign * score, f"{prefix}_count": sign}
+
+
+def _is_open(status) -> int:
+    return int(status in (None, NCEStatus.OPEN))
+
+
+def _collect_deltas(session: Session) -> Deltas:
+    deltas: Deltas = defaultdict(lambda: defaultdict(int))
+
+    for obj in session.new:
+        if isinstance(obj, Delivery):
+            _add(deltas, obj.created_by, total_deliveries=1)
+        elif isinstance(obj, NCE):
+            _add(deltas, obj.created_by, total_nces=1, open_nces=_is_open(obj.status))
+        elif isinstance(obj, Survey):
+            _add(deltas, obj.user_id, **_survey_counters(obj.survey_type, obj.score, 1))
+
+    for obj in session.dirty:
+        if isinstance(obj, NCE):
+            changed, old, new = _old_new(obj, "status")
+            if changed:
+                _add(deltas, obj.created_by, open_nces=_is_open(new) - _is_open(old))
+        elif isinstance(obj, Survey):
+            changed, old, new = _old_new(obj, "score")
+            if changed:
+                _add(deltas, obj.user_id, **_survey_counters(obj.survey_type, old, -1))
+                _add(deltas, obj.user_id, **_survey_counters(obj.survey_type, new, 1))
+
+    for obj in session.deleted:
+        if isinstance(obj, Delivery):
+            _add(deltas, obj.created_by, total_deliveries=-1)
+        elif isinstance(obj, NCE):
+            _add(deltas, obj.created_by, total_nces=-1, open_nces=-_is_open(obj.status))
+        elif isinstance(obj, Survey):
+            _add(deltas, obj.user_id, **_survey_counters(obj.survey_type, obj.score, -1))
+
+    return deltas
+
+
+def _apply(conn: Connection, scope: Tuple[str, int], counters: Dict[str, int]) -> None:
+    counters = {name: value for name, value in counters.items() if value}
+    if not counters:
+        return
+
+    scope_name, scope_id = scope
+    # Upsert atomique : la première écriture concurrente d'un scope ne viole plus uq_dashboard_rollups_scope
+    increment_row(
+        conn, DashboardRollup.__table__,
+        {"scope": scope_name, "scope_id": scope_id},
+        counters,
+        {name: counters.get(name, 0) for name in ROLLUP_COUNTERS},
+    )
+
+
+@event.listens_for(Session, "after_flush")
+def _update_rollups(session: Session, flush_context) -> None:
+    """
+    Répercute les écritures Delivery / NCE / Survey sur dashboard_rollups, dans la même transaction.
+    """
+    deltas = _collect_deltas(session)
+    if not deltas:
+        return
+
+    conn = session.connection()
+    for scope in sorted(deltas):
+        _apply(conn, scope, deltas[scope])
+
+
+def rebuild_rollups(db: Session) -> int:
+    """
+    Recalcule entièrement dashboard_rollups à partir des tables sources.
+    Retourne le nombre de lignes écrites.
+    """
+    totals: Deltas = defaultdict(lambda: defaultdict(int))
+
+    for user_id, count in db.query(Delivery.created_by, func.count(Delivery.id)).group_by(Delivery.created_by):
+        _add(totals, user_id, total_deliveries=count)
+
+    open_case = case((NCE.status == NCEStatus.OPEN, 1), else_=0)
+    nce_rows = db.query(NCE.created_by, func.count(NCE.id), func.sum(open_case)).group_by(NCE.created_by)
+    for user_id, count, open_count in nce_rows:
+        _add(totals, user_id, total_nces=count, open_nces=open_count or 0)
+
+    survey_rows = (
+        db.query(Survey.user_id, Survey.survey_type, func.sum(Survey.score), func.count(Survey.score))
+        .filter(Survey.score.isnot(None))
+        .group_by(Survey.user_id, Survey.survey_type)
+    )
+    for user_id, survey_type, score_sum, score_count in survey_rows:
+        prefix = "nps" if survey_type == SurveyType.NPS else "csat"
+        _add(totals, user_id, **{f"{prefix}_sum": score_sum or 0, f"{prefix}_count": score_count})
+
+    totals[GLOBAL]  # la ligne globale existe toujours, même vide
+
+    db.execute(delete(DashboardRollup))
+    db.execute(
+        insert(DashboardRollup),
+        [
+            {"scope": scope, "scope_id": scope_id, **{name: counters.get(name, 0) for name in ROLLUP_COUNTERS}}
+            for (scope, scope_id), counters in sorted(totals.items())
+        ],
+    )
+    db.commit()
+    return len(totals)
+
+
+def ensure_rollups(bind: Engine) -> None:
+    """
+    Construit les rollups au premier démarrage (table vide).
+    """
+    with Session(bind=bind) as db:
+        if db.query(DashboardRollup.id).first() is None:
+            rebuild_rollups(db)
+
+
+def dashboard_stats(db: Session, user: CurrentUser) -> dict:
+    rows = {
+        (row.scope, row.scope_id): row
+        for row in db.query(DashboardRollup).filter(
+            or_(
+                (DashboardRollup.scope == GLOBAL[0]) & (DashboardRollup.scope_id == GLOBAL[1]),
+                (DashboardRollup.scope == "user") & (DashboardRollup.scope_id == user.id),
+            )
+        )
+    }
+    empty = DashboardRollup(**{name: 0 for name in ROLLUP_COUNTERS})
+    global_row = rows.get(GLOBAL, empty)
+    user_row = rows.get(("user", user.id), empty)
+
+    if user.role in [UserRole.ADMIN, UserRole.QUALITY]:
+        total_deliveries = global_row.total_deliveries
+        total_nces = global_row.total_nces
+    elif user.role == UserRole.PRODUCER:
+        total_deliveries = user_row.total_deliveries
+        total_nces = user_row.total_nces
+    else:
+        total_deliveries = 0
+        total_nces = user_row.total_nces
+
+    avg_nps = global_row.nps_sum / global_row.nps_count if global_row.nps_count else 0
+    avg_csat = global_row.csat_sum / global_row.csat_count if global_row.csat_count else 0
+
+    return {
+        "total_deliveries": total_deliveries,
+        "total_nces": total_nces,
+        "open_nces": global_row.open_nces,
+        "avg_nps": round(avg_nps, 2),
+        "avg_csat": round(avg_csat, 2)
+    }
@@ -0,0 +1,134 @@
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+from sqlalchemy import delete
+from sqlalchemy.orm import Session
+
+from core.config import settings
+from core.jobs import enqueue, job_handler
+from lib.email import build_message, send_batch
+from models.email_preference import EmailDigestItem, EmailPreference
+from models.user import User
+
+logger = logging.getLogger(__name__)
+
+
+def queue_user_email(db: Session, user_id: int, subject: str, body: str, attempt: int = 0, delay: float = 0) -> None:
+    """
+    Programme un email pour `user_id` dans la transaction courante. Le worker
+    l'envoie tout de suite ou le range dans le prochain résumé de l'utilisateur.
+    """
+    enqueue(db, "email.user", {"user_id": user_id, "subject": subject, "body": body, "attempt": attempt}, delay=delay)
+
+
+def _retry_later(db: Session, payload: dict) -> None:
+    # Envoi en échec : nouvelle tâche avec backoff (le reste du lot est parti, pas de doublon)
+    attempt = payload.get("attempt", 0) + 1
+    if attempt >= settings.JOB_MAX_ATTEMPTS:
+        logger.error("Email to user %s dropped after %s attempts", payload["user_id"], attempt)
+        return
+    delay = min(settings.JOB_BACKOFF_MAX, settings.JOB_BACKOFF_BASE * 2 ** attempt)
+    queue_user_email(db, payload["user_id"], payload["subject"], payload["body"], attempt=attempt, delay=delay)
+
+
+def _schedule_digest(db: Session, preference: EmailPreference) -> None:
+    if preference.next_digest_at is not None:
+        return
+    preference.next_digest_at = datetime.utcnow() + timedelta(minutes=preference.digest_minutes)
+    enqueue(db, "email.digest", {"user_id": preference.user_id}, delay=preference.digest_minutes * 60)
+
+
+@job_handler("email.user")
+def send_user_emails(db: Session, payloads: List[dict]) -> None:
+    user_ids = {payload["user_id"] for payload in payloads}
+    emails: Dict[int, str] = dict(db.query(User.id, User.email).filter(User.id.in_(user_ids), User.is_active == True).all())  # noqa: E712
+    preferences = {
+        preference.user_id: preference
+        for preference in db.query(EmailPreference).filter(EmailPreference.user_id.in_(user_ids)).all()
+    }
+
+    immediate: List[dict] = []
+    for payload in payloads:
+        user_id = payload["user_id"]
+        if user_id not in emails:
+            continue
+        preference = preferences.get(user_id)
+        if preference is not None and preference.digest_minutes > 0:
+            db.add(EmailDigestItem(user_id=user_id, subject=payload["subject"], body=payload["body"]))
+            _schedule_digest(db, preference)
+        else:
+            immediate.append(payload)
+
+    messages = [build_message(emails[p["user_id"]], p["subject"], p["body"]) for p in immediate]
+    for index in send_batch(messages):
+        _retry_later(db, immediate[index])
+
+
+def _digest_body(items: List[EmailDigestItem]) -> str:
+    lines = [f"You have {len(items)} new notifications:", ""]
+    for item in items:
+        lines.append(f"- {item.subject}")
+        lines.extend(f"  {line}" for line in item.body.splitlines() if line.strip())
+        lines.append("")
+    return "\n".join(lines)
+
+
+@job_handler("email.digest")
+def send_digests(db: Session, payloads: List[dict]) -> None:
+    user_ids = {payload["user_id"] for payload in payloads}
+    emails: Dict[int, str] = dict(db.query(User.id, User.email).filter(User.id.in_(user_ids)).all())
+    items_by_user: Dict[int, List[EmailDigestItem]] = defaultdict(list)
+    for item in (
+        db.query(EmailDigestItem)
+        .filter(EmailDigestItem.user_id.in_(user_ids))
+        .order_by(EmailDigestItem.created_at, EmailDigestItem.id)
+    ):
+        items_by_user[item.user_id].append(item)
+
+    batch = [(user_id, items) for user_id, items in items_by_user.items() if user_id in emails]
+    messages = [
+        build_message(emails[user_id], f"QualityTracker: {len(items)} new notifications", _digest_body(items))
+        for user_id, items in batch
+    ]
+    failed = set(send_batch(messages))
+
+    for index, (user_id, items) in enumerate(batch):
+        if index in failed:
+            # Les éléments restent en attente : nouvelle tentative plus tard
+            enqueue(db, "email.digest", {"user_id": user_id}, delay=settings.JOB_BACKOFF_BASE * 60)
+            continue
+        db.execute(delete(EmailDigestItem).where(EmailDigestItem.id.in_([item.id for item in items])))
+
+    # Prochain résumé programmé au prochain email ; sauf échec, on libère le créneau
+    retrying = {batch[index][0] for index in failed}
+    for preference in db.query(EmailPreference).filter(EmailPreference.user_id.in_(user_ids - retrying)):
+        preference.next_digest_at = None
+    db.flush()
+
+    # Emails arrivés pendant l'envoi : ils attendent le résumé suivant
+    remaining = {
+        user_id for (user_id,) in db.query(EmailDigestItem.user_id).filter(
+            EmailDigestItem.user_id.in_(user_ids - retrying)
+        ).distinct()
+    }
+    for preference in db.query(EmailPreference).filter(EmailPreference.user_id.in_(remaining)):
+        _schedule_digest(db, preference)
+
+
+def get_email_preference(db: Session, user_id: int) -> EmailPreference:
+    preference = db.get(EmailPreference, user_id)
+    return preference or EmailPreference(user_id=user_id, digest_minutes=0)
+
+
+def set_digest_minutes(db: Session, user_id: int, digest_minutes: int) -> EmailPreference:
+    preference = db.get(EmailPreference, user_id)
+    if preference is None:
+        preference = EmailPreference(user_id=user_id, digest_minutes=digest_minutes)
+        db.add(preference)
+    else:
+        preference.digest_minutes = digest_minutes
+    db.commit()
+    db.refresh(preference)
+    return preference
@@ -0,0 +1,218 @@
+import io
+import os
+import threading
+from typing import BinaryIO, Dict, Optional
+from urllib.parse import quote
+
+from core.config import settings
+
+LOCAL_ROOT = os.path.join("uploads", "blobs")
+
+
+class StorageBackend:
+    """
+    Stockage des blobs : les clés sont les storage_key "sha256/ab/cd/<sha256>".
+    """
+
+    def exists(self, key: str) -> bool:
+        raise NotImplementedError
+
+    def put_file(self, key: str, source_path: str) -> None:
+        """Range le fichier local `source_path` sous `key` (le fichier source est consommé)."""
+        raise NotImplementedError
+
+    def open(self, key: str) -> BinaryIO:
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    def size(self, key: str) -> int:
+        raise NotImplementedError
+
+    def local_path(self, key: str) -> Optional[str]:
+        """Chemin disque si le backend est local (service direct par le serveur), sinon None."""
+        return None
+
+    def presigned_url(self, key: str, filename: str, media_type: Optional[str] = None) -> Optional[str]:
+        """
+        URL de téléchargement temporaire si le backend en propose, sinon None.
+        Avec `media_type`, le contenu est servi en ligne (aperçus) plutôt qu'en pièce jointe.
+        """
+        return None
+
+
+class LocalStorage(StorageBackend):
+    def __init__(self, root: str):
+        self.root = root
+
+    def local_path(self, key: str) -> str:
+        # "sha256/ab/cd/<sha256>" -> <root>/ab/cd/<sha256>
+        return os.path.join(self.root, *key.split("/")[1:])
+
+    def exists(self, key: str) -> bool:
+        return os.path.exists(self.local_path(key))
+
+    def put_file(self, key: str, source_path: str) -> None:
+        path = self.local_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(source_path, path)
+
+    def open(self, key: str) -> BinaryIO:
+        return open(self.local_path(key), "rb")
+
+    def delete(self, key: str) -> None:
+        try:
+            os.remove(self.local_path(key))
+        except FileNotFoundError:
+            pass
+
+    def size(self, key: str) -> int:
+        return os.path.getsize(self.local_path(key))
+
+
+class S3Storage(StorageBackend):
+    """
+    Backend S3 / MinIO : envois multipart (boto3 TransferConfig) et téléchargements
+    par URL pré-signée, pour que les workers de l'API ne relaient pas les octets.
+    """
+
+    def __init__(self, endpoint: str, public_endpoint: str, access_key: str, secret_key: str,
+                 bucket: str, secure: bool, presign_ttl: int):
+        import boto3
+        from boto3.s3.transfer import TransferConfig
+        from botocore.client import Config
+
+        scheme = "https" if secure else "http"
+        options = dict(
+            aws_access_key_id=access_key,
+            aws_secret_access_key=secret_key,
+            config=Config(signature_version="s3v4", s3={"addressing_style": "path"}),
+        )
+        self.client = boto3.client("s3", endpoint_url=f"{scheme}://{endpoint}", **options)
+        # Les URL pré-signées doivent viser l'adresse publique (le navigateur y accède directement)
+        self.presign_client = boto3.client("s3", endpoint_url=f"{scheme}://{public_endpoint}", **options)
+        self.bucket = bucket
+        self.presign_ttl = presign_ttl
+        self.transfer_config = TransferConfig(multipart_threshold=8 * 1024 * 1024, multipart_chunksize=8 * 1024 * 1024)
+
+    def exists(self, key: str) -> bool:
+        from botocore.exceptions import ClientError
+
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=key)
+        except ClientError as exc:
+            if exc.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
+        return True
+
+    def put_file(self, key: str, source_path: str) -> None:
+        self.client.upload_file(source_path, self.bucket, key, Config=self.transfer_config)
+        os.remove(source_path)
+
+    def open(self, key: str) -> BinaryIO:
+        from botocore.exceptions import ClientError
+
+        try:
+            return self.client.get_object(Bucket=self.bucket, Key=key)["Body"]
+        except ClientError as exc:
+            if exc.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                raise FileNotFoundError(key) from exc
+            raise
+
+    def delete(self, key: str) -> None:
+        self.client.delete_object(Bucket=self.bucket, Key=key)
+
+    def size(self, key: str) -> int:
+        return self.client.head_object(Bucket=self.bucket, Key=key)["ContentLength"]
+
+    def presigned_url(self, key: str, filename: str, media_type: Optional[str] = None) -> str:
+        disposition = "inline" if media_type else "attachment"
+        return self.presign_client.generate_presigned_url(
+            "get_object",
+            Params={
+                "Bucket": self.bucket,
+                "Key": key,
+                "ResponseContentDisposition": f"{disposition}; filename*=utf-8''{quote(filename)}",
+                "ResponseContentType": media_type or "application/octet-stream",
+            },
+            ExpiresIn=self.presign_ttl,
+        )
+
+
+class MemoryStorage(StorageBackend):
+    """
+    Stockage objet en mémoire, réservé aux tests : même contrat que S3Storage
+    (pas de chemin local, téléchargements par URL pré-signée). Ses URL
+    memory:// ne sont pas servies : il n'est pas proposé par STORAGE_BACKEND,
+    on l'installe avec set_storage(MemoryStorage()).
+    """
+
+    def __init__(self):
+        self.objects: Dict[str, bytes] = {}
+        self._lock = threading.Lock()
+
+    def exists(self, key: str) -> bool:
+        with self._lock:
+            return key in self.objects
+
+    def put_file(self, key: str, source_path: str) -> None:
+        with open(source_path, "rb") as src:
+            data = src.read()
+        with self._lock:
+            self.objects[key] = data
+        os.remove(source_path)
+
+    def open(self, key: str) -> BinaryIO:
+        with self._lock:
+            if key not in self.objects:
+                raise FileNotFoundError(key)
+            return io.BytesIO(self.objects[key])
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self.objects.pop(key, None)
+
+    def size(self, key: str) -> int:
+        with self._lock:
+            if key not in self.objects:
+                raise FileNotFoundError(key)
+            return len(self.objects[key])
+
+    def presigned_url(self, key: str, filename: str, media_type: Optional[str] = None) -> str:
+        disposition = "inline" if media_type else "attachment"
+        return f"memory://{key}?response-content-disposition={quote(f'{disposition}; filename={filename}')}"
+
+
+_storage: Optional[StorageBackend] = None
+
+
+def create_storage(backend: str) -> StorageBackend:
+    if backend == "local":
+        return LocalStorage(LOCAL_ROOT)
+    if backend == "s3":
+        return S3Storage(
+            endpoint=settings.MINIO_ENDPOINT,
+            public_endpoint=settings.MINIO_PUBLIC_ENDPOINT or settings.MINIO_ENDPOINT,
+            access_key=settings.MINIO_ACCESS_KEY,
+            secret_key=settings.MINIO_SECRET_KEY,
+            bucket=settings.MINIO_BUCKET,
+            secure=settings.MINIO_SECURE,
+            presign_ttl=settings.STORAGE_PRESIGN_TTL,
+        )
+    raise ValueError(f"Unsupported STORAGE_BACKEND: {backend}")
+
+
+def get_storage() -> StorageBackend:
+    global _storage
+    if _storage is None:
+        _storage = create_storage(settings.STORAGE_BACKEND)
+    return _storage
+
+
+def set_storage(storage: StorageBackend) -> None:
+    """Remplace le backend de stockage (ex. MemoryStorage pour les tests)."""
+    global _storage
+    _storage = storage
+
@@ -0,0 +1,101 @@
+import os
+import re
+import zipfile
+from typing import Iterator, Optional
+from xml.etree import ElementTree
+
+# Texte conservé par pièce jointe : au-delà, l'index grossit sans améliorer la recherche
+MAX_TEXT_CHARS = 200_000
+
+TEXT_EXTENSIONS = {".txt", ".md", ".csv", ".tsv", ".log", ".json", ".xml", ".html", ".htm", ".yaml", ".yml"}
+
+# Documents bureautiques (archives ZIP de XML) : membres contenant le texte
+_OFFICE_MEMBERS = {
+    ".docx": re.compile(r"^word/(document|header\d*|footer\d*|footnotes|endnotes)\.xml$"),
+    ".xlsx": re.compile(r"^xl/sharedStrings\.xml$"),
+    ".pptx": re.compile(r"^ppt/(slides/slide\d+|notesSlides/notesSlide\d+)\.xml$"),
+    ".odt": re.compile(r"^content\.xml$"),
+    ".ods": re.compile(r"^content\.xml$"),
+    ".odp": re.compile(r"^content\.xml$"),
+}
+# Éléments qui terminent un paragraphe / une cellule : on y insère un espace
+_BREAK_TAGS = {"p", "tab", "br", "tr", "tc", "si", "table-cell"}
+
+
+def _read_text(path: str) -> str:
+    with open(path, "rb") as src:
+        raw = src.read(MAX_TEXT_CHARS * 4)
+    for encoding in ("utf-8", "cp1252"):
+        try:
+            return raw.decode(encoding)
+        except UnicodeDecodeError:
+            continue
+    return raw.decode("utf-8", errors="ignore")
+
+
+def _xml_text(stream) -> Iterator[str]:
+    for _, element in ElementTree.iterparse(stream, events=("end",)):
+        if element.text:
+            yield element.text
+        if element.tag.rsplit("}", 1)[-1] in _BREAK_TAGS:
+            yield " "
+        element.clear()
+
+
+def _office_text(path: str, members: "re.Pattern") -> Iterator[str]:
+    with zipfile.ZipFile(path) as archive:
+        for name in sorted(archive.namelist()):
+            if members.match(name):
+                with archive.open(name) as stream:
+                    yield from _xml_text(stream)
+                yield "\n"
+
+
+def _pdf_text(path: str) -> Iterator[str]:
+    import pypdfium2 as pdfium
+
+    pdf = pdfium.PdfDocument(path)
+    try:
+        for page in pdf:
+            yield page.get_textpage().get_text_range()
+            yield "\n"
+    finally:
+        pdf.close()
+
+
+def _bounded(parts: Iterator[str]) -> str:
+    chunks, size = [], 0
+    for part in parts:
+        chunks.append(part)
+        size += len(part)
+        if size >= MAX_TEXT_CHARS:
+            break
+    return "".join(chunks)[:MAX_TEXT_CHARS]
+
+
+def extract_text(path: str, filename: str) -> Optional[str]:
+    """
+    Extrait le texte d'une pièce jointe (texte brut, Office / OpenDocument,
+    PDF si pypdfium2 est installé). Retourne None pour un format non géré.
+    """
+    extension = os.path.splitext(filename)[1].lower()
+
+    if extension in TEXT_EXTENSIONS:
+        text = _read_text(path)
+    elif extension in _OFFICE_MEMBERS:
+        text = _bounded(_office_text(path, _OFFICE_MEMBERS[extension]))
+    elif extension == ".pdf":
+        try:
+            text = _bounded(_pdf_text(path))
+        except ImportError:
+            return None
+    else:
+        return None
+
+    # Espaces normalisés : le texte ne sert qu'à l'index
+    return re.sub(r"\s+", " ", text).strip()[:MAX_TEXT_CHARS]
+
+
+def extractable(filename: str) -> bool:
+    extension = os.path.splitext(filename)[1].lower()
+    return extension in TEXT_EXTENSIONS or extension in _OFFICE_MEMBERS or extension == ".pdf"
@@ -0,0 +1,134 @@
+import hashlib
+import os
+import uuid
+from dataclasses import dataclass
+from typing import BinaryIO, List, Tuple
+
+from fastapi import HTTPException, UploadFile
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse
+
+from core.config import settings
+
+CHUNK_SIZE = 1024 * 1024
+STAGING_DIR = os.path.join("uploads", "tmp")
+
+
+@dataclass
+class StagedUpload:
+    """Fichier reçu, copié sur disque en zone de transit, avec sa taille et son SHA-256."""
+    filename: str
+    temp_path: str
+    size: int
+    sha256: str
+
+
+class _TooLarge(Exception):
+    pass
+
+
+def _too_large(detail: str) -> HTTPException:
+    return HTTPException(status_code=413, detail=detail)
+
+
+def _stream_to_disk(src: BinaryIO, dest_path: str, max_bytes: int) -> Tuple[int, str]:
+    # Exécuté dans le threadpool : copie par blocs, mémoire bornée à CHUNK_SIZE
+    digest = hashlib.sha256()
+    size = 0
+    src.seek(0)
+    with open(dest_path, "wb") as out:
+        while True:
+            chunk = src.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            size += len(chunk)
+            if size > max_bytes:
+                raise _TooLarge()
+            digest.update(chunk)
+            out.write(chunk)
+    return size, digest.hexdigest()
+
+
+def _remove(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def discard(staged: List[StagedUpload]) -> None:
+    for item in staged:
+        _remove(item.temp_path)
+
+
+async def stage_uploads(files: List[UploadFile]) -> List[StagedUpload]:
+    """
+    Copie chaque fichier uploadé en zone de transit, hors de la boucle d'événements,
+    en calculant taille et SHA-256 au fil de l'eau. Lève 413 si un fichier dépasse
+    MAX_UPLOAD_FILE_BYTES ou si le total dépasse MAX_UPLOAD_REQUEST_BYTES.
+    """
+    os.makedirs(STAGING_DIR, exist_ok=True)
+    staged: List[StagedUpload] = []
+    remaining = settings.MAX_UPLOAD_REQUEST_BYTES
+
+    try:
+        for uploaded_file in files:
+            temp_path = os.path.join(STAGING_DIR, uuid.uuid4().hex)
+            limit = min(settings.MAX_UPLOAD_FILE_BYTES, remaining)
+            try:
+                size, sha256 = await run_in_threadpool(_stream_to_disk, uploaded_file.file, temp_path, limit)
+            except _TooLarge:
+                _remove(temp_path)
+                if limit < settings.MAX_UPLOAD_FILE_BYTES:
+                    raise _too_large("Upload exceeds the per-request size limit")
+                raise _too_large(f"File '{uploaded_file.filename}' exceeds the per-file size limit")
+
+            remaining -= size
+            staged.append(StagedUpload(
+                filename=os.path.basename(uploaded_file.filename or "file"),
+                temp_path=temp_path,
+                size=size,
+                sha256=sha256,
+            ))
+    except BaseException:
+        discard(staged)
+        raise
+
+    return staged
+
+
+class RequestSizeLimitMiddleware:
+    """
+    Refuse (413) les corps de requête plus gros que MAX_UPLOAD_REQUEST_BYTES,
+    avant même le parsing multipart : d'après Content-Length si présent,
+    sinon en comptant les octets reçus.
+    """
+
+    def __init__(self, app, max_bytes: int):
+        self.app = app
+        self.max_bytes = max_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers") or [])
+        content_length = headers.get(b"content-length")
+        if content_length is not None and content_length.isdigit() and int(content_length) > self.max_bytes:
+            await JSONResponse({"detail": "Request body too large"}, status_code=413)(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    # Remonte jusqu'aux exception handlers de FastAPI -> réponse 413
+                    raise _too_large("Request body too large")
+            return message
+
+        await self.app(scope, limited_receive, send)
@@ -0,0 +1,87 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+# 🔹 Base SQLite jetable, stockage en mémoire, pas de worker de tâches : à fixer
+# avant le premier import de l'application (settings lus à l'import)
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+WORK_DIR = tempfile.mkdtemp(prefix="quality-tracker-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(WORK_DIR, 'test.db')}"
+os.environ["JOB_WORKERS"] = "0"
+os.environ["EMAIL_NOTIFICATIONS"] = "false"
+sys.path.insert(0, SERVER_DIR)
+# uploads/ (zone de transit) est relatif au répertoire courant
+os.chdir(WORK_DIR)
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+import models  # noqa: E402,F401
+from core.security import create_access_token  # noqa: E402
+from db.session import SessionLocal, engine  # noqa: E402
+from models.delivery import Delivery  # noqa: E402
+from models.project import Project  # noqa: E402
+from models.user import User, UserRole  # noqa: E402
+from services.storage import MemoryStorage, set_storage  # noqa: E402
+
+
+@pytest.fixture(scope="session", autouse=True)
+def database():
+    from manage import migrate_command
+
+    migrate_command(type("Args", (), {"revision": "head"})())
+    yield engine
+
+
+@pytest.fixture
+def storage():
+    memory = MemoryStorage()
+    set_storage(memory)
+    yield memory
+    set_storage(None)
+
+
+@pytest.fixture(scope="session")
+def client(database):
+    from main import app
+
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def make_user(db):
+    def _make(role: UserRole) -> User:
+        user = User(email=f"{role.value}-{os.urandom(4).hex()}@test.io", full_name=role.value, role=role)
+        db.add(user)
+        db.commit()
+        return user
+
+    return _make
+
+
+@pytest.fixture
+def make_delivery(db):
+    def _make(producer: User) -> Delivery:
+        project = Project(name="Project")
+        db.add(project)
+        db.flush()
+        delivery = Delivery(project_id=project.id, title="Delivery", created_by=producer.id)
+        db.add(delivery)
+        db.commit()
+        return delivery
+
+    return _make
+
+
+def auth(user: User) -> dict:
+    token = create_access_token({"sub": user.id, "role": user.role.value})
+    return {"Authorization": f"Bearer {token}"}
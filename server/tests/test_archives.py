@@ -0,0 +1,22 @@
+from models.user import UserRole
+
+from tests.conftest import auth
+
+
+def test_producer_cannot_download_another_producers_delivery_archive(client, make_user, make_delivery):
+    owner, other = make_user(UserRole.PRODUCER), make_user(UserRole.PRODUCER)
+    delivery = make_delivery(owner)
+
+    response = client.get(f"/api/deliveries/{delivery.id}/files/archive", headers=auth(other))
+
+    assert response.status_code == 403
+
+
+def test_owner_and_admin_can_download_delivery_archive(client, make_user, make_delivery):
+    owner, admin = make_user(UserRole.PRODUCER), make_user(UserRole.ADMIN)
+    delivery = make_delivery(owner)
+
+    for user in (owner, admin):
+        response = client.get(f"/api/deliveries/{delivery.id}/files/archive", headers=auth(user))
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/zip"
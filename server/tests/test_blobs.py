@@ -0,0 +1,79 @@
+import hashlib
+import os
+import tempfile
+
+from core.jobs import run_due_jobs
+from models.blob import Blob
+from models.file import File as FileModel
+from models.user import UserRole
+from services import blobs
+from services.uploads import StagedUpload
+
+
+def _staged(data: bytes) -> StagedUpload:
+    fd, path = tempfile.mkstemp()
+    with os.fdopen(fd, "wb") as out:
+        out.write(data)
+    return StagedUpload(filename="report.txt", temp_path=path, size=len(data), sha256=hashlib.sha256(data).hexdigest())
+
+
+def _attach(db, delivery, item: StagedUpload) -> FileModel:
+    # Même séquence que les endpoints d'upload : référence prise au flush, puis écriture
+    file = FileModel(filename=item.filename, storage_key=blobs.register(db, item), delivery_id=delivery.id)
+    db.add(file)
+    db.flush()
+    blobs.put(item)
+    db.commit()
+    return file
+
+
+def _ref_count(db, sha256: str):
+    db.expire_all()
+    blob = db.get(Blob, sha256)
+    return blob.ref_count if blob else None
+
+
+def test_put_open_dedupe_delete_and_collect(db, storage, make_user, make_delivery):
+    delivery = make_delivery(make_user(UserRole.PRODUCER))
+    data = os.urandom(1024)
+
+    first = _attach(db, delivery, _staged(data))
+    key = first.storage_key
+    sha256 = blobs.blob_hash(key)
+    assert list(storage.objects) == [key]
+    with blobs.open_file(key) as src:
+        assert src.read() == data
+
+    # Même contenu : une référence de plus, rien de réécrit, fichier en transit supprimé
+    duplicate = _staged(data)
+    second = _attach(db, delivery, duplicate)
+    assert second.storage_key == key
+    assert not os.path.exists(duplicate.temp_path)
+    assert _ref_count(db, sha256) == 2
+
+    db.delete(first)
+    db.delete(second)
+    db.commit()
+    # Suppression différée : la ligne et le contenu restent jusqu'au passage du ramasse-miettes
+    assert _ref_count(db, sha256) == 0
+    assert storage.exists(key)
+
+    run_due_jobs()
+    assert _ref_count(db, sha256) is None
+    assert not storage.exists(key)
+
+
+def test_collect_keeps_a_blob_referenced_again_before_it_runs(db, storage, make_user, make_delivery):
+    delivery = make_delivery(make_user(UserRole.PRODUCER))
+    data = os.urandom(1024)
+
+    file = _attach(db, delivery, _staged(data))
+    key, sha256 = file.storage_key, blobs.blob_hash(file.storage_key)
+    db.delete(file)
+    db.commit()
+
+    _attach(db, delivery, _staged(data))
+    run_due_jobs()
+
+    assert _ref_count(db, sha256) == 1
+    assert storage.exists(key)